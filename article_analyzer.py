@@ -0,0 +1,470 @@
+import re
+import json
+import argparse
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from llm_backends import PROVIDERS, get_backend
+from llm_runner import LLMRunner, estimate_tokens
+from llm_cache import ResponseCache, cached_completion
+from stage_manifest import StageManifest, file_hash
+from llm_streaming import stream_to_file, finish_partial
+from prompt_budget import clean_content, count_tokens, chunk_text
+from triz import get_triz_index, TRIZClassifier
+from dedup import NearDuplicateIndex, CONTENT_INDEX
+from corpus_store import CorpusStore
+from dates import published_at, utc_now_iso, parse_day, partition_dir, list_partitioned
+from instrumentation import metrics, stage, configure
+
+# Headroom reserved for the completion when budgeting tokens per minute
+COMPLETION_TOKENS = 1000
+
+# Articles whose prompt exceeds this are analyzed chunk by chunk and merged
+MAX_PROMPT_TOKENS = 6000
+CHUNK_TOKENS = 2500
+
+TEMPERATURE = 0.7
+SYSTEM_PROMPT = "You are an expert in analyzing scientific research through the lens of TRIZ principles. Provide detailed analysis of research papers focusing on innovation and TRIZ principles application."
+
+def create_output_directory(backend):
+    """Create the provider's output directory if it doesn't exist"""
+    output_dir = Path(backend.output_dir)
+    output_dir.mkdir(exist_ok=True)
+    return output_dir
+
+def load_article(file_path):
+    """Load article from JSON file"""
+    with metrics.timer('file_read_seconds', kind='scraped_article'), open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def build_analysis_prompt(article):
+    return f"""Article Title: {article['title']}
+Article Content: {article['content']}
+Article URL: {article['url']}
+
+Rewrite the articles in the lens of analysis on TRIZ principles following the guidance:
+What is the main idea of the research work? Explain how it is innovative. 
+If apply TRIZ principles reflected in this work, which TRIZ principles have been used. Explain. 
+"""
+
+def build_chunk_prompt(article, chunk, index, total):
+    return f"""Article Title: {article['title']}
+Article Excerpt ({index} of {total}):
+{chunk}
+
+Summarize the research described in this excerpt: the problem, the approach and the results.
+Note any TRIZ principles the work reflects. Be concise; your notes will be merged with notes on the rest of the article.
+"""
+
+def build_reduce_prompt(article, notes):
+    joined = "\n\n".join(f"Notes on part {i}:\n{note}" for i, note in enumerate(notes, 1))
+    return f"""Article Title: {article['title']}
+Article URL: {article['url']}
+The article is long, so here are notes on each part of it:
+{joined}
+
+Rewrite the articles in the lens of analysis on TRIZ principles following the guidance:
+What is the main idea of the research work? Explain how it is innovative. 
+If apply TRIZ principles reflected in this work, which TRIZ principles have been used. Explain. 
+"""
+
+def complete_cached(backend, prompt, runner=None, cache=None, refresh=False, validate=None, **kwargs):
+    """One rate-limited, cached completion; raises on failure.
+
+    `validate` may raise on a malformed response, which keeps it out of the cache.
+    """
+    def request():
+        if runner:
+            response = runner.call(
+                backend.complete, SYSTEM_PROMPT, prompt, TEMPERATURE,
+                tokens=estimate_tokens(prompt) + COMPLETION_TOKENS, **kwargs
+            )
+        else:
+            response = backend.complete(SYSTEM_PROMPT, prompt, TEMPERATURE, **kwargs)
+        if validate:
+            validate(response)
+        return response
+
+    # Identical prompts are served from the response cache without an API call
+    return cached_completion(cache, backend.model, SYSTEM_PROMPT, prompt, TEMPERATURE, request, refresh)
+
+def build_hints_prompt(candidates):
+    names = ', '.join(f"{p['id']}. {p['name']}" for p, _ in candidates)
+    return f"\nA keyword pre-classifier suggests these TRIZ principles may be relevant: {names}. Verify them against the article rather than assuming they apply.\n"
+
+def prepare_analysis_prompt(article, backend, runner=None, cache=None, refresh=False,
+                            max_prompt_tokens=MAX_PROMPT_TOKENS, hints=None):
+    """Final analysis prompt for an article.
+
+    Captions and boilerplate are trimmed first. If the article still does
+    not fit in `max_prompt_tokens`, its chunks are summarized in parallel
+    (map) and the returned prompt asks for an analysis of those notes
+    (reduce). `hints` are pre-classifier (principle, score) candidates
+    appended to the final prompt.
+    """
+    hints_prompt = build_hints_prompt(hints) if hints else ''
+    article = dict(article, content=clean_content(article['content']))
+    prompt = build_analysis_prompt(article)
+    if not max_prompt_tokens or count_tokens(prompt, backend.model) <= max_prompt_tokens:
+        return prompt + hints_prompt
+    
+    chunks = chunk_text(article['content'], min(CHUNK_TOKENS, max_prompt_tokens // 2), backend.model)
+    print(f"[{backend.label}] {article['title']}: over budget, analyzing {len(chunks)} chunks")
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        notes = list(executor.map(
+            lambda item: complete_cached(
+                backend, build_chunk_prompt(article, item[1], item[0], len(chunks)), runner, cache, refresh
+            ),
+            enumerate(chunks, 1)
+        ))
+    return build_reduce_prompt(article, notes) + hints_prompt
+
+def analyze_article(article, backend, runner=None, cache=None, refresh=False, max_prompt_tokens=MAX_PROMPT_TOKENS,
+                    hints=None):
+    """Analyze an article with the given LLM backend"""
+    try:
+        prompt = prepare_analysis_prompt(article, backend, runner, cache, refresh, max_prompt_tokens, hints)
+        return complete_cached(backend, prompt, runner, cache, refresh)
+    except Exception as e:
+        return f"Error analyzing article: {str(e)}"
+
+def build_structured_instructions():
+    return f"""
+Respond with a single JSON object and nothing else, using exactly these keys:
+{{"main_idea": "<the main idea of the research>",
+ "innovation": "<how the work is innovative>",
+ "principles": [{{"id": <principle number>, "name": "<principle name>", "explanation": "<how the work applies it>"}}]}}
+Only use principles from this numbered list of the 40 TRIZ principles:
+{get_triz_index().prompt_list()}
+"""
+
+def parse_structured_response(response):
+    """Parse an LLM JSON answer, tolerating a surrounding Markdown code fence"""
+    text = response.strip()
+    if text.startswith('```'):
+        text = re.sub(r'^```(?:json)?\s*|\s*```$', '', text)
+    data = json.loads(text)
+    if not isinstance(data, dict) or 'principles' not in data:
+        raise ValueError("structured analysis is missing 'principles'")
+    return data
+
+def analyze_article_structured(article, backend, runner=None, cache=None, refresh=False,
+                               max_prompt_tokens=MAX_PROMPT_TOKENS, hints=None):
+    """Analyze an article into a dict of main idea, innovation and validated TRIZ principles.
+
+    Raises on failure. Principles not found in TRIZ40.json are dropped.
+    """
+    prompt = prepare_analysis_prompt(article, backend, runner, cache, refresh, max_prompt_tokens, hints)
+    prompt += build_structured_instructions()
+    # Models without JSON mode rely on the instructions plus parse_structured_response
+    extra = {'response_format': {"type": "json_object"}} if backend.supports_json_mode else {}
+    response = complete_cached(
+        backend, prompt, runner, cache, refresh,
+        validate=parse_structured_response, **extra
+    )
+    data = parse_structured_response(response)
+    principles, rejected = get_triz_index().validate(data.get('principles'))
+    if rejected:
+        print(f"[{backend.label}] Dropped unknown TRIZ principles for {article['title']}: {rejected}")
+    return {
+        'article_id': article.get('article_id'),
+        'title': article['title'],
+        'url': article['url'],
+        'publication_date': article['publication_date'],
+        'published_at': published_at(article),
+        'provider': backend.name,
+        'model': backend.model,
+        'main_idea': str(data.get('main_idea', '')),
+        'innovation': str(data.get('innovation', '')),
+        'principles': principles,
+        'analyzed_at': utc_now_iso(),
+    }
+
+def render_structured_analysis(record):
+    """Plain-text rendering of a structured analysis, for prompts and display"""
+    lines = [
+        f"Main idea: {record['main_idea']}",
+        "",
+        f"Innovation: {record['innovation']}",
+        "",
+        "TRIZ principles:",
+    ]
+    for principle in record['principles']:
+        lines.append(f"- {principle['id']}. {principle['name']}: {principle['explanation']}")
+    return '\n'.join(lines)
+
+def save_structured_analysis(output_dir, record):
+    """Save a structured analysis as compact JSON (no copy of the article content)"""
+    output_path = partition_dir(output_dir, published_at(record)) / analysis_filename(record).replace('.txt', '.json')
+    with metrics.timer('file_write_seconds', kind='analysis'), open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, ensure_ascii=False, separators=(',', ':'))
+    return output_path
+
+def analysis_filename(article):
+    """Timestamped, filesystem-safe file name for an article's analysis"""
+    safe_title = "".join(c for c in article['title'] if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    safe_title = safe_title.replace(' ', '_')
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{timestamp}_{safe_title[:100]}.txt"
+
+def analysis_header(article, label):
+    """Everything in an analysis file that precedes the analysis itself"""
+    return (
+        f"Original Article Title: {article['title']}\n"
+        f"Original Article URL: {article['url']}\n"
+        f"Publication Date: {published_at(article) or 'unknown'}\n"
+        "\nOriginal Content:\n"
+        f"{article['content']}"
+        f"\n\n{label} Analysis:\n"
+    )
+
+def save_analysis(output_dir, article, analysis, label):
+    """Save an analysis to a file under a "<label> Analysis:" header, in its publication day's partition"""
+    output_path = partition_dir(output_dir, published_at(article)) / analysis_filename(article)
+    
+    with metrics.timer('file_write_seconds', kind='analysis'), open(output_path, 'w', encoding='utf-8') as f:
+        f.write(analysis_header(article, label))
+        f.write(analysis)
+    
+    return output_path
+
+class AnalysisStage:
+    """Everything one provider needs to analyze articles: backend, limits, outputs"""
+
+    def __init__(self, backend, runner, cache=None, refresh=False, force=False,
+                 stream=False, resume_partial=False, stall_timeout=60, max_prompt_tokens=MAX_PROMPT_TOKENS,
+                 structured=False, hints=None, corpus=None):
+        self.backend = backend
+        self.runner = runner
+        self.cache = cache
+        self.refresh = refresh
+        self.force = force
+        self.stream = stream
+        self.resume_partial = resume_partial
+        self.stall_timeout = stall_timeout
+        self.max_prompt_tokens = max_prompt_tokens
+        self.structured = structured
+        # Pre-classifier candidates per article file name, if enabled
+        self.hints = hints or {}
+        # Consolidated corpus to record analyses in, if any
+        self.corpus = corpus
+        self.output_dir = create_output_directory(backend)
+        # Only new or changed articles are analyzed; progress survives interruptions
+        self.manifest = StageManifest(self.output_dir / ".manifest.json")
+
+    def process_article(self, article_file):
+        """Load, analyze and save one article; returns its title, or None if skipped"""
+        return self.analyze(article_file)[0]
+
+    def analyze(self, article_file):
+        """Like process_article, but returns (title, analysis path).
+
+        The path is the current analysis, or None when this run's analysis failed.
+        """
+        with stage(f"analyze_{self.backend.name}"):
+            return self._process_article(article_file)
+
+    def _process_article(self, article_file):
+        article_file = Path(article_file)
+        input_hash = file_hash(article_file)
+        if not self.force and self.manifest.is_current(article_file.name, input_hash):
+            return None, self.manifest.output_for(article_file.name)
+        
+        article = load_article(article_file)
+        hints = self.hints.get(article_file.name)
+        if self.structured:
+            try:
+                record = analyze_article_structured(
+                    article, self.backend, self.runner, self.cache, self.refresh, self.max_prompt_tokens, hints
+                )
+                output_path = save_structured_analysis(self.output_dir, record)
+            except Exception as e:
+                print(f"[{self.backend.label}] Structured analysis error: {str(e)}")
+                output_path = None
+        elif self.stream:
+            output_path = self.stream_analysis(article, article_file)
+        else:
+            analysis = analyze_article(
+                article, self.backend, self.runner, self.cache, self.refresh, self.max_prompt_tokens, hints
+            )
+            if analysis.startswith("Error analyzing article:"):
+                output_path = None
+            else:
+                output_path = save_analysis(self.output_dir, article, analysis, self.backend.label)
+        if output_path is None:
+            # Leave failures out of the manifest so the next run retries them
+            print(f"[{self.backend.label}] Analysis failed for: {article['title']}")
+            return article['title'], None
+        
+        self.manifest.record(article_file.name, input_hash, output_path)
+        if self.corpus:
+            self.store_in_corpus(article, output_path)
+        print(f"[{self.backend.label}] Analysis completed and saved for: {article['title']}")
+        return article['title'], output_path
+
+    def store_in_corpus(self, article, output_path):
+        """Record the analysis alone (not the article content it repeats) in the corpus"""
+        # Imported here: the generator imports this module
+        from article_generator import load_processed_article
+        article_info = load_processed_article(output_path)
+        principles = article_info.get('principles')
+        self.corpus.put_analysis(
+            article.get('article_id') or self.corpus.resolve_id(article['url']), self.backend.name,
+            article_info.get('analysis', ''), [p['id'] for p in principles] if principles else None, principles
+        )
+
+    def stream_analysis(self, article, article_file):
+        """Stream the analysis straight into its output file; returns the path or None"""
+        header = analysis_header(article, self.backend.label)
+        # Keyed by input so a later run can find and resume it
+        partial_path = self.output_dir / f".{article_file.stem}.part"
+        streamed = {}
+
+        def request():
+            def stream():
+                return stream_to_file(
+                    self.backend, SYSTEM_PROMPT, prompt, TEMPERATURE, partial_path, header,
+                    resume=self.resume_partial, stall_timeout=self.stall_timeout
+                )
+            if self.runner:
+                result = self.runner.call(stream, tokens=estimate_tokens(prompt) + COMPLETION_TOKENS)
+            else:
+                result = stream()
+            streamed['result'] = result
+            return result.text
+
+        try:
+            # Only the final (or reduce) call is streamed
+            prompt = prepare_analysis_prompt(
+                article, self.backend, self.runner, self.cache, self.refresh, self.max_prompt_tokens,
+                self.hints.get(article_file.name)
+            )
+            analysis = cached_completion(self.cache, self.backend.model, SYSTEM_PROMPT, prompt, TEMPERATURE, request, self.refresh)
+        except Exception as e:
+            print(f"[{self.backend.label}] Streaming stopped ({str(e)}); partial output kept in {partial_path}")
+            return None
+        
+        if 'result' not in streamed:
+            # Cache hit: nothing was streamed
+            return save_analysis(self.output_dir, article, analysis, self.backend.label)
+        print(f"[{self.backend.label}] {streamed['result'].summary()}")
+        return finish_partial(partial_path, partition_dir(self.output_dir, published_at(article)) / analysis_filename(article))
+
+def preclassify(article_files, top_k=5):
+    """Rank likely TRIZ principles for all articles at once; returns {file name: [(principle, score)]}"""
+    texts = []
+    for article_file in article_files:
+        article = load_article(article_file)
+        texts.append(f"{article['title']}\n{clean_content(article['content'])}")
+    rankings = TRIZClassifier().rank(texts, top_k) if texts else []
+    return {article_file.name: ranking for article_file, ranking in zip(article_files, rankings)}
+
+def dedup_text(article):
+    """The text near-duplicate detection compares for a scraped article"""
+    return f"{article['title']}\n{clean_content(article['content'])}"
+
+def drop_near_duplicates(article_files, dedup):
+    """Keep one article file per story; returns (unique files, {duplicate file name: canonical file name})"""
+    unique, duplicates = [], {}
+    for article_file in article_files:
+        article = load_article(article_file)
+        canonical = dedup.canonical(article_file.name, dedup_text(article))
+        if canonical == article_file.name:
+            unique.append(article_file)
+        else:
+            duplicates[article_file.name] = canonical
+    dedup.save()
+    return unique, duplicates
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze scraped articles through the lens of TRIZ principles")
+    parser.add_argument('--provider', default='gpt',
+                        help=f"Comma-separated LLM providers to analyze with ({', '.join(PROVIDERS)}); "
+                             "several providers analyze every article in parallel for comparison")
+    parser.add_argument('--input-dir', default='scraped_articles', help="Directory of scraped article JSON files")
+    parser.add_argument('--concurrency', type=int, default=4, help="Maximum concurrent API calls per provider")
+    parser.add_argument('--rpm', type=int, help="Requests-per-minute budget per provider")
+    parser.add_argument('--tpm', type=int, help="Tokens-per-minute budget per provider")
+    parser.add_argument('--refresh', action='store_true', help="Ignore cached responses and call the API again")
+    parser.add_argument('--no-cache', action='store_true', help="Do not read or write the response cache")
+    parser.add_argument('--force', action='store_true', help="Re-analyze articles even if they are unchanged")
+    parser.add_argument('--max-prompt-tokens', type=int, default=MAX_PROMPT_TOKENS,
+                        help="Longer articles are analyzed in chunks and merged (0 disables chunking)")
+    parser.add_argument('--triz-hints', type=int, default=0,
+                        help="Add the local pre-classifier's top N candidate principles to each prompt")
+    parser.add_argument('--min-relevance', type=float, default=0.0,
+                        help="Skip the LLM for articles whose best pre-classifier score is below this (0-1)")
+    parser.add_argument('--structured', action='store_true',
+                        help="Ask for JSON output validated against TRIZ40.json and save it as compact .json")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream responses into the output files as tokens arrive (ignored with --structured)")
+    parser.add_argument('--resume-partial', action='store_true',
+                        help="Continue partial streamed outputs from an interrupted run instead of discarding them")
+    parser.add_argument('--stall-timeout', type=float, default=60,
+                        help="Seconds without a streamed token before a request is abandoned")
+    parser.add_argument('--dedup-index', default=CONTENT_INDEX, help="Near-duplicate index of scraped article content")
+    parser.add_argument('--no-dedup', action='store_true', help="Analyze near-duplicate articles too")
+    parser.add_argument('--corpus', help="Also record the analyses in this corpus database")
+    parser.add_argument('--since', type=parse_day, help="Only articles published on or after this UTC day (YYYY-MM-DD, today, yesterday or Nd)")
+    parser.add_argument('--until', type=parse_day, help="Only articles published on or before this UTC day")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure()
+    cache = None if args.no_cache else ResponseCache()
+    
+    # Get the article files from the scraped articles directory, only the window's partitions if given
+    article_files = list_partitioned(args.input_dir, "article_*.json", args.since, args.until)
+    
+    # Analyze each story once, however many feeds carried it
+    if not args.no_dedup:
+        article_files, duplicates = drop_near_duplicates(article_files, NearDuplicateIndex(args.dedup_index))
+        for duplicate, canonical in sorted(duplicates.items()):
+            print(f"Near-duplicate skipped: {duplicate} (same story as {canonical})")
+    
+    # Score the whole batch locally before spending any API calls
+    hints = {}
+    if args.triz_hints or args.min_relevance:
+        rankings = preclassify(article_files, max(args.triz_hints, 1))
+        if args.min_relevance:
+            relevant = [f for f in article_files if rankings[f.name][0][1] >= args.min_relevance]
+            print(f"Pre-classifier: {len(article_files) - len(relevant)} low-relevance articles skipped")
+            article_files = relevant
+        if args.triz_hints:
+            hints = rankings
+    
+    # One stage per provider, each with its own rate limits and output directory
+    corpus = CorpusStore(args.corpus) if args.corpus else None
+    stages = []
+    for name in args.provider.split(','):
+        runner = LLMRunner(
+            concurrency=args.concurrency,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm,
+        )
+        backend = get_backend(name.strip(), max_connections=args.concurrency)
+        stages.append(AnalysisStage(
+            backend, runner, cache, args.refresh, args.force,
+            stream=args.stream, resume_partial=args.resume_partial, stall_timeout=args.stall_timeout,
+            max_prompt_tokens=args.max_prompt_tokens, structured=args.structured, hints=hints,
+            corpus=corpus,
+        ))
+    providers = ', '.join(analysis_stage.backend.label for analysis_stage in stages)
+    print(f"Analyzing {len(article_files)} articles with {providers}, up to {args.concurrency} concurrent requests each")
+    
+    # Fan every article out to every provider at once
+    jobs = [(analysis_stage, article_file) for article_file in article_files for analysis_stage in stages]
+    with ThreadPoolExecutor(max_workers=args.concurrency * len(stages)) as executor:
+        titles = list(executor.map(lambda job: job[0].process_article(job[1]), jobs))
+    
+    if cache:
+        print(cache.stats())
+        cache.evict()
+    
+    print("\nProcessed articles:")
+    for (analysis_stage, article_file), title in zip(jobs, titles):
+        print(f"[{analysis_stage.backend.label}] {article_file.name}: {title or 'unchanged, skipped'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import re
+import logging
+import threading
+from dates import to_utc_iso, utc_now_iso
+from html.parser import HTMLParser
+import requests
+from politeness import parse_retry_after
+from instrumentation import metrics
+
+# Elements whose text Selenium would render on its own line
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table',
+    'td', 'th', 'tr', 'ul',
+}
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr',
+}
+# Never visible, so never part of the extracted text
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'head'}
+
+BLOCK_STATUS_CODES = {403, 429, 503}
+BLOCK_MARKERS = (
+    'captcha',
+    'cf-challenge',
+    'just a moment...',
+    'access denied',
+    'are you a robot',
+    'enable javascript and cookies',
+)
+
+class Node:
+    def __init__(self, tag, attrs, parent=None):
+        self.tag = tag
+        self.classes = set((dict(attrs).get('class') or '').split())
+        self.parent = parent
+        self.children = []
+
+    def find(self, predicate):
+        """Depth-first search for the first descendant matching predicate"""
+        for child in self.children:
+            if isinstance(child, Node):
+                if predicate(child):
+                    return child
+                found = child.find(predicate)
+                if found is not None:
+                    return found
+        return None
+
+    def text(self):
+        """Visible text, one line per block element, like WebElement.text"""
+        parts = []
+        self._collect_text(parts)
+        lines = (re.sub(r'\s+', ' ', line).strip() for line in ''.join(parts).split('\n'))
+        return '\n'.join(line for line in lines if line)
+
+    def _collect_text(self, parts):
+        if self.tag in SKIP_TAGS:
+            return
+        if self.tag in BLOCK_TAGS:
+            parts.append('\n')
+        for child in self.children:
+            if isinstance(child, Node):
+                child._collect_text(parts)
+            else:
+                parts.append(child.replace('\n', ' '))
+        if self.tag in BLOCK_TAGS:
+            parts.append('\n')
+
+class TreeBuilder(HTMLParser):
+    """Builds a minimal, forgiving element tree with the standard library parser"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node('#document', [])
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, attrs, self.current)
+        self.current.children.append(node)
+        if tag not in VOID_TAGS:
+            self.current = node
+
+    def handle_startendtag(self, tag, attrs):
+        self.current.children.append(Node(tag, attrs, self.current))
+
+    def handle_endtag(self, tag):
+        # Close up to the matching open element; ignore stray end tags
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+def parse_html(html):
+    builder = TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+def is_blocked(status_code, html):
+    """Whether a response is a block or challenge page.
+
+    Markers are only looked for in the visible text, never in scripts or
+    <head>: normal article pages load reCAPTCHA and similar widgets. Call
+    it for a 200 response only after the article selectors missed.
+    """
+    if status_code in BLOCK_STATUS_CODES:
+        return True
+    visible = parse_html(html).text()[:20000].lower()
+    return any(marker in visible for marker in BLOCK_MARKERS)
+
+def extract_article_fields(html, url):
+    """Pull the same fields the Selenium scrapers read out of raw HTML.
+
+    Returns None when any required selector is missing.
+    """
+    root = parse_html(html)
+    article = root.find(lambda n: n.tag == 'article')
+    title = root.find(lambda n: n.tag == 'h1')
+    if article is None or title is None:
+        return None
+    main = article.find(lambda n: 'article-main' in n.classes)
+    if main is None:
+        return None
+    
+    date_element = root.find(lambda n: 'text-gray-500' in n.classes)
+    pub_date = to_utc_iso(date_element.text()) if date_element is not None else None
+    
+    return {
+        "title": title.text(),
+        "url": url,
+        "publication_date": pub_date,
+        "content": main.text(),
+        "scraped_at": utc_now_iso(),
+        "scraping_method": "http"
+    }
+
+class TieredExtractor:
+    """Try a plain HTTP fetch first and fall back to a browser.
+
+    `fallback` is any callable taking a URL and returning article data,
+    e.g. the Firefox or undetected-Chrome scrapers. `tier_counts` records
+    which tier served each article so the HTTP hit rate can be reported.
+    An optional HostScheduler paces the HTTP requests per host.
+    """
+
+    def __init__(self, fallback, user_agent=None, timeout=15, scheduler=None):
+        self.fallback = fallback
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+        })
+        if user_agent:
+            self.session.headers['User-Agent'] = user_agent
+        self.tier_counts = {'http': 0, 'browser': 0, 'failed': 0}
+        self._lock = threading.Lock()
+
+    def fetch_http(self, url):
+        """Return (article_data, reason); article_data is None on a miss"""
+        if self.scheduler:
+            self.scheduler.wait(url)
+        try:
+            with metrics.timer('page_load_seconds', tier='http'):
+                response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            return None, f"request failed: {str(e)}"
+        html = response.text
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if self.scheduler and retry_after and response.status_code in BLOCK_STATUS_CODES:
+            self.scheduler.defer(url, retry_after)
+        if response.status_code != 200:
+            if is_blocked(response.status_code, html):
+                return None, f"blocked (HTTP {response.status_code})"
+            return None, f"HTTP {response.status_code}"
+        with metrics.timer('html_parse_seconds'):
+            article_data = extract_article_fields(html, url)
+        if article_data is None:
+            if is_blocked(response.status_code, html):
+                return None, "blocked (challenge page)"
+            return None, "selectors missing"
+        return article_data, None
+
+    def _count(self, tier):
+        metrics.inc('articles_extracted', tier=tier)
+        with self._lock:
+            self.tier_counts[tier] += 1
+
+    def extract(self, url):
+        article_data, reason = self.fetch_http(url)
+        if article_data:
+            logging.info(f"Served by HTTP tier: {url}")
+            self._count('http')
+            return article_data
+        
+        logging.info(f"HTTP tier missed ({reason}), falling back to browser: {url}")
+        try:
+            article_data = self.fallback(url)
+        except Exception:
+            self._count('failed')
+            raise
+        self._count('browser' if article_data else 'failed')
+        return article_data
+
+    def hit_rate(self):
+        served = self.tier_counts['http'] + self.tier_counts['browser']
+        return self.tier_counts['http'] / served if served else 0.0
@@ -1,22 +1,44 @@
-import os
-import openai
-import time
+import re
+import json
+import argparse
 from pathlib import Path
-from dotenv import load_dotenv
+from llm_backends import PROVIDERS, get_backend
+from llm_cache import ResponseCache, cached_completion
+from stage_manifest import StageManifest, file_hash
+from llm_streaming import stream_to_file, finish_partial
+from prompt_budget import truncate_to_budget
+from article_analyzer import render_structured_analysis
+from search_index import SearchIndex, SEARCH_DB, load_feed_metadata
+from corpus_store import CorpusStore
+from dates import parse_day, list_partitioned
+from instrumentation import metrics, stage, configure
 
-# Load environment variables from .env file
-load_dotenv()
+# Cap on the analysis text passed to the generator prompt
+MAX_ANALYSIS_TOKENS = 3000
 
-# Set OpenAI API key
-openai.api_key = os.getenv('OPENAI_API_KEY')
+# Analysis section header written by the analyzer, e.g. "GPT Analysis:" or "DeepSeek Analysis:".
+# Only provider labels match, so an "X Analysis:" line inside the LLM's answer is kept.
+ANALYSIS_HEADER = re.compile(
+    r'^(%s) Analysis:$' % '|'.join(re.escape(p['label']) for p in PROVIDERS.values()),
+    re.MULTILINE
+)
 
 def load_processed_article(file_path):
-    """Load and parse a processed article file"""
+    """Load and parse a processed article file (.txt or structured .json)"""
+    if Path(file_path).suffix == '.json':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+        # Structured analyses need no text re-parsing
+        return {
+            'title': record['title'],
+            'url': record['url'],
+            'analysis': render_structured_analysis(record),
+            'principles': record['principles'],
+        }
+    
     with open(file_path, 'r', encoding='utf-8') as f:
         content = f.read()
     
-    # Split the content into sections
-    sections = content.split('\n\n')
     article_info = {}
     
     for line in content.split('\n'):
@@ -25,20 +47,28 @@ def load_processed_article(file_path):
         elif line.startswith('Original Article URL:'):
             article_info['url'] = line.replace('Original Article URL:', '').strip()
     
-    # Find GPT Analysis section
-    analysis_start = content.find('GPT Analysis:')
-    if analysis_start != -1:
-        article_info['analysis'] = content[analysis_start:].replace('GPT Analysis:', '').strip()
+    # The analyzer appends its header after the original content, so the last
+    # match is the real one even when the scraped text contains "GPT Analysis:"
+    headers = list(ANALYSIS_HEADER.finditer(content))
+    if headers:
+        article_info['analysis'] = content[headers[-1].end():].strip()
     
     return article_info
 
-def generate_article(article_info):
-    """Generate a new article using GPT-4"""
-    prompt = f"""Based on the following analysis of a scientific research paper, write a comprehensive article that focuses on the innovation through the lens of TRIZ principles.
+def list_processed_files(processed_dir, since=None, until=None):
+    """Text and structured analyses in a processed directory, only the window's day partitions if given"""
+    return list_partitioned(processed_dir, ["*.txt", "*.json"], since, until)
+
+TEMPERATURE = 0.7
+SYSTEM_PROMPT = "You are an expert science and technology writer specializing in innovation analysis. Write engaging articles that explain complex innovations through the lens of TRIZ principles in a way that's accessible to a technical audience."
+
+def build_generation_prompt(article_info):
+    analysis = truncate_to_budget(article_info['analysis'], MAX_ANALYSIS_TOKENS)
+    return f"""Based on the following analysis of a scientific research paper, write a comprehensive article that focuses on the innovation through the lens of TRIZ principles.
 
 Title: {article_info['title']}
 Original URL: {article_info['url']}
-Analysis: {article_info['analysis']}
+Analysis: {analysis}
 
 Write a well-structured article that includes:
 1. An engaging title that highlights the innovation
@@ -51,67 +81,193 @@ Format the article with appropriate sections and maintain a professional yet eng
 Include references to the original research paper.
 """
 
+def generate_article(article_info, cache=None, refresh=False, backend=None):
+    """Generate a new article with the given LLM backend (GPT-4 by default)"""
+    backend = backend or get_backend('gpt')
+    prompt = build_generation_prompt(article_info)
+
+    def request():
+        return backend.complete(SYSTEM_PROMPT, prompt, TEMPERATURE)
+
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert science and technology writer specializing in innovation analysis. Write engaging articles that explain complex innovations through the lens of TRIZ principles in a way that's accessible to a technical audience."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-        )
-        return response.choices[0].message['content']
+        # Identical prompts are served from the response cache without an API call
+        return cached_completion(cache, backend.model, SYSTEM_PROMPT, prompt, TEMPERATURE, request, refresh)
     except Exception as e:
         return f"Error generating article: {str(e)}"
 
-def save_generated_article(output_dir, title, content):
-    """Save the generated article to a file"""
-    # Create a safe filename
+def stream_generated_article(output_dir, article_info, backend, cache=None, refresh=False,
+                             resume=False, stall_timeout=60):
+    """Generate an article, writing tokens to disk as they arrive.
+
+    Returns the saved path, or None if the stream failed (the partial
+    `.md.part` file is kept so a later run can resume it).
+    """
+    prompt = build_generation_prompt(article_info)
+    output_path = output_dir / generated_filename(article_info['title'])
+    partial_path = output_path.with_name(output_path.name + '.part')
+    streamed = {}
+
+    def request():
+        result = stream_to_file(
+            backend, SYSTEM_PROMPT, prompt, TEMPERATURE, partial_path,
+            resume=resume, stall_timeout=stall_timeout
+        )
+        streamed['result'] = result
+        return result.text
+
+    try:
+        content = cached_completion(cache, backend.model, SYSTEM_PROMPT, prompt, TEMPERATURE, request, refresh)
+    except Exception as e:
+        print(f"Streaming stopped ({str(e)}); partial output kept in {partial_path}")
+        return None
+    
+    if 'result' not in streamed:
+        # Cache hit: nothing was streamed
+        return save_generated_article(output_dir, article_info['title'], content)
+    print(streamed['result'].summary())
+    return finish_partial(partial_path, output_path)
+
+def generated_filename(title):
+    """Filesystem-safe Markdown file name for a generated article"""
     safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
     safe_title = safe_title.replace(' ', '_')
-    filename = f"{safe_title[:100]}.md"
-    
-    output_path = output_dir / filename
+    return f"{safe_title[:100]}.md"
+
+def save_generated_article(output_dir, title, content):
+    """Save the generated article to a file"""
+    output_path = output_dir / generated_filename(title)
     
-    with open(output_path, 'w', encoding='utf-8') as f:
+    with metrics.timer('file_write_seconds', kind='generated_article'), open(output_path, 'w', encoding='utf-8') as f:
         f.write(content)
     
     return output_path
 
-def main():
-    # Create output directory for generated articles
-    output_dir = Path("generated_articles")
-    output_dir.mkdir(exist_ok=True)
-    
-    # Get all processed article files
-    processed_dir = Path("gpt_processed")
-    processed_files = sorted(processed_dir.glob("*.txt"))
-    
-    print(f"Found {len(processed_files)} processed articles to generate from.")
-    
-    # Process each article
-    for i, proc_file in enumerate(processed_files, 1):
-        print(f"\nProcessing file {i}/{len(processed_files)}: {proc_file.name}")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate articles from analyzed research")
+    parser.add_argument('--provider', default='gpt', help=f"LLM provider to write with ({', '.join(PROVIDERS)})")
+    parser.add_argument('--input-dir', default='gpt_processed', help="Directory of analysis files to generate from")
+    parser.add_argument('--refresh', action='store_true', help="Ignore cached responses and call the API again")
+    parser.add_argument('--no-cache', action='store_true', help="Do not read or write the response cache")
+    parser.add_argument('--force', action='store_true', help="Regenerate articles even if their analysis is unchanged")
+    parser.add_argument('--stream', action='store_true', help="Stream articles into their .md files as tokens arrive")
+    parser.add_argument('--resume-partial', action='store_true',
+                        help="Continue partial streamed articles from an interrupted run instead of discarding them")
+    parser.add_argument('--stall-timeout', type=float, default=60,
+                        help="Seconds without a streamed token before a request is abandoned")
+    parser.add_argument('--search-db', default=SEARCH_DB, help="Search index to add generated articles to")
+    parser.add_argument('--feed', default='chemistry_news.json', help="RSS feed JSON with publication dates and tags")
+    parser.add_argument('--corpus', help="Also record the generated articles in this corpus database")
+    parser.add_argument('--since', type=parse_day, help="Only articles published on or after this UTC day (YYYY-MM-DD, today, yesterday or Nd)")
+    parser.add_argument('--until', type=parse_day, help="Only articles published on or before this UTC day")
+    return parser.parse_args()
+
+class GenerationStage:
+    """Everything needed to turn analyses into published articles: backend, outputs, search index"""
+
+    def __init__(self, backend, cache=None, refresh=False, force=False, stream=False,
+                 resume_partial=False, stall_timeout=60, search_db=SEARCH_DB, feed_file='chemistry_news.json',
+                 output_dir="generated_articles", corpus=None):
+        self.backend = backend
+        self.cache = cache
+        self.refresh = refresh
+        self.force = force
+        self.stream = stream
+        self.resume_partial = resume_partial
+        self.stall_timeout = stall_timeout
+        
+        # Create output directory for generated articles
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(exist_ok=True)
+        
+        # Only new or changed analyses are regenerated; progress survives interruptions
+        self.manifest = StageManifest(self.output_dir / ".manifest.json")
+        
+        # New articles become searchable as soon as they are written
+        self.search_index = SearchIndex(search_db)
+        self.feed_metadata = load_feed_metadata(feed_file)
+        # Consolidated corpus to record generated articles in, if any
+        self.corpus = corpus
+
+    def process_file(self, proc_file):
+        """Generate, save and index the article for one analysis; returns its path, or None on failure"""
+        with stage('generate'):
+            return self._process_file(proc_file)
+
+    def _process_file(self, proc_file):
+        proc_file = Path(proc_file)
+        input_hash = file_hash(proc_file)
+        if not self.force and self.manifest.is_current(proc_file.name, input_hash):
+            return self.manifest.output_for(proc_file.name)
+        
+        print(f"\nGenerating article from: {proc_file.name}")
         
         # Load the processed article
         article_info = load_processed_article(proc_file)
         
         # Generate new article
-        generated_content = generate_article(article_info)
-        
-        # Save the generated article
-        output_path = save_generated_article(output_dir, article_info['title'], generated_content)
+        misses_before = self.cache.misses if self.cache else None
+        if self.stream:
+            output_path = stream_generated_article(
+                self.output_dir, article_info, self.backend, self.cache, self.refresh,
+                resume=self.resume_partial, stall_timeout=self.stall_timeout
+            )
+            if output_path is None:
+                return None
+        else:
+            generated_content = generate_article(article_info, self.cache, self.refresh, self.backend)
+            
+            if generated_content.startswith("Error generating article:"):
+                # Leave failures out of the manifest so the next run retries them
+                print(generated_content)
+                return None
+            
+            # Save the generated article
+            output_path = save_generated_article(self.output_dir, article_info['title'], generated_content)
+        previous_output = self.manifest.output_for(proc_file.name)
+        self.manifest.record(proc_file.name, input_hash, output_path)
+        if previous_output and previous_output != str(output_path):
+            self.search_index.remove(previous_output)
+        with open(output_path, 'r', encoding='utf-8') as f:
+            body = f.read()
+        self.search_index.add(output_path, body, article_info, self.feed_metadata.get(article_info.get('url')))
+        if self.corpus:
+            self.corpus.put_generated(self.corpus.resolve_id(article_info.get('url', '')), body, output_path)
         
         print(f"Generated article saved to: {output_path}")
         
-        # Add a small delay to avoid rate limits
-        time.sleep(1)
+        # Add a small delay to avoid rate limits (cache hits made no API call)
+        if not self.cache or self.cache.misses != misses_before:
+            metrics.sleep(1, 'generation_delay')
+        return output_path
+
+    def close(self):
+        self.search_index.close()
+
+def main():
+    args = parse_args()
+    configure()
+    cache = None if args.no_cache else ResponseCache()
+    generation = GenerationStage(
+        get_backend(args.provider), cache, args.refresh, args.force,
+        stream=args.stream, resume_partial=args.resume_partial, stall_timeout=args.stall_timeout,
+        search_db=args.search_db, feed_file=args.feed,
+        corpus=CorpusStore(args.corpus) if args.corpus else None,
+    )
+    
+    # Get all processed article files
+    processed_dir = Path(args.input_dir)
+    processed_files = list_processed_files(processed_dir, args.since, args.until)
+    
+    print(f"Found {len(processed_files)} processed articles to generate from.")
+    
+    # Process each article
+    for proc_file in processed_files:
+        generation.process_file(proc_file)
+    
+    generation.close()
+    if cache:
+        print(cache.stats())
+        cache.evict()
 
 if __name__ == "__main__":
     main()
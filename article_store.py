@@ -0,0 +1,178 @@
+import sqlite3
+import json
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from dates import published_at
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    article_id TEXT NOT NULL UNIQUE,
+    guid TEXT,
+    link TEXT,
+    title TEXT,
+    summary TEXT,
+    published TEXT,
+    published_parsed TEXT,
+    published_at TEXT,
+    authors TEXT,
+    tags TEXT,
+    feed_url TEXT,
+    first_seen TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stage_status (
+    article_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    output TEXT,
+    done_at TEXT NOT NULL,
+    PRIMARY KEY (article_id, stage)
+);
+"""
+
+def article_id(article):
+    """Stable ID for a feed entry, keyed by GUID with the link as fallback"""
+    key = article.get('guid') or article.get('link') or article.get('url', '')
+    return hashlib.sha1(key.strip().encode('utf-8')).hexdigest()[:16]
+
+class ArticleStore:
+    """Append-only, GUID/URL-keyed index of every article we have seen.
+
+    Each feed poll merges its entries in; entries already known are left
+    untouched, so an article keeps its ID and its place in the history
+    even after it has dropped out of the RSS window.
+    """
+
+    def __init__(self, db_file='articles.db'):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Add and backfill the normalized publication time in indexes created before it existed"""
+        columns = [row['name'] for row in self.conn.execute("PRAGMA table_info(articles)")]
+        with self.conn:
+            if 'published_at' not in columns:
+                self.conn.execute("ALTER TABLE articles ADD COLUMN published_at TEXT")
+            rows = self.conn.execute(
+                "SELECT article_id, published, published_parsed FROM articles WHERE published_at IS NULL"
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE articles SET published_at = ? WHERE article_id = ?",
+                [(published_at(dict(row)), row['article_id']) for row in rows]
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS articles_published_at ON articles (published_at)")
+
+    def merge(self, articles):
+        """Insert unseen articles and return only the new ones.
+
+        Every article dict passed in gets its `article_id` set, new or not.
+        """
+        new_articles = []
+        now = datetime.now().isoformat()
+        with self._lock, self.conn:
+            for article in articles:
+                article['article_id'] = article_id(article)
+                article['published_at'] = published_at(article)
+                cursor = self.conn.execute(
+                    """INSERT OR IGNORE INTO articles
+                       (article_id, guid, link, title, summary, published, published_parsed, published_at,
+                        authors, tags, feed_url, first_seen)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (
+                        article['article_id'],
+                        article.get('guid', ''),
+                        article.get('link', ''),
+                        article.get('title', ''),
+                        article.get('summary', ''),
+                        article.get('published', ''),
+                        article.get('published_parsed'),
+                        article['published_at'],
+                        json.dumps(article.get('authors', [])),
+                        json.dumps(article.get('tags', [])),
+                        article.get('feed_url', ''),
+                        now,
+                    )
+                )
+                if cursor.rowcount:
+                    new_articles.append(article)
+        return new_articles
+
+    def _row_to_article(self, row):
+        article = dict(row)
+        article['authors'] = json.loads(article['authors'] or '[]')
+        article['tags'] = json.loads(article['tags'] or '[]')
+        return article
+
+    def get(self, article_id):
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM articles WHERE article_id = ?", (article_id,)).fetchone()
+        return self._row_to_article(row) if row else None
+
+    def articles(self, since_seq=0):
+        """All articles in first-seen order, optionally only those after `since_seq`"""
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM articles WHERE seq > ? ORDER BY seq", (since_seq,)).fetchall()
+        return [self._row_to_article(row) for row in rows]
+
+    def pending(self, stage, since=None, until=None):
+        """Articles that have not been through `stage` yet, optionally only those published in [since, until] (UTC days)"""
+        conditions = ["s.article_id IS NULL"]
+        params = [stage]
+        if since:
+            conditions.append("a.published_at >= ?")
+            params.append(since.isoformat())
+        if until:
+            conditions.append("a.published_at < ?")
+            params.append((until + timedelta(days=1)).isoformat())
+        with self._lock:
+            rows = self.conn.execute(
+                f"""SELECT a.* FROM articles a
+                   LEFT JOIN stage_status s ON s.article_id = a.article_id AND s.stage = ?
+                   WHERE {' AND '.join(conditions)}
+                   ORDER BY a.seq""",
+                params
+            ).fetchall()
+        return [self._row_to_article(row) for row in rows]
+
+    def mark_done(self, article_id, stage, output=None):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO stage_status (article_id, stage, output, done_at) VALUES (?, ?, ?, ?)",
+                (article_id, stage, output, datetime.now().isoformat())
+            )
+
+    def output(self, article_id, stage):
+        """What `stage` recorded for an article, or None if it has not been through it"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT output FROM stage_status WHERE article_id = ? AND stage = ?", (article_id, stage)
+            ).fetchone()
+        return row['output'] if row else None
+
+    def release_orphaned_duplicates(self):
+        """Re-offer articles marked as duplicates of an article that never got through that stage.
+
+        Returns the number of stage entries removed.
+        """
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                """DELETE FROM stage_status
+                   WHERE output LIKE 'duplicate:%'
+                   AND NOT EXISTS (
+                       SELECT 1 FROM stage_status c
+                       WHERE c.article_id = substr(stage_status.output, 11) AND c.stage = stage_status.stage
+                       AND c.output IS NOT NULL AND c.output NOT LIKE 'duplicate:%'
+                   )"""
+            )
+        return cursor.rowcount
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,202 @@
+import io
+import os
+import json
+import argparse
+from pathlib import Path
+from llm_backends import PROVIDERS, get_backend
+from llm_cache import ResponseCache
+from stage_manifest import StageManifest, file_hash
+from prompt_budget import clean_content, truncate_to_budget
+from article_analyzer import (
+    SYSTEM_PROMPT, TEMPERATURE, MAX_PROMPT_TOKENS, build_analysis_prompt, create_output_directory,
+    load_article, save_analysis,
+)
+from dates import parse_day, list_partitioned
+from instrumentation import metrics, configure
+
+BATCH_STATE_DIR = Path("cache/batches")
+TERMINAL_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+# Only OpenAI has /files and /batches; DeepSeek and local servers do not
+BATCH_PROVIDERS = [name for name, config in PROVIDERS.items() if config.get('batch_api')]
+
+def build_batch_requests(article_files, backend, manifest, force=False, limit=None, exclude=()):
+    """One Batch API request line per article that still needs analysis, at most `limit`.
+
+    Articles whose custom_id is in `exclude` (already in a pending batch)
+    are skipped.
+    """
+    requests = []
+    for article_file in article_files:
+        if limit is not None and len(requests) >= limit:
+            break
+        if article_file.stem in exclude:
+            continue
+        input_hash = file_hash(article_file)
+        if not force and manifest.is_current(article_file.name, input_hash):
+            continue
+        article = load_article(article_file)
+        # A batch is a single round trip, so oversized articles are truncated rather than chunked
+        content = truncate_to_budget(clean_content(article['content']), MAX_PROMPT_TOKENS, backend.model)
+        article = dict(article, content=content)
+        requests.append({
+            'custom_id': article_file.stem,
+            'article_file': str(article_file),
+            'input_hash': input_hash,
+            'prompt': build_analysis_prompt(article),
+        })
+    return requests
+
+def submit_batch(backend, requests):
+    """Upload the requests as one JSONL file and start a batch job"""
+    if not backend.batch_api:
+        raise ValueError(f"Provider '{backend.name}' has no Batch API")
+    lines = []
+    for request in requests:
+        lines.append(json.dumps({
+            'custom_id': request['custom_id'],
+            'method': 'POST',
+            'url': '/v1/chat/completions',
+            'body': {
+                'model': backend.model,
+                'messages': backend.messages(SYSTEM_PROMPT, request['prompt']),
+                'temperature': TEMPERATURE,
+            },
+        }, ensure_ascii=False))
+    payload = io.BytesIO(('\n'.join(lines) + '\n').encode('utf-8'))
+    batch_file = backend.client.files.create(file=('triz_batch.jsonl', payload), purpose='batch')
+    batch = backend.client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint='/v1/chat/completions',
+        completion_window='24h',
+        metadata={'description': f"TRIZ analysis of {len(requests)} articles"},
+    )
+    return batch
+
+def save_batch_state(batch_id, provider, requests):
+    """Remember which article each custom_id belongs to, so a later run can collect"""
+    BATCH_STATE_DIR.mkdir(parents=True, exist_ok=True)
+    state = {
+        'batch_id': batch_id,
+        'provider': provider,
+        'requests': {r['custom_id']: {k: r[k] for k in ('article_file', 'input_hash', 'prompt')} for r in requests},
+    }
+    with open(BATCH_STATE_DIR / f"{batch_id}.json", 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+
+def load_batch_state(batch_id):
+    with open(BATCH_STATE_DIR / f"{batch_id}.json", 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def pending_custom_ids(provider):
+    """custom_ids of every submitted, not yet collected batch of `provider`"""
+    pending = set()
+    if not BATCH_STATE_DIR.is_dir():
+        return pending
+    for state_file in BATCH_STATE_DIR.glob("*.json"):
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('provider') == provider:
+            pending.update(state['requests'])
+    return pending
+
+def wait_for_batch(backend, batch_id, poll_interval=60):
+    """Poll until the batch reaches a terminal status"""
+    while True:
+        batch = backend.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        progress = f"{counts.completed}/{counts.total} done, {counts.failed} failed" if counts else ""
+        print(f"Batch {batch_id}: {batch.status} {progress}")
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        metrics.sleep(poll_interval, 'batch_poll')
+
+def read_batch_output(backend, batch):
+    """Map custom_id -> response text (or None for failed requests)"""
+    results = {}
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        for line in backend.client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get('response') or {}
+            body = response.get('body') or {}
+            if response.get('status_code') == 200 and body.get('choices'):
+                results[record['custom_id']] = body['choices'][0]['message']['content']
+            else:
+                results.setdefault(record['custom_id'], None)
+    return results
+
+def fan_out_results(backend, state, results, cache=None):
+    """Write every successful result to the provider's processed directory"""
+    output_dir = create_output_directory(backend)
+    manifest = StageManifest(output_dir / ".manifest.json")
+    saved = 0
+    for custom_id, request in state['requests'].items():
+        analysis = results.get(custom_id)
+        if not analysis:
+            print(f"No result for {custom_id}; it will be picked up by the next run")
+            continue
+        article_file = Path(request['article_file'])
+        article = load_article(article_file)
+        output_path = save_analysis(output_dir, article, analysis, backend.label)
+        manifest.record(article_file.name, request['input_hash'], output_path)
+        if cache:
+            # Let the synchronous path reuse batch answers for free
+            cache.set(cache.key(backend.model, SYSTEM_PROMPT, request['prompt'], TEMPERATURE), analysis, model=backend.model)
+        saved += 1
+    return saved
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a backlog of articles with the Batch API")
+    parser.add_argument('--provider', default='gpt', choices=BATCH_PROVIDERS, help="LLM provider with a Batch API")
+    parser.add_argument('--input-dir', default='scraped_articles', help="Directory of scraped article JSON files")
+    parser.add_argument('--limit', type=int, help="Maximum number of articles to put in the batch")
+    parser.add_argument('--poll-interval', type=float, default=60, help="Seconds between status checks")
+    parser.add_argument('--batch-id', help="Collect the results of a previously submitted batch instead of submitting")
+    parser.add_argument('--no-wait', action='store_true', help="Submit and exit; collect later with --batch-id")
+    parser.add_argument('--force', action='store_true', help="Include articles that are already analyzed")
+    parser.add_argument('--since', type=parse_day, help="Only articles published on or after this UTC day (YYYY-MM-DD, today, yesterday or Nd)")
+    parser.add_argument('--until', type=parse_day, help="Only articles published on or before this UTC day")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure()
+    backend = get_backend(args.provider)
+    
+    if args.batch_id:
+        state = load_batch_state(args.batch_id)
+        batch_id = args.batch_id
+        backend = get_backend(state['provider'])
+    else:
+        output_dir = create_output_directory(backend)
+        manifest = StageManifest(output_dir / ".manifest.json")
+        article_files = list_partitioned(args.input_dir, "article_*.json", args.since, args.until)
+        # Articles already waiting in a submitted batch are not sent twice
+        pending = pending_custom_ids(args.provider)
+        requests = build_batch_requests(article_files, backend, manifest, args.force, args.limit, pending)
+        if not requests:
+            print("Nothing to analyze")
+            return
+        batch = submit_batch(backend, requests)
+        batch_id = batch.id
+        save_batch_state(batch_id, args.provider, requests)
+        state = load_batch_state(batch_id)
+        print(f"Submitted batch {batch_id} with {len(requests)} articles")
+        if args.no_wait:
+            print(f"Collect results later with: python batch_analyzer.py --provider {args.provider} --batch-id {batch_id}")
+            return
+    
+    batch = wait_for_batch(backend, batch_id, args.poll_interval)
+    if batch.status != 'completed':
+        print(f"Batch ended with status '{batch.status}'")
+    results = read_batch_output(backend, batch)
+    saved = fan_out_results(backend, state, results, ResponseCache())
+    print(f"Saved {saved}/{len(state['requests'])} analyses to {backend.output_dir}")
+    # The batch is finished either way; failed articles go into the next submission
+    os.remove(BATCH_STATE_DIR / f"{batch_id}.json")
+
+if __name__ == "__main__":
+    main()
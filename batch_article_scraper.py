@@ -6,14 +6,26 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from fake_useragent import UserAgent
 import json
-from datetime import datetime
 import time
 import random
 import os
 from dotenv import load_dotenv
 import logging
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException
 import backoff
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from browser_pool import BrowserPool
+from article_extractor import TieredExtractor, is_blocked
+from politeness import HostScheduler
+from urllib.parse import urlparse
+from article_store import ArticleStore, article_id
+from dedup import NearDuplicateIndex, FEED_INDEX
+from instrumentation import metrics, stage, configure
+from corpus_store import CorpusStore
+from dates import published_at, to_utc_iso, utc_now_iso, in_window, parse_day, partition_dir
+from scrape_failures import FailureTracker, ScrapeFailure, FAILURES_DB, TIMEOUT, BLOCKED, SELECTOR_MISS, classify
 
 # Configure logging
 logging.basicConfig(
@@ -26,10 +38,23 @@ logging.basicConfig(
 )
 
 class ArticleScraper:
-    def __init__(self):
+    def __init__(self, workers=1, max_pages=50, http_first=True, scheduler=None, failures=None, corpus=None):
         self.ua = UserAgent()
         self.articles_scraped = 0
         self.max_retries = 3
+        self.workers = workers
+        self._lock = threading.Lock()
+        # One long-lived browser per worker, recycled every max_pages pages
+        self.pool = BrowserPool(self.setup_driver, size=workers, max_pages=max_pages)
+        # Per-host pacing instead of fixed sleeps, so different sites run in parallel
+        self.scheduler = scheduler or HostScheduler()
+        # Plain HTTP + HTML parsing first, the browser only when that misses
+        self.http_first = http_first
+        self.extractor = TieredExtractor(self.scrape_with_browser, user_agent=self.ua.firefox, scheduler=self.scheduler)
+        # Dead-letter queue and per-host circuit breaker, if tracking failures
+        self.failures = failures
+        # Consolidated corpus to record scraped content in, if any
+        self.corpus = corpus
         
     def setup_driver(self):
         options = Options()
@@ -52,123 +77,338 @@ class ArticleScraper:
         
         return driver
 
-    @backoff.on_exception(
-        backoff.expo,
-        (TimeoutException, WebDriverException),
-        max_tries=3,
-        max_time=300
-    )
     def scrape_article(self, url):
-        driver = None
         try:
-            # Respect rate limits
-            if self.articles_scraped > 0:
-                wait_time = random.uniform(120, 150)  # Doubled from 60-75 to 120-150 seconds between requests
-                logging.info(f"Waiting {wait_time:.2f} seconds before next request...")
-                time.sleep(wait_time)
+            if not self.scheduler.allowed(url):
+                logging.warning(f"Disallowed by robots.txt, skipping: {url}")
+                return None
             
-            driver = self.setup_driver()
-            logging.info(f"Starting to scrape: {url}")
+            if self.failures:
+                reason = self.failures.skip_reason(url)
+                if reason:
+                    logging.info(f"Skipping {url}: {reason}")
+                    return None
             
-            # Random delay before accessing the page (10-30 seconds, doubled from 5-15)
-            time.sleep(random.uniform(10, 30))
+            if self.http_first:
+                article_data = self.extractor.extract(url)
+            else:
+                article_data = self.scrape_with_browser(url)
             
-            driver.get(url)
-            logging.info("Page loaded successfully")
+            with self._lock:
+                self.articles_scraped += 1
+            if self.failures:
+                self.failures.record_success(url)
+            return article_data
             
+        except Exception as e:
+            failure = classify(e)
+            logging.error(f"Error scraping article {url}: [{failure.kind}] {failure.detail}")
+            if self.failures:
+                paused = self.failures.record_failure(url, failure)
+                if paused:
+                    logging.warning(f"Pausing {urlparse(url).netloc} for {paused:.0f}s after repeated block pages")
+            return None
+
+    # Only timeouts and network errors are retried; a block page or a
+    # missing selector would come back the same way
+    @backoff.on_exception(
+        backoff.expo,
+        ScrapeFailure,
+        max_tries=3,
+        max_time=300,
+        giveup=lambda e: not e.transient
+    )
+    def scrape_with_browser(self, url):
+        # Respect the host's rate limit before every page load
+        self.scheduler.wait(url)
+        with self.pool.driver() as driver:
+            try:
+                return self._scrape_with_driver(driver, url)
+            except WebDriverException as e:
+                raise classify(e) from e
+
+    def _scrape_with_driver(self, driver, url):
+        logging.info(f"Starting to scrape: {url}")
+        
+        try:
+            with metrics.timer('page_load_seconds', tier='browser'):
+                driver.get(url)
+        except TimeoutException as e:
+            raise ScrapeFailure(TIMEOUT, f"page load timed out: {e.msg or url}") from e
+        logging.info("Page loaded successfully")
+        
+        try:
             # Wait for the main article content to load
             wait = WebDriverWait(driver, 10)
-            article = wait.until(EC.presence_of_element_located((By.TAG_NAME, "article")))
+            with metrics.timer('element_wait_seconds', element='article'):
+                article = wait.until(EC.presence_of_element_located((By.TAG_NAME, "article")))
             logging.info("Found article element")
             
             # Extract article information
-            title = wait.until(EC.presence_of_element_located((By.TAG_NAME, "h1"))).text
+            with metrics.timer('element_wait_seconds', element='h1'):
+                title = wait.until(EC.presence_of_element_located((By.TAG_NAME, "h1"))).text
             logging.info(f"Found title: {title}")
             
             # Get the article text
             article_text = article.find_element(By.CLASS_NAME, "article-main").text
             logging.info("Found article text")
             
-            # Get publication date
-            try:
-                date_element = driver.find_element(By.CLASS_NAME, "text-gray-500")
-                pub_date = date_element.text
-            except:
-                pub_date = datetime.now().isoformat()
-            logging.info(f"Found publication date: {pub_date}")
-            
-            # Create article data structure
-            article_data = {
-                "title": title,
-                "url": url,
-                "publication_date": pub_date,
-                "content": article_text,
-                "scraped_at": datetime.now().isoformat(),
-                "scraping_method": "firefox"
-            }
-            
-            self.articles_scraped += 1
-            return article_data
-            
-        except Exception as e:
-            logging.error(f"Error scraping article {url}: {str(e)}")
-            if driver:
-                logging.error(f"Page source: {driver.page_source}")
-            return None
-            
-        finally:
-            if driver:
-                try:
-                    driver.quit()
-                except:
-                    pass
+        except (TimeoutException, NoSuchElementException) as e:
+            # The page loaded but the article markup is not there: either a
+            # block or challenge page, or the site's layout changed
+            html = driver.page_source
+            if is_blocked(200, html):
+                raise ScrapeFailure(BLOCKED, "block page served", html) from e
+            raise ScrapeFailure(SELECTOR_MISS, f"article markup missing: {e.msg or type(e).__name__}", html) from e
+        
+        # Get publication date, normalized to UTC (None if the page has none)
+        try:
+            date_element = driver.find_element(By.CLASS_NAME, "text-gray-500")
+            pub_date = to_utc_iso(date_element.text)
+        except:
+            pub_date = None
+        logging.info(f"Found publication date: {pub_date}")
+        
+        # Create article data structure
+        return {
+            "title": title,
+            "url": url,
+            "publication_date": pub_date,
+            "content": article_text,
+            "scraped_at": utc_now_iso(),
+            "scraping_method": "firefox"
+        }
 
-    def process_feed_articles(self, input_file='chemistry_news.json', output_dir='scraped_articles'):
+    def process_feed_articles(self, input_file='chemistry_news.json', output_dir='scraped_articles', store=None, dedup=None,
+                              since=None, until=None):
         try:
             # Create output directory if it doesn't exist
             os.makedirs(output_dir, exist_ok=True)
             
-            # Load articles from RSS feed JSON
-            with open(input_file, 'r', encoding='utf-8') as f:
-                feed_data = json.load(f)
+            if store:
+                # Only the articles the index has not seen scraped yet
+                if dedup:
+                    store.release_orphaned_duplicates()
+                articles = store.pending('scrape', since, until)
+            else:
+                # Load articles from RSS feed JSON
+                with open(input_file, 'r', encoding='utf-8') as f:
+                    feed_data = json.load(f)
+                articles = [
+                    article for article in feed_data.get('articles', [])
+                    if in_window(published_at(article), since, until)
+                ]
+            if self.corpus:
+                self.corpus.put_feed_entries(articles)
+            
+            # Syndicated copies of a story are only scraped once
+            if dedup:
+                articles = drop_near_duplicates(articles, dedup, store)
             
-            articles = feed_data.get('articles', [])
             total_articles = len(articles)
             logging.info(f"Found {total_articles} articles to process")
             
-            # Process each article
-            for i, article in enumerate(articles, 1):
-                url = article.get('link')
-                if not url:
-                    continue
-                
-                # Create a filename based on the article title or URL
-                filename = f"article_{i}.json"
-                output_path = os.path.join(output_dir, filename)
-                
-                # Skip if already scraped
-                if os.path.exists(output_path):
-                    logging.info(f"Article {i}/{total_articles} already scraped, skipping...")
-                    continue
-                
-                logging.info(f"Processing article {i}/{total_articles}")
-                article_data = self.scrape_article(url)
-                
-                if article_data:
-                    # Save individual article data
-                    with open(output_path, 'w', encoding='utf-8') as f:
-                        json.dump(article_data, f, ensure_ascii=False, indent=4)
-                    logging.info(f"Saved article data to {output_path}")
-                
-                # Random additional delay between articles (10-30 seconds, doubled from 5-15)
-                time.sleep(random.uniform(10, 30))
+            # Interleave hosts so parallel workers spread across sites
+            articles = interleave_by_host(articles)
+            
+            # Process articles, one browser session per worker
+            jobs = [(i, total_articles, article, output_dir, store, dedup) for i, article in enumerate(articles, 1)]
+            if self.workers > 1:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    list(executor.map(lambda job: self._process_article(*job), jobs))
+            else:
+                for job in jobs:
+                    self._process_article(*job)
                 
         except Exception as e:
             logging.error(f"Error processing feed articles: {str(e)}")
+        finally:
+            if dedup:
+                dedup.save()
+            self.close()
+
+    def close(self):
+        """Shut down the browser sessions and log how articles were extracted"""
+        self.pool.close()
+        if self.http_first:
+            counts = self.extractor.tier_counts
+            logging.info(
+                f"Extraction tiers: {counts['http']} via HTTP, {counts['browser']} via browser, "
+                f"{counts['failed']} failed (HTTP hit rate {self.extractor.hit_rate():.0%})"
+            )
+
+    def _process_article(self, i, total_articles, article, output_dir, store, dedup):
+        logging.info(f"Processing article {i}/{total_articles}")
+        return self.scrape_to_file(article, output_dir, store, dedup)
+
+    def scrape_to_file(self, article, output_dir, store=None, dedup=None, stages=('scrape',)):
+        """Scrape one feed entry into `output_dir`; returns the file path, or None on failure.
+
+        With a `dedup` index, an article whose story was scraped in the
+        meantime is skipped, and a successful scrape makes the article
+        canonical for its story.
+        """
+        with stage('scrape'):
+            return self._scrape_to_file(article, output_dir, store, dedup, stages)
+
+    def _scrape_to_file(self, article, output_dir, store, dedup, stages):
+        url = article.get('link')
+        if not url:
+            return None
+        
+        # Name the output by stable article ID, not list position, in the
+        # partition of the day the feed says it was published
+        art_id = article.get('article_id') or article_id(article)
+        if dedup:
+            # A copy of the story may have been scraped earlier in this run
+            canonical = scraped_canonical(art_id, article, dedup, store, stages)
+            if canonical:
+                skip_duplicate(art_id, article, canonical, store, stages)
+                return None
+        feed_date = published_at(article)
+        filename = f"article_{art_id}.json"
+        output_path = os.path.join(partition_dir(output_dir, feed_date), filename)
+        
+        # Skip if already scraped (also before outputs were partitioned)
+        legacy_path = os.path.join(output_dir, filename)
+        if os.path.exists(legacy_path):
+            output_path = legacy_path
+        if os.path.exists(output_path):
+            logging.info(f"Article {art_id} already scraped, skipping...")
+            if dedup:
+                dedup.add(art_id, feed_text(article))
+            if store:
+                store.mark_done(art_id, 'scrape', output_path)
+            return output_path
+        
+        article_data = self.scrape_article(url)
+        
+        if not article_data:
+            return None
+        article_data['article_id'] = art_id
+        # The feed's date is reliable; the page's is only a fallback
+        article_data['published_at'] = feed_date or article_data.get('publication_date')
+        # Save individual article data
+        with metrics.timer('file_write_seconds', kind='scraped_article'), open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(article_data, f, ensure_ascii=False, indent=4)
+        logging.info(f"Saved article data to {output_path}")
+        if self.corpus:
+            self.corpus.put_scraped(art_id, article_data)
+        # Only a scraped article can stand in for its duplicates
+        if dedup:
+            dedup.add(art_id, feed_text(article))
+        if store:
+            store.mark_done(art_id, 'scrape', output_path)
+        return output_path
+
+def feed_text(article):
+    """The text near-duplicate detection compares for a feed entry"""
+    return f"{article.get('title', '')} {article.get('summary', '')}"
+
+def has_output(store, art_id, stage):
+    """Whether `stage` produced real output for an article (not a duplicate link)"""
+    output = store.output(art_id, stage)
+    return bool(output) and not output.startswith('duplicate:')
+
+def scraped_canonical(art_id, article, dedup, store=None, stages=('scrape',)):
+    """The already processed article this one duplicates, or None.
+
+    Indexed articles that the store has no output for in every one of
+    `stages` (e.g. the scrape failed) do not count, so their duplicates
+    are processed instead.
+    """
+    canonical = dedup.lookup(art_id, feed_text(article))
+    if canonical is None or canonical == art_id:
+        return None
+    if store and not all(has_output(store, canonical, stage) for stage in stages):
+        return None
+    return canonical
+
+def skip_duplicate(art_id, article, canonical, store=None, stages=('scrape',)):
+    logging.info(f"Skipping near-duplicate {article.get('link')} (same story as {canonical})")
+    if store:
+        # Record the link so the article is not offered to these stages again
+        for stage in stages:
+            store.mark_done(art_id, stage, f"duplicate:{canonical}")
+
+def drop_near_duplicates(articles, dedup, store=None, stages=('scrape',)):
+    """Drop articles whose title and summary nearly match an already scraped article.
+
+    Nothing is registered here; articles become canonical once scraped
+    (see ArticleScraper.scrape_to_file).
+    """
+    unique = []
+    for article in articles:
+        art_id = article.get('article_id') or article_id(article)
+        canonical = scraped_canonical(art_id, article, dedup, store, stages)
+        if canonical is None:
+            unique.append(article)
+        else:
+            skip_duplicate(art_id, article, canonical, store, stages)
+    if len(unique) < len(articles):
+        logging.info(f"Dropped {len(articles) - len(unique)} near-duplicate articles")
+    return unique
+
+def interleave_by_host(articles):
+    """Round-robin articles across hosts, keeping each host's order"""
+    by_host = {}
+    for article in articles:
+        by_host.setdefault(urlparse(article.get('link') or '').netloc, []).append(article)
+    queues = list(by_host.values())
+    interleaved = []
+    while queues:
+        for queue in list(queues):
+            interleaved.append(queue.pop(0))
+            if not queue:
+                queues.remove(queue)
+    return interleaved
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape full article content for RSS entries")
+    parser.add_argument('--input', default='chemistry_news.json', help="RSS feed JSON to read articles from")
+    parser.add_argument('--output-dir', default='scraped_articles', help="Directory for scraped article JSON")
+    parser.add_argument('--store', help="Scrape only the pending articles of this article index instead of --input")
+    parser.add_argument('--workers', type=int, default=4, help="Number of concurrent workers (and at most as many browser sessions)")
+    parser.add_argument('--max-pages', type=int, default=50, help="Recycle each browser session after this many pages")
+    parser.add_argument('--browser-only', action='store_true', help="Skip the plain HTTP extraction tier")
+    parser.add_argument('--host-delay', type=float, help="Minimum seconds between requests to one host (default: MIN_DELAY or 60)")
+    parser.add_argument('--politeness-config', help="JSON file with per-host delays, e.g. {\"phys.org\": 60}")
+    parser.add_argument('--ignore-robots', action='store_true', help="Do not read robots.txt")
+    parser.add_argument('--dedup-index', default=FEED_INDEX, help="Near-duplicate index of RSS titles and summaries")
+    parser.add_argument('--no-dedup', action='store_true', help="Scrape near-duplicate articles too")
+    parser.add_argument('--corpus', help="Also record feed metadata and scraped content in this corpus database")
+    parser.add_argument('--since', type=parse_day, help="Only articles published on or after this UTC day (YYYY-MM-DD, today, yesterday or Nd)")
+    parser.add_argument('--until', type=parse_day, help="Only articles published on or before this UTC day")
+    parser.add_argument('--failures-db', default=FAILURES_DB, help="Dead-letter queue and per-host circuit breaker state")
+    parser.add_argument('--retry-failed', action='store_true', help="Retry dead-lettered articles and reopen paused hosts")
+    return parser.parse_args()
 
 def main():
-    scraper = ArticleScraper()
-    scraper.process_feed_articles()
+    args = parse_args()
+    configure()
+    host_delays = None
+    if args.politeness_config:
+        with open(args.politeness_config, 'r', encoding='utf-8') as f:
+            host_delays = json.load(f)
+    scheduler = HostScheduler(
+        default_delay=args.host_delay,
+        host_delays=host_delays,
+        respect_robots=not args.ignore_robots,
+    )
+    failures = FailureTracker(args.failures_db)
+    if args.retry_failed:
+        logging.info(f"Retrying {failures.retry()} dead-lettered articles")
+    scraper = ArticleScraper(
+        workers=args.workers,
+        max_pages=args.max_pages,
+        http_first=not args.browser_only,
+        scheduler=scheduler,
+        failures=failures,
+        corpus=CorpusStore(args.corpus) if args.corpus else None,
+    )
+    store = ArticleStore(args.store) if args.store else None
+    dedup = None if args.no_dedup else NearDuplicateIndex(args.dedup_index)
+    scraper.process_feed_articles(args.input, args.output_dir, store=store, dedup=dedup, since=args.since, until=args.until)
 
 if __name__ == "__main__":
     main()
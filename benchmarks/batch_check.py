@@ -0,0 +1,105 @@
+"""Round trip of batch_analyzer.py through the mock Batch API, without a paid API:
+
+    python -m benchmarks.batch_check
+
+Runs in a scratch directory against MockLLMServer: a batch with one
+failed request, the retry of that request in an expired batch, a
+--no-wait submission collected later with --batch-id, and a provider
+without a Batch API. Exits non-zero on the first failed check.
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+import argparse
+from pathlib import Path
+from benchmarks.fixtures import load_recorded_articles
+from benchmarks.run import fixture_article
+from benchmarks.servers import MockLLMServer
+
+def check(condition, message):
+    if not condition:
+        print(f"FAILED: {message}")
+        sys.exit(1)
+    print(f"ok: {message}")
+
+def analysis_files(output_dir):
+    return sorted(p for p in Path(output_dir).rglob("*.txt"))
+
+def run_checks(llm, articles):
+    # Imported after the environment points the GPT backend at the mock
+    import batch_analyzer
+    from llm_backends import get_backend
+
+    input_dir = Path("scraped_articles")
+    input_dir.mkdir()
+    for i, article in enumerate(articles):
+        with open(input_dir / f"article_{i}.json", 'w', encoding='utf-8') as f:
+            json.dump(fixture_article(article, 'http://fixtures.invalid'), f)
+    total = len(articles)
+    backend = get_backend('gpt')
+
+    # 1. One request fails: the others are saved, the state is cleared
+    llm.batch_failures = {'article_0'}
+    batch_analyzer.main(['--poll-interval', '0'])
+    check(len(analysis_files(backend.output_dir)) == total - 1, f"{total - 1} of {total} analyses saved, one failed")
+    check(not list(batch_analyzer.BATCH_STATE_DIR.glob("*.json")), "batch state removed after collection")
+    first_batch = llm.batches['batch_1']
+    check(first_batch['error_file_id'] is not None, "failed request was read from the error file")
+
+    # 2. Only the failed article is resubmitted; the batch expires
+    llm.batch_failures = set()
+    llm.batch_outcome = 'expired'
+    batch_analyzer.main(['--poll-interval', '0'])
+    retry = llm.batches['batch_2']
+    check(retry['request_counts']['total'] == 1, "only the failed article was resubmitted")
+    check(len(analysis_files(backend.output_dir)) == total - 1, "expired batch saved nothing")
+    check(not list(batch_analyzer.BATCH_STATE_DIR.glob("*.json")), "expired batch state removed")
+
+    # 3. --no-wait, a second submit while pending, then --batch-id
+    llm.batch_outcome = 'completed'
+    batch_analyzer.main(['--no-wait'])
+    batch_analyzer.main(['--no-wait'])
+    check(len(llm.batches) == 3, "pending articles were not submitted twice")
+    batch_analyzer.main(['--batch-id', 'batch_3', '--poll-interval', '0'])
+    check(len(analysis_files(backend.output_dir)) == total, "batch collected with --batch-id")
+    batch_analyzer.main([])
+    check(len(llm.batches) == 3, "nothing left to submit")
+
+    # 4. A provider without a Batch API is refused before any upload
+    uploads = len(llm.files)
+    try:
+        batch_analyzer.main(['--provider', 'deepseek'])
+        refused = False
+    except SystemExit:
+        refused = True
+    check(refused, "--provider deepseek rejected")
+    try:
+        batch_analyzer.submit_batch(get_backend('deepseek'), [])
+        refused = False
+    except ValueError:
+        refused = True
+    check(refused and len(llm.files) == uploads, "submit_batch refuses DeepSeek without uploading")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check batch_analyzer.py end to end against the mock Batch API")
+    parser.add_argument('--articles', type=int, default=5, help="Articles to analyze")
+    args = parser.parse_args(argv)
+
+    articles = load_recorded_articles(args.articles)
+    llm = MockLLMServer(latency=0).start()
+    os.environ.update(OPENAI_API_BASE=f"{llm.url}/v1", OPENAI_API_KEY='batch-check')
+    work_dir = tempfile.mkdtemp(prefix='batch-check-')
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        run_checks(llm, articles)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir)
+        llm.stop()
+    print("Batch API round trip passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import json
+import html
+from pathlib import Path
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+# Recorded phys.org feed entries the fixtures are built from
+RECORDED_FEED = Path(__file__).resolve().parent.parent / "chemistry_news.json"
+
+# Paragraphs per article page; phys.org articles run to roughly this length
+ARTICLE_PARAGRAPHS = 12
+
+def load_recorded_articles(count, feed_file=RECORDED_FEED):
+    """`count` feed entries, cycling through the recorded ones with unique slugs"""
+    with open(feed_file, 'r', encoding='utf-8') as f:
+        recorded = json.load(f)['articles']
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    articles = []
+    for i in range(count):
+        source = recorded[i % len(recorded)]
+        articles.append({
+            'slug': f"article-{i}",
+            'title': source['title'] if i < len(recorded) else f"{source['title']} ({i // len(recorded)})",
+            'summary': source['summary'],
+            'published': start + timedelta(hours=i),
+            'tags': source.get('tags', []),
+        })
+    return articles
+
+def build_rss(articles, base_url):
+    """RSS 2.0 document listing the articles at `base_url`/news/<slug>.html"""
+    items = []
+    for article in articles:
+        categories = ''.join(f"<category>{html.escape(tag)}</category>" for tag in article['tags'])
+        items.append(f"""<item>
+<title>{html.escape(article['title'])}</title>
+<link>{base_url}/news/{article['slug']}.html</link>
+<guid isPermaLink="false">{article['slug']}</guid>
+<description>{html.escape(article['summary'])}</description>
+<pubDate>{format_datetime(article['published'])}</pubDate>
+{categories}
+</item>""")
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0">
+<channel>
+<title>Benchmark chemistry news</title>
+<link>{base_url}/</link>
+<description>Recorded phys.org entries served locally</description>
+<language>en-us</language>
+{''.join(items)}
+</channel>
+</rss>
+"""
+
+def build_article_html(article):
+    """Article page with the markup the scrapers look for (h1, article > .article-main, .text-gray-500)"""
+    paragraphs = '\n'.join(
+        f"<p>{html.escape(article['summary'])} Paragraph {i + 1} of the recorded story.</p>"
+        for i in range(ARTICLE_PARAGRAPHS)
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><title>{html.escape(article['title'])}</title></head>
+<body>
+<header><nav><a href="/">Home</a></nav></header>
+<h1>{html.escape(article['title'])}</h1>
+<p class="text-gray-500">{article['published'].strftime('%B %d, %Y')}</p>
+<article>
+<figure><img src="/img.jpg"><figcaption>Credit: Benchmark fixture</figcaption></figure>
+<div class="article-main">
+{paragraphs}
+</div>
+</article>
+<footer>© Benchmark</footer>
+</body>
+</html>
+"""
+
+def build_generated_article(article, index):
+    """Markdown in the shape article_generator writes, for the website index benchmark"""
+    return f"""# {article['title']} ({index})
+
+{article['summary']}
+
+## The Problem
+
+{article['summary']}
+
+## TRIZ Principles
+
+The work applies Segmentation and Local quality.
+"""
@@ -0,0 +1,275 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import argparse
+import resource
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.fixtures import load_recorded_articles, build_generated_article
+from benchmarks.servers import FixtureServer, MockLLMServer
+
+STAGES = ['rss', 'scrape', 'analyze', 'analyze_structured', 'analyze_stream', 'generate', 'website_index']
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+def measure(func, items, concurrency=1):
+    """Call `func` on every item; returns (latencies in seconds, wall seconds, error count).
+
+    A call counts as an error if it raises or returns a falsy value.
+    """
+    latencies = []
+    errors = []
+
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            ok = bool(func(item))
+        except Exception as e:
+            ok = False
+            print(f"Benchmark call failed: {str(e)}", file=sys.stderr)
+        latencies.append(time.perf_counter() - start)
+        if not ok:
+            errors.append(item)
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(timed, items))
+    else:
+        for item in items:
+            timed(item)
+    return latencies, time.perf_counter() - start, len(errors)
+
+def fixture_article(article, fixture_url):
+    """A scraped-article dict for a fixture entry, as batch_article_scraper writes it"""
+    content = '\n'.join([article['summary']] * 12)
+    return {
+        'title': article['title'],
+        'url': f"{fixture_url}/news/{article['slug']}.html",
+        'publication_date': article['published'].isoformat(),
+        'content': content,
+    }
+
+def run_stage(stage, config):
+    """Benchmark one stage in this process and return its result record"""
+    # The scrapers log every article; keep the benchmark output readable
+    logging.disable(logging.INFO)
+    articles = load_recorded_articles(config['articles'])
+    fixture_url = config['fixture_url']
+    concurrency = config['concurrency']
+
+    if stage == 'rss':
+        from rss_scraper import RSSFeedScraper
+        scraper = RSSFeedScraper(f"{fixture_url}/rss.xml", delay=False)
+        items = range(config['repeat'])
+        func = lambda _: scraper.get_feed()
+        concurrency = 1
+    elif stage == 'scrape':
+        from batch_article_scraper import ArticleScraper
+        from politeness import HostScheduler
+        scraper = ArticleScraper(workers=concurrency, scheduler=HostScheduler(default_delay=0))
+        items = [f"{fixture_url}/news/{article['slug']}.html" for article in articles]
+        func = scraper.scrape_article
+    elif stage in ('analyze', 'analyze_structured', 'analyze_stream', 'generate'):
+        from llm_backends import get_backend
+        from llm_runner import LLMRunner
+        import article_analyzer
+        import article_generator
+        backend = get_backend('local', max_connections=concurrency)
+        runner = LLMRunner(concurrency=concurrency)
+        items = [fixture_article(article, fixture_url) for article in articles]
+        if stage == 'analyze':
+            func = lambda article: not article_analyzer.analyze_article(article, backend, runner).startswith("Error")
+        elif stage == 'analyze_structured':
+            func = lambda article: article_analyzer.analyze_article_structured(article, backend, runner)
+        elif stage == 'analyze_stream':
+            from llm_streaming import stream_to_file
+            work_dir = Path(tempfile.mkdtemp(prefix='bench-stream-'))
+            func = lambda article: stream_to_file(
+                backend, article_analyzer.SYSTEM_PROMPT, article_analyzer.build_analysis_prompt(article),
+                article_analyzer.TEMPERATURE, work_dir / f"{abs(hash(article['url']))}.part"
+            ).text
+        else:
+            items = [{'title': a['title'], 'url': a['url'], 'analysis': a['content']} for a in items]
+            func = lambda info: not article_generator.generate_article(info, backend=backend).startswith("Error")
+    elif stage == 'website_index':
+        sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "website"))
+        from article_index import ArticleIndex
+        work_dir = Path(tempfile.mkdtemp(prefix='bench-site-'))
+        articles_dir = work_dir / "generated_articles"
+        articles_dir.mkdir()
+        for i in range(config['site_articles']):
+            article = articles[i % len(articles)]
+            (articles_dir / f"article_{i}.md").write_text(build_generated_article(article, i), encoding='utf-8')
+        index_file = work_dir / "index.json"
+
+        def build(cold):
+            if cold and index_file.exists():
+                index_file.unlink()
+            index = ArticleIndex(str(articles_dir), str(index_file))
+            index.refresh()
+            return index.articles()
+
+        # Alternate cold builds (no index on disk) and warm refreshes
+        items = [i % 2 == 0 for i in range(config['repeat'] * 2)]
+        cold_latencies, _, _ = measure(build, items[0::2])
+        warm_latencies, _, _ = measure(build, items[1::2])
+        shutil.rmtree(work_dir)
+        return {
+            'stage': stage,
+            'items': config['site_articles'],
+            'errors': 0,
+            'concurrency': 1,
+            # Articles indexed per second on a cold build; latency is per full build
+            'throughput_per_second': round(config['site_articles'] / (sum(cold_latencies) / len(cold_latencies)), 3),
+            'latency_ms': summarize_latencies(cold_latencies),
+            'warm_refresh_ms': summarize_latencies(warm_latencies),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+    else:
+        raise ValueError(f"Unknown stage '{stage}', expected one of: {', '.join(STAGES)}")
+
+    items = list(items)
+    latencies, wall, errors = measure(func, items, concurrency)
+    return {
+        'stage': stage,
+        'items': len(items),
+        'errors': errors,
+        'concurrency': concurrency,
+        'wall_seconds': round(wall, 4),
+        'throughput_per_second': round(len(items) / wall, 3) if wall else None,
+        'latency_ms': summarize_latencies(latencies),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+def summarize_latencies(latencies):
+    return {
+        'p50': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95': round(percentile(latencies, 0.95) * 1000, 2),
+        'mean': round(sum(latencies) / len(latencies) * 1000, 2),
+        'max': round(max(latencies) * 1000, 2),
+    }
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / divisor, 1)
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_file, tolerance):
+    """Print the change against a baseline run; returns the stages that regressed beyond `tolerance`"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {r['stage']: r for r in json.load(f)['results']}
+    regressions = []
+    print(f"\nCompared with {baseline_file}:")
+    for result in results:
+        previous = baseline.get(result['stage'])
+        if not previous:
+            continue
+        p95_change = result['latency_ms']['p95'] / previous['latency_ms']['p95'] - 1 if previous['latency_ms']['p95'] else 0
+        rate_change = (result['throughput_per_second'] or 0) / previous['throughput_per_second'] - 1 if previous['throughput_per_second'] else 0
+        flag = ''
+        if p95_change > tolerance or rate_change < -tolerance:
+            regressions.append(result['stage'])
+            flag = '  REGRESSION'
+        print(f"  {result['stage']:<20} p95 {p95_change:+.0%}  throughput {rate_change:+.0%}{flag}")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages against local fixtures and a mock LLM")
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"Comma-separated stages ({', '.join(STAGES)})")
+    parser.add_argument('--articles', type=int, default=50, help="Articles per stage")
+    parser.add_argument('--repeat', type=int, default=20, help="Repetitions for the feed and website index stages")
+    parser.add_argument('--site-articles', type=int, default=2000, help="Generated articles for the website index stage")
+    parser.add_argument('--concurrency', type=int, default=4, help="Concurrent workers / API calls per stage")
+    parser.add_argument('--llm-latency', type=float, default=0.2, help="Mock LLM seconds before the first token")
+    parser.add_argument('--llm-tokens-per-second', type=float, default=200, help="Mock LLM streaming speed")
+    parser.add_argument('--output', help="Result JSON file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument('--compare', help="Earlier result JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Relative p95 increase or throughput drop that counts as a regression")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--config', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        # One stage per process, so peak RSS is the stage's own
+        print(json.dumps(run_stage(args.child, json.loads(args.config))))
+        return
+
+    articles = load_recorded_articles(args.articles)
+    fixtures = FixtureServer(articles).start()
+    llm = MockLLMServer(args.llm_latency, args.llm_tokens_per_second).start()
+    config = {
+        'articles': args.articles,
+        'repeat': args.repeat,
+        'site_articles': args.site_articles,
+        'concurrency': args.concurrency,
+        'fixture_url': fixtures.url,
+        'llm_latency': args.llm_latency,
+        'llm_tokens_per_second': args.llm_tokens_per_second,
+    }
+    env = dict(os.environ, LOCAL_LLM_BASE=f"{llm.url}/v1", LOCAL_LLM_API_KEY='benchmark')
+    repo_root = Path(__file__).resolve().parent.parent
+
+    results = []
+    try:
+        for stage in args.stages.split(','):
+            stage = stage.strip()
+            print(f"Benchmarking {stage}...")
+            completed = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.run', '--child', stage, '--config', json.dumps(config)],
+                cwd=repo_root, env=env, capture_output=True, text=True
+            )
+            if completed.returncode != 0:
+                print(f"  {stage} failed:\n{completed.stderr}")
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            results.append(result)
+            latency = result['latency_ms']
+            print(f"  {result['throughput_per_second']}/s, p50 {latency['p50']} ms, p95 {latency['p95']} ms, "
+                  f"peak RSS {result['peak_rss_mb']} MB, {result['errors']} errors")
+    finally:
+        fixtures.stop()
+        llm.stop()
+
+    commit = git_commit()
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'created_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': {k: v for k, v in config.items() if k != 'fixture_url'},
+            'results': results,
+        }, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import re
+import json
+import time
+import threading
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from benchmarks.fixtures import build_rss, build_article_html
+
+class QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class BackgroundServer:
+    """A ThreadingHTTPServer on a free localhost port, served from a daemon thread"""
+
+    def __init__(self, handler):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class FixtureServer(BackgroundServer):
+    """Serves the recorded feed, its article pages and an allow-all robots.txt"""
+
+    def __init__(self, articles):
+        pages = {article['slug']: build_article_html(article) for article in articles}
+        server = self
+
+        class Handler(QuietHandler):
+            def do_GET(self):
+                if self.path == '/rss.xml':
+                    self.send_body(200, build_rss(articles, server.url), 'application/rss+xml')
+                elif self.path == '/robots.txt':
+                    self.send_body(200, "User-agent: *\nAllow: /\n", 'text/plain')
+                else:
+                    match = re.match(r'^/news/([\w-]+)\.html$', self.path)
+                    if match and match.group(1) in pages:
+                        self.send_body(200, pages[match.group(1)], 'text/html; charset=utf-8')
+                    else:
+                        self.send_body(404, 'Not found', 'text/plain')
+
+        super().__init__(Handler)
+
+class MockLLMServer(BackgroundServer):
+    """OpenAI-compatible /v1/chat/completions with configurable latency.
+
+    Every response waits `latency` seconds (time to first token); streamed
+    responses then emit `response_words` words at `tokens_per_second`.
+    Requests with `response_format`, or whose prompt asks for a JSON
+    object, get a structured TRIZ analysis.
+
+    /v1/files and /v1/batches implement the Batch API: a batch is
+    `in_progress` on its first retrieve and then ends in `batch_outcome`
+    ('completed' or 'expired'). Requests whose custom_id is in
+    `batch_failures` go to the error file with an HTTP 500.
+    """
+
+    def __init__(self, latency=0.5, tokens_per_second=50.0, response_words=300):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.response_words = response_words
+        self.requests = 0
+        self.files = {}
+        self.batches = {}
+        self.batch_outcome = 'completed'
+        self.batch_failures = set()
+        self._lock = threading.Lock()
+        mock = self
+
+        class Handler(QuietHandler):
+            def send_json(self, status, data):
+                self.send_body(status, json.dumps(data), 'application/json')
+
+            def read_body(self):
+                return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+            def do_GET(self):
+                match = re.match(r'^(?:/v1)?/(files|batches)/([\w-]+)(/content)?$', self.path)
+                if match and match.group(1) == 'batches' and match.group(2) in mock.batches:
+                    self.send_json(200, mock.advance_batch(match.group(2)))
+                elif match and match.group(1) == 'files' and match.group(2) in mock.files:
+                    stored = mock.files[match.group(2)]
+                    if match.group(3):
+                        self.send_body(200, stored['content'], 'application/octet-stream')
+                    else:
+                        self.send_json(200, stored['file'])
+                else:
+                    self.send_json(404, {'error': {'message': 'Not found'}})
+
+            def do_POST(self):
+                if re.match(r'^(?:/v1)?/files$', self.path):
+                    self.send_json(200, mock.upload(self.headers['Content-Type'], self.read_body()))
+                    return
+                if re.match(r'^(?:/v1)?/batches$', self.path):
+                    request = json.loads(self.read_body())
+                    if request.get('input_file_id') not in mock.files:
+                        self.send_json(400, {'error': {'message': 'Unknown input_file_id'}})
+                    else:
+                        self.send_json(200, mock.create_batch(request))
+                    return
+                if not self.path.endswith('/chat/completions'):
+                    self.send_json(404, {'error': {'message': 'Not found'}})
+                    return
+                request = json.loads(self.read_body())
+                with mock._lock:
+                    mock.requests += 1
+                time.sleep(mock.latency)
+                text = mock.response_text(request)
+                if request.get('stream'):
+                    self.stream(request, text)
+                else:
+                    self.send_body(200, json.dumps(mock.completion(request, text)), 'application/json')
+
+            def stream(self, request, text):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+                delay = 1.0 / mock.tokens_per_second if mock.tokens_per_second else 0
+                for word in re.findall(r'\S+\s*', text):
+                    chunk = mock.chunk(request, {'content': word}, None)
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+                    time.sleep(delay)
+                self.wfile.write(f"data: {json.dumps(mock.chunk(request, {}, 'stop'))}\n\n".encode('utf-8'))
+                self.wfile.write(b"data: [DONE]\n\n")
+
+        super().__init__(Handler)
+
+    def store_file(self, content, filename, purpose):
+        with self._lock:
+            file_id = f"file-{len(self.files) + 1}"
+            self.files[file_id] = {
+                'content': content,
+                'file': {
+                    'id': file_id,
+                    'object': 'file',
+                    'bytes': len(content.encode('utf-8')),
+                    'created_at': int(time.time()),
+                    'filename': filename,
+                    'purpose': purpose,
+                    'status': 'processed',
+                },
+            }
+        return self.files[file_id]['file']
+
+    def upload(self, content_type, body):
+        """Store a multipart/form-data file upload"""
+        form = BytesParser(policy=default_policy).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode('utf-8') + body
+        )
+        fields = {part.get_param('name', header='content-disposition'): part for part in form.iter_parts()}
+        upload = fields['file']
+        return self.store_file(
+            upload.get_payload(decode=True).decode('utf-8'),
+            upload.get_filename() or 'upload.jsonl',
+            fields['purpose'].get_payload(decode=True).decode('utf-8') if 'purpose' in fields else 'batch',
+        )
+
+    def create_batch(self, request):
+        with self._lock:
+            batch_id = f"batch_{len(self.batches) + 1}"
+            self.batches[batch_id] = {
+                'id': batch_id,
+                'object': 'batch',
+                'endpoint': request.get('endpoint'),
+                'errors': None,
+                'input_file_id': request['input_file_id'],
+                'completion_window': request.get('completion_window'),
+                'status': 'validating',
+                'output_file_id': None,
+                'error_file_id': None,
+                'created_at': int(time.time()),
+                'request_counts': {'total': 0, 'completed': 0, 'failed': 0},
+                'metadata': request.get('metadata'),
+            }
+        return self.batches[batch_id]
+
+    def advance_batch(self, batch_id):
+        """Move a batch one step on: validating -> in_progress -> `batch_outcome`"""
+        batch = self.batches[batch_id]
+        if batch['status'] == 'validating':
+            batch['status'] = 'in_progress'
+        elif batch['status'] == 'in_progress':
+            self.finish_batch(batch)
+        return batch
+
+    def finish_batch(self, batch):
+        lines = [json.loads(line) for line in self.files[batch['input_file_id']]['content'].splitlines() if line.strip()]
+        output, errors = [], []
+        for i, line in enumerate(lines):
+            record = {'id': f"batch_req_{i}", 'custom_id': line['custom_id'], 'response': None, 'error': None}
+            if self.batch_outcome == 'expired':
+                record['error'] = {'code': 'batch_expired', 'message': 'This request could not be executed before the completion window expired.'}
+                errors.append(record)
+            elif line['custom_id'] in self.batch_failures:
+                record['response'] = {'status_code': 500, 'request_id': f"req_{i}", 'body': {'error': {'message': 'Mock failure'}}}
+                errors.append(record)
+            else:
+                body = line['body']
+                record['response'] = {'status_code': 200, 'request_id': f"req_{i}",
+                                      'body': self.completion(body, self.response_text(body))}
+                output.append(record)
+        if output:
+            batch['output_file_id'] = self.store_file('\n'.join(json.dumps(r) for r in output) + '\n', 'output.jsonl', 'batch_output')['id']
+        if errors:
+            batch['error_file_id'] = self.store_file('\n'.join(json.dumps(r) for r in errors) + '\n', 'errors.jsonl', 'batch_output')['id']
+        batch['status'] = self.batch_outcome
+        batch['request_counts'] = {'total': len(lines), 'completed': len(output), 'failed': len(errors)}
+
+    def wants_json(self, request):
+        """JSON mode, or a prompt asking for JSON (models without JSON mode)"""
+        if request.get('response_format'):
+            return True
+        prompt = request.get('messages', [{}])[-1].get('content') or ''
+        return 'Respond with a single JSON object' in prompt
+
+    def response_text(self, request):
+        if self.wants_json(request):
+            return json.dumps({
+                'main_idea': 'A benchmark analysis.',
+                'innovation': 'Mock responses with fixed latency.',
+                'principles': [
+                    {'id': 1, 'name': 'Segmentation', 'explanation': 'Split into parts.'},
+                    {'id': 3, 'name': 'Local quality', 'explanation': 'Tuned per region.'},
+                ],
+            })
+        words = ' '.join(['analysis'] * max(self.response_words - 12, 0))
+        return f"# Benchmark Article\n\nThe work applies Segmentation and Local quality. {words}\n"
+
+    def completion(self, request, text):
+        return {
+            'id': 'chatcmpl-benchmark',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'mock'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': text},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': len(text.split()), 'total_tokens': len(text.split())},
+        }
+
+    def chunk(self, request, delta, finish_reason):
+        return {
+            'id': 'chatcmpl-benchmark',
+            'object': 'chat.completion.chunk',
+            'created': int(time.time()),
+            'model': request.get('model', 'mock'),
+            'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+        }
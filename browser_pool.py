@@ -0,0 +1,107 @@
+import queue
+import threading
+import logging
+from contextlib import contextmanager
+from instrumentation import metrics
+
+class PooledDriver:
+    """A WebDriver session plus the bookkeeping the pool needs"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+class BrowserPool:
+    """Bounded pool of long-lived WebDriver sessions.
+
+    Starting Firefox costs seconds per article, so sessions are reused
+    across pages. A session is recycled after `max_pages` page loads, or
+    as soon as it fails a health check (e.g. the browser crashed), and at
+    most `size` sessions exist at once.
+    """
+
+    def __init__(self, factory, size=1, max_pages=50):
+        self.factory = factory
+        self.size = size
+        self.max_pages = max_pages
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.sessions_started = 0
+        self._lock = threading.Lock()
+
+    def _start(self):
+        logging.info("Starting new browser session")
+        with metrics.timer('driver_startup_seconds'):
+            session = PooledDriver(self.factory())
+        with self._lock:
+            self.sessions_started += 1
+        return session
+
+    def _quit(self, session):
+        try:
+            with metrics.timer('driver_quit_seconds'):
+                session.driver.quit()
+        except Exception:
+            pass
+
+    def is_healthy(self, session):
+        """Cheap round-trip to the browser to check it is still alive"""
+        try:
+            session.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _checkout(self):
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                return self._start()
+            if self.is_healthy(session):
+                return session
+            logging.warning("Discarding unhealthy browser session")
+            self._quit(session)
+
+    def _checkin(self, session, failed):
+        session.pages += 1
+        if session.pages >= self.max_pages:
+            logging.info(f"Recycling browser session after {session.pages} pages")
+            self._quit(session)
+        elif failed and not self.is_healthy(session):
+            logging.warning("Browser session crashed, recycling")
+            self._quit(session)
+        else:
+            try:
+                session.driver.delete_all_cookies()
+            except Exception:
+                pass
+            self._idle.put(session)
+
+    @contextmanager
+    def driver(self):
+        """Borrow a driver for one page; blocks while all sessions are busy"""
+        self._slots.acquire()
+        try:
+            session = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+        failed = False
+        try:
+            yield session.driver
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._checkin(session, failed)
+            self._slots.release()
+
+    def close(self):
+        """Quit every idle session"""
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(session)
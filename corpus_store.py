@@ -0,0 +1,300 @@
+import os
+import json
+import zlib
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+from article_store import article_id
+from dates import published_at, list_partitioned
+from triz import get_triz_index
+
+CORPUS_DB = 'corpus.db'
+
+# Text columns are stored zlib-compressed; metadata columns stay plain so
+# they can be filtered and aggregated in SQL. Compressed blobs are the last
+# column of each row, so scans that do not ask for them never read their
+# overflow pages.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    article_id TEXT PRIMARY KEY,
+    link TEXT,
+    title TEXT,
+    summary TEXT,
+    published TEXT,
+    tags TEXT,
+    feed_url TEXT,
+    scraped_at TEXT,
+    scraping_method TEXT,
+    publication_date TEXT,
+    content BLOB
+);
+CREATE INDEX IF NOT EXISTS articles_link ON articles (link);
+CREATE TABLE IF NOT EXISTS analyses (
+    article_id TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    analyzed_at TEXT NOT NULL,
+    structured TEXT,
+    analysis BLOB,
+    PRIMARY KEY (article_id, provider)
+);
+CREATE TABLE IF NOT EXISTS analysis_principles (
+    article_id TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    principle_id INTEGER NOT NULL,
+    PRIMARY KEY (provider, principle_id, article_id)
+);
+CREATE TABLE IF NOT EXISTS generated (
+    article_id TEXT PRIMARY KEY,
+    path TEXT,
+    title TEXT,
+    generated_at TEXT NOT NULL,
+    body BLOB
+);
+"""
+
+# Columns holding compressed text, per table
+BLOB_COLUMNS = {'content', 'analysis', 'body'}
+
+def pack(text):
+    return zlib.compress(text.encode('utf-8'), 6) if text is not None else None
+
+def unpack(blob):
+    return zlib.decompress(blob).decode('utf-8') if blob is not None else None
+
+class CorpusStore:
+    """One SQLite file holding every article's feed metadata, scraped text, analyses and generated text.
+
+    Each stage's output is its own column (analyses one row per
+    provider), stored once: an analysis does not repeat the article
+    content the way the per-provider .txt files do. The database is
+    memory-mapped, so scans read pages straight from the OS page cache,
+    and only the columns asked for are fetched and decompressed.
+    """
+
+    def __init__(self, db_file=CORPUS_DB, mmap_size=256 * 1024 * 1024):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def resolve_id(self, url):
+        """Article ID for a link, as recorded from the feed, or derived from the link"""
+        with self._lock:
+            row = self.conn.execute("SELECT article_id FROM articles WHERE link = ?", (url,)).fetchone()
+        return row['article_id'] if row else article_id({'link': url})
+
+    def put_feed_entries(self, entries):
+        """Insert or refresh the RSS metadata of feed entries; scraped content is kept"""
+        with self._lock, self.conn:
+            for entry in entries:
+                art_id = entry.get('article_id') or article_id(entry)
+                self.conn.execute(
+                    """INSERT INTO articles (article_id, link, title, summary, published, tags, feed_url)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (article_id) DO UPDATE SET
+                           link = excluded.link, title = excluded.title, summary = excluded.summary,
+                           published = excluded.published, tags = excluded.tags, feed_url = excluded.feed_url""",
+                    (
+                        art_id,
+                        entry.get('link', ''),
+                        entry.get('title', ''),
+                        entry.get('summary', ''),
+                        published_at(entry),
+                        json.dumps(entry.get('tags', [])),
+                        entry.get('feed_url', ''),
+                    )
+                )
+
+    def put_scraped(self, art_id, article_data):
+        with self._lock, self.conn:
+            self.conn.execute(
+                """INSERT INTO articles (article_id, link, title, scraped_at, scraping_method, publication_date, content)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (article_id) DO UPDATE SET
+                       link = COALESCE(NULLIF(articles.link, ''), excluded.link),
+                       title = COALESCE(NULLIF(articles.title, ''), excluded.title),
+                       scraped_at = excluded.scraped_at, scraping_method = excluded.scraping_method,
+                       publication_date = excluded.publication_date, content = excluded.content""",
+                (
+                    art_id,
+                    article_data.get('url', ''),
+                    article_data.get('title', ''),
+                    article_data.get('scraped_at') or datetime.now().isoformat(),
+                    article_data.get('scraping_method'),
+                    article_data.get('publication_date'),
+                    pack(article_data.get('content', '')),
+                )
+            )
+
+    def put_analysis(self, art_id, provider, analysis, principles=None, structured=None):
+        """Store one provider's analysis; principles default to those named in the text"""
+        if principles is None:
+            principles = get_triz_index().find_mentions(analysis)
+        with self._lock, self.conn:
+            self.conn.execute(
+                """INSERT OR REPLACE INTO analyses (article_id, provider, analyzed_at, structured, analysis)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (art_id, provider, datetime.now().isoformat(),
+                 json.dumps(structured, ensure_ascii=False) if structured else None, pack(analysis))
+            )
+            self.conn.execute(
+                "DELETE FROM analysis_principles WHERE article_id = ? AND provider = ?", (art_id, provider)
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO analysis_principles (article_id, provider, principle_id) VALUES (?, ?, ?)",
+                [(art_id, provider, principle_id) for principle_id in principles]
+            )
+
+    def put_generated(self, art_id, body, path=None):
+        title = body.split('\n', 1)[0].replace('#', '').strip()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO generated (article_id, path, title, generated_at, body) VALUES (?, ?, ?, ?, ?)",
+                (art_id, str(path) if path else None, title, datetime.now().isoformat(), pack(body))
+            )
+
+    def scan(self, columns=('article_id', 'link', 'title', 'published'), provider=None, generated_only=False,
+             batch_size=500):
+        """Yield one dict per article with just `columns`, decompressing text columns lazily per row.
+
+        Columns can come from the article, its `provider` analysis
+        (`analysis`, `analyzed_at`, `structured`) and its generated
+        article (`body`, `path`, `generated_at`). Rows are fetched in
+        batches, so a scan over the whole corpus holds little in memory.
+        """
+        sources = {
+            'analysis': 'an', 'analyzed_at': 'an', 'structured': 'an',
+            'body': 'g', 'path': 'g', 'generated_at': 'g',
+        }
+        selected = [f"{sources.get(column, 'a')}.{column} AS {column}" for column in columns]
+        join = "JOIN" if generated_only else "LEFT JOIN"
+        sql = (f"SELECT {', '.join(selected)} FROM articles a "
+               f"LEFT JOIN analyses an ON an.article_id = a.article_id AND an.provider = ? "
+               f"{join} generated g ON g.article_id = a.article_id "
+               f"ORDER BY a.published DESC")
+        with self._lock:
+            cursor = self.conn.execute(sql, (provider,))
+            rows = cursor.fetchmany(batch_size)
+        while rows:
+            for row in rows:
+                yield {
+                    column: unpack(row[column]) if column in BLOB_COLUMNS else row[column]
+                    for column in columns
+                }
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+
+    def principle_counts(self, provider=None):
+        """(principle ID, article count) pairs across all (or one provider's) analyses, most common first"""
+        sql = "SELECT principle_id, COUNT(DISTINCT article_id) AS n FROM analysis_principles"
+        params = ()
+        if provider:
+            sql += " WHERE provider = ?"
+            params = (provider,)
+        sql += " GROUP BY principle_id ORDER BY n DESC, principle_id"
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [(row['principle_id'], row['n']) for row in rows]
+
+    def stats(self):
+        """(rows, compressed bytes) per stored column"""
+        queries = {
+            'articles': "SELECT COUNT(*), 0 FROM articles",
+            'content': "SELECT COUNT(content), COALESCE(SUM(LENGTH(content)), 0) FROM articles",
+            'analysis': "SELECT COUNT(*), COALESCE(SUM(LENGTH(analysis)), 0) FROM analyses",
+            'body': "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM generated",
+        }
+        with self._lock:
+            return {name: tuple(self.conn.execute(sql).fetchone()) for name, sql in queries.items()}
+
+    def close(self):
+        self.conn.close()
+
+def import_files(corpus, feed_file=None, scraped_dir=None, processed_dirs=(), generated_dir=None):
+    """Load existing per-article files into the corpus; returns counts per kind"""
+    # Imported here: the generator itself writes into the corpus
+    from article_generator import load_processed_article, list_processed_files
+    counts = {'feed': 0, 'scraped': 0, 'analyses': 0, 'generated': 0}
+    if feed_file and os.path.exists(feed_file):
+        with open(feed_file, 'r', encoding='utf-8') as f:
+            entries = json.load(f).get('articles', [])
+        corpus.put_feed_entries(entries)
+        counts['feed'] = len(entries)
+
+    if scraped_dir and os.path.isdir(scraped_dir):
+        for path in list_partitioned(scraped_dir, 'article_*.json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                article_data = json.load(f)
+            art_id = article_data.get('article_id') or corpus.resolve_id(article_data.get('url', ''))
+            corpus.put_scraped(art_id, article_data)
+            counts['scraped'] += 1
+
+    # Analysis file name -> article ID, to attach the generated articles below
+    analysis_ids = {}
+    for processed_dir in processed_dirs:
+        processed_dir = Path(processed_dir)
+        if not processed_dir.is_dir():
+            continue
+        provider = processed_dir.name.replace('_processed', '')
+        for path in list_processed_files(processed_dir):
+            article_info = load_processed_article(path)
+            if not article_info.get('url') or not article_info.get('analysis'):
+                continue
+            art_id = corpus.resolve_id(article_info['url'])
+            principles = [p['id'] for p in article_info['principles']] if article_info.get('principles') else None
+            corpus.put_analysis(art_id, provider, article_info['analysis'], principles,
+                                structured=article_info.get('principles'))
+            analysis_ids[path.name] = art_id
+            counts['analyses'] += 1
+
+    manifest_file = Path(generated_dir or '') / '.manifest.json'
+    if generated_dir and manifest_file.exists():
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            entries = json.load(f).get('entries', {})
+        for name, entry in entries.items():
+            output = entry.get('output')
+            if name not in analysis_ids or not output or not os.path.exists(output):
+                continue
+            with open(output, 'r', encoding='utf-8') as f:
+                corpus.put_generated(analysis_ids[name], f.read(), output)
+            counts['generated'] += 1
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Consolidated corpus of feed metadata, scraped text, analyses and generated articles")
+    parser.add_argument('command', choices=['import', 'stats', 'principles'],
+                        help="import: load the per-article files; stats: sizes; principles: TRIZ principle counts")
+    parser.add_argument('--db', default=CORPUS_DB, help="Corpus database")
+    parser.add_argument('--feed', default='chemistry_news.json', help="RSS feed JSON to import")
+    parser.add_argument('--scraped-dir', default='scraped_articles', help="Scraped article JSON to import")
+    parser.add_argument('--processed-dir', action='append',
+                        help="Analysis directory to import (repeatable, default: gpt_processed and deepseek_processed)")
+    parser.add_argument('--generated-dir', default='generated_articles', help="Generated articles to import")
+    parser.add_argument('--provider', help="Only count this provider's analyses")
+    args = parser.parse_args()
+
+    corpus = CorpusStore(args.db)
+    if args.command == 'import':
+        counts = import_files(
+            corpus, args.feed, args.scraped_dir,
+            args.processed_dir or ['gpt_processed', 'deepseek_processed'], args.generated_dir
+        )
+        print(', '.join(f"{n} {kind}" for kind, n in counts.items()) + f" imported into {args.db}")
+    elif args.command == 'stats':
+        for column, (rows, stored) in corpus.stats().items():
+            print(f"{column}: {rows} rows" + (f", {stored:,} bytes compressed" if stored else ''))
+        print(f"Database file: {os.path.getsize(args.db) / 1024:.0f} KB")
+    else:
+        triz_index = get_triz_index()
+        for principle_id, count in corpus.principle_counts(args.provider):
+            principle = triz_index.by_id.get(principle_id)
+            print(f"{principle_id:>2}. {principle['name'] if principle else '?'}: {count}")
+    corpus.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import re
+import time
+import warnings
+from pathlib import Path
+from datetime import datetime, date, timedelta, timezone
+from dateutil import parser as date_parser
+
+# Partition for articles whose publication date is unknown
+UNDATED = 'undated'
+PARTITION_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+# US zone abbreviations seen in feeds and on article pages; dateutil
+# only knows UTC/GMT and the local zone by name
+US_TZINFOS = {
+    name: timezone(timedelta(hours=offset), name)
+    for name, offset in (
+        ('EST', -5), ('EDT', -4), ('CST', -6), ('CDT', -5), ('MST', -7), ('MDT', -6),
+        ('PST', -8), ('PDT', -7), ('AKST', -9), ('AKDT', -8), ('HST', -10),
+    )
+}
+# Two defaults that differ in year, month and day: a string that parses
+# differently against them is missing one of those
+PARTIAL_DEFAULTS = (datetime(2000, 1, 1), datetime(2001, 2, 2))
+
+def parse_date_string(text):
+    """Parse an absolute date string; None for relative ("3 hours ago"), partial ("March 2024") or unknown-zone dates"""
+    try:
+        with warnings.catch_warnings():
+            # An unknown zone abbreviation would otherwise silently become UTC
+            warnings.simplefilter('error', date_parser.UnknownTimezoneWarning)
+            first, second = (
+                date_parser.parse(text, default=default, tzinfos=US_TZINFOS)
+                for default in PARTIAL_DEFAULTS
+            )
+    except (ValueError, OverflowError, date_parser.UnknownTimezoneWarning):
+        return None
+    return first if first == second else None
+
+def to_utc(value):
+    """Timezone-aware UTC datetime for a date string, struct_time, datetime or epoch seconds.
+
+    Naive values are taken to be UTC already (feedparser's
+    `published_parsed` is). Returns None for anything unparseable, and
+    for strings that are relative or lack a day, month or year.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, time.struct_time):
+        value = datetime(*value[:6])
+    elif isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value, timezone.utc)
+    elif isinstance(value, str):
+        value = parse_date_string(value.strip())
+        if value is None:
+            return None
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def to_utc_iso(value):
+    """ISO 8601 UTC string ("2025-01-31T14:05:00Z") for any value `to_utc` accepts, or None"""
+    parsed = to_utc(value)
+    return parsed.strftime('%Y-%m-%dT%H:%M:%SZ') if parsed else None
+
+def utc_now_iso():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def published_at(article):
+    """Normalized publication time of a feed entry or scraped article, or None"""
+    for key in ('published_at', 'published_parsed', 'published', 'publication_date'):
+        normalized = to_utc_iso(article.get(key))
+        if normalized:
+            return normalized
+    return None
+
+def parse_day(text):
+    """A window bound given as a date, "today", "yesterday" or "<N>d" (N days ago), as a UTC date"""
+    if text is None:
+        return None
+    text = text.strip().lower()
+    today = datetime.now(timezone.utc).date()
+    if text == 'today':
+        return today
+    if text == 'yesterday':
+        return today - timedelta(days=1)
+    match = re.fullmatch(r'(\d+)d', text)
+    if match:
+        return today - timedelta(days=int(match.group(1)))
+    parsed = to_utc(text)
+    if parsed is None:
+        raise ValueError(f"Not a date: {text}")
+    return parsed.date()
+
+def in_window(value, since=None, until=None):
+    """Whether a publication time falls within the inclusive UTC days [since, until].
+
+    Undated articles are only inside an open window.
+    """
+    if since is None and until is None:
+        return True
+    parsed = to_utc(value)
+    if parsed is None:
+        return False
+    day = parsed.date()
+    return (since is None or day >= since) and (until is None or day <= until)
+
+def partition_for(value):
+    """Partition directory name for a publication time: its UTC day, or "undated" """
+    parsed = to_utc(value)
+    return parsed.strftime('%Y-%m-%d') if parsed else UNDATED
+
+def partition_dir(base_dir, value):
+    """`base_dir/<partition>` for a publication time, created if needed"""
+    directory = Path(base_dir) / partition_for(value)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+def list_partitioned(base_dir, patterns, since=None, until=None):
+    """Files matching `patterns` in the day partitions of `base_dir` within [since, until].
+
+    Only the partitions in the window are listed, so a daily run reads one
+    directory however large the history is. Without a window, the undated
+    partition and files from before partitioning (directly in `base_dir`)
+    are included too. Hidden files are skipped.
+    """
+    base_dir = Path(base_dir)
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    if not base_dir.is_dir():
+        return []
+    windowed = since is not None or until is not None
+    directories = [] if windowed else [base_dir]
+    for entry in sorted(base_dir.iterdir()):
+        if not entry.is_dir():
+            continue
+        if PARTITION_PATTERN.match(entry.name):
+            day = date.fromisoformat(entry.name)
+            if (since is None or day >= since) and (until is None or day <= until):
+                directories.append(entry)
+        elif entry.name == UNDATED and not windowed:
+            directories.append(entry)
+    files = []
+    for directory in directories:
+        for pattern in patterns:
+            files.extend(f for f in directory.glob(pattern) if not f.name.startswith('.'))
+    return sorted(files)
+
+def find_partitioned(base_dir, name):
+    """Path of the file called `name` in any partition of `base_dir` (or `base_dir` itself), or None"""
+    base_dir = Path(base_dir)
+    if (base_dir / name).exists():
+        return base_dir / name
+    return next(base_dir.glob(f"*/{name}"), None)
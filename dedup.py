@@ -0,0 +1,152 @@
+import os
+import re
+import json
+import zlib
+import threading
+import numpy as np
+
+# Default index locations for the two pipeline checkpoints
+FEED_INDEX = 'cache/dedup/feed.json'
+CONTENT_INDEX = 'cache/dedup/content.json'
+
+# Mersenne prime for the universal hash family; (a * x + b) stays below 2**63
+PRIME = (1 << 31) - 1
+
+def shingles(text, size=3):
+    """Word n-gram shingles of normalized text (single words for very short texts)"""
+    words = re.findall(r'[a-z0-9]+', text.lower())
+    if len(words) < size:
+        return set(words)
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+class MinHasher:
+    """MinHash signatures with a fixed, seeded family of permutations"""
+
+    def __init__(self, num_perm=128, seed=42):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, PRIME, size=num_perm, dtype=np.int64)
+        self.b = rng.randint(0, PRIME, size=num_perm, dtype=np.int64)
+
+    def signature(self, text, shingle_size=3):
+        values = shingles(text, shingle_size)
+        if not values:
+            return np.full(self.num_perm, PRIME, dtype=np.int64)
+        hashes = np.array([zlib.crc32(s.encode('utf-8')) for s in values], dtype=np.int64)
+        # All permutations of all shingles at once, then the column minimum
+        return ((np.outer(hashes, self.a) + self.b) % PRIME).min(axis=0)
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return float(np.mean(np.asarray(sig_a) == np.asarray(sig_b)))
+
+class NearDuplicateIndex:
+    """Persistent MinHash/LSH index that links near-duplicates to a canonical item.
+
+    Signatures are split into `bands` bands; two items become candidates
+    when any band matches exactly, so a lookup only compares against the
+    few items sharing a bucket instead of the whole corpus. Candidates
+    are confirmed by estimated Jaccard similarity >= `threshold`.
+    """
+
+    def __init__(self, index_file, threshold=0.7, num_perm=128, bands=16, shingle_size=3):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.index_file = index_file
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm)
+        self.signatures = {}
+        self.duplicates = {}
+        self.buckets = {}
+        self._lock = threading.Lock()
+        if os.path.exists(index_file):
+            with open(index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.duplicates = data.get('duplicates', {})
+            for key, signature in data.get('signatures', {}).items():
+                self._insert(key, np.array(signature, dtype=np.int64))
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            yield f"{band}:{rows.tobytes().hex()}"
+
+    def _insert(self, key, signature):
+        self.signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self.buckets.setdefault(band_key, []).append(key)
+
+    def find(self, text):
+        """Most similar indexed key above the threshold, as (key, similarity), or None"""
+        signature = self.hasher.signature(text, self.shingle_size)
+        with self._lock:
+            return self._find(signature)
+
+    def _find(self, signature):
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self.buckets.get(band_key, ()))
+        best = None
+        for candidate in candidates:
+            score = similarity(signature, self.signatures[candidate])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (candidate, score)
+        return best
+
+    def _lookup(self, key, signature):
+        if key in self.duplicates:
+            return self.duplicates[key]
+        if key in self.signatures:
+            return key
+        match = self._find(signature)
+        if match:
+            return self.duplicates.get(match[0], match[0])
+        return None
+
+    def lookup(self, key, text):
+        """Canonical key `key` would be treated as, or None for a new item; registers nothing"""
+        signature = self.hasher.signature(text, self.shingle_size)
+        with self._lock:
+            return self._lookup(key, signature)
+
+    def canonical(self, key, text):
+        """Register `key` and return the canonical key it should be treated as.
+
+        A new item that is a near-duplicate of an indexed one is linked to
+        that item's canonical key; anything else becomes canonical itself.
+        Calling again with a known key returns the same answer.
+        """
+        signature = self.hasher.signature(text, self.shingle_size)
+        with self._lock:
+            canonical_key = self._lookup(key, signature)
+            if canonical_key is None:
+                self._insert(key, signature)
+                return key
+            if canonical_key != key:
+                self.duplicates[key] = canonical_key
+            return canonical_key
+
+    def add(self, key, text):
+        """Register `key` as canonical, dropping any earlier link to another item"""
+        signature = self.hasher.signature(text, self.shingle_size)
+        with self._lock:
+            self.duplicates.pop(key, None)
+            if key not in self.signatures:
+                self._insert(key, signature)
+
+    def save(self):
+        directory = os.path.dirname(self.index_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {
+                'signatures': {key: sig.tolist() for key, sig in self.signatures.items()},
+                'duplicates': self.duplicates,
+            }
+        tmp_file = f"{self.index_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, self.index_file)
@@ -0,0 +1,73 @@
+import json
+import os
+import hashlib
+import threading
+from datetime import datetime
+
+class FeedCache:
+    """Persistent per-feed HTTP cache for conditional RSS polling.
+
+    For every feed URL we remember the ETag and Last-Modified validators,
+    a hash of the last body we parsed, and the parsed feed data itself, so
+    an unchanged feed costs one conditional request and nothing else.
+    """
+
+    def __init__(self, cache_file='cache/feed_cache.json'):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable feed cache {cache_file}: {str(e)}")
+
+    def get(self, url):
+        with self._lock:
+            return self.entries.get(url)
+
+    def conditional_headers(self, url):
+        """Build If-None-Match / If-Modified-Since headers for a feed"""
+        entry = self.get(url)
+        headers = {}
+        # Without a cached copy a 304 would leave us with nothing to return
+        if not entry or entry.get('feed_data') is None:
+            return headers
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def update(self, url, response, content_hash, feed_data):
+        """Store validators, content hash and parsed data for a feed"""
+        with self._lock:
+            entry = self.entries.setdefault(url, {})
+            entry['etag'] = response.headers.get('ETag') or entry.get('etag')
+            entry['last_modified'] = response.headers.get('Last-Modified') or entry.get('last_modified')
+            entry['content_hash'] = content_hash
+            entry['feed_data'] = feed_data
+            entry['checked_at'] = datetime.now().isoformat()
+
+    def touch(self, url, response=None):
+        """Record that a feed was checked and found unchanged"""
+        with self._lock:
+            entry = self.entries.setdefault(url, {})
+            if response is not None:
+                entry['etag'] = response.headers.get('ETag') or entry.get('etag')
+                entry['last_modified'] = response.headers.get('Last-Modified') or entry.get('last_modified')
+            entry['checked_at'] = datetime.now().isoformat()
+
+    def save(self):
+        directory = os.path.dirname(self.cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
@@ -1,102 +1,9 @@
-import os
-import json
-import openai
-from datetime import datetime
-import time
-from pathlib import Path
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Set OpenAI API key
-openai.api_key = os.getenv('OPENAI_API_KEY')
-
-def create_output_directory():
-    """Create the output directory if it doesn't exist"""
-    output_dir = Path("gpt_processed")
-    output_dir.mkdir(exist_ok=True)
-    return output_dir
-
-def load_article(file_path):
-    """Load article from JSON file"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def analyze_article_with_gpt(article):
-    """Analyze an article using GPT-4"""
-    prompt = f"""Article Title: {article['title']}
-Article Content: {article['content']}
-Article URL: {article['url']}
-
-Rewrite the articles in the lens of analysis on TRIZ principles following the guidance:
-What is the main idea of the research work? Explain how it is innovative. 
-If apply TRIZ principles reflected in this work, which TRIZ principles have been used. Explain. 
-"""
-
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "You are an expert in analyzing scientific research through the lens of TRIZ principles. Provide detailed analysis of research papers focusing on innovation and TRIZ principles application."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-        )
-        return response.choices[0].message['content']
-    except Exception as e:
-        return f"Error analyzing article: {str(e)}"
-
-def save_analysis(output_dir, article, analysis):
-    """Save the GPT analysis to a file"""
-    # Create a safe filename from the article title
-    safe_title = "".join(c for c in article['title'] if c.isalnum() or c in (' ', '-', '_')).rstrip()
-    safe_title = safe_title.replace(' ', '_')
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{timestamp}_{safe_title[:100]}.txt"
-    
-    output_path = output_dir / filename
-    
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(f"Original Article Title: {article['title']}\n")
-        f.write(f"Original Article URL: {article['url']}\n")
-        f.write(f"Publication Date: {article['publication_date']}\n")
-        f.write("\nOriginal Content:\n")
-        f.write(article['content'])
-        f.write("\n\nGPT Analysis:\n")
-        f.write(analysis)
+import sys
+import article_analyzer
 
 def main():
-    # Create output directory
-    output_dir = create_output_directory()
-    
-    # Get all article files from scraped_articles directory
-    articles_dir = Path("scraped_articles")
-    article_files = sorted(articles_dir.glob("article_*.json"))
-    
-    # Process each article
-    for i, article_file in enumerate(article_files, 1):
-        print(f"\nProcessing article {i}/{len(article_files)}: {article_file.name}")
-        
-        # Load article
-        article = load_article(article_file)
-        
-        # Analyze with GPT
-        analysis = analyze_article_with_gpt(article)
-        
-        # Save the analysis
-        save_analysis(output_dir, article, analysis)
-        
-        # Add a small delay to avoid rate limits
-        time.sleep(1)
-        
-        print(f"Analysis completed and saved for: {article['title']}")
+    # Same options as article_analyzer.py, pinned to GPT
+    article_analyzer.main(['--provider', 'gpt'] + sys.argv[1:])
 
 if __name__ == "__main__":
     main()
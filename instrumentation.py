@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import atexit
+import pstats
+import cProfile
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+class Metrics:
+    """Process-wide counters and timers, exportable as Prometheus text or JSON.
+
+    Timers are histograms of seconds; counters are plain totals (requests,
+    tokens, bytes). Both are keyed by name plus labels, e.g.
+    `observe('llm_request_seconds', 1.2, provider='gpt')`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.timers = {}
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            timer = self.timers.get(key)
+            if timer is None:
+                timer = self.timers[key] = {'count': 0, 'sum': 0.0, 'max': 0.0, 'buckets': [0] * len(BUCKETS)}
+            timer['count'] += 1
+            timer['sum'] += seconds
+            timer['max'] = max(timer['max'], seconds)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    timer['buckets'][i] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time the block; failures are recorded with status="error" """
+        start = time.perf_counter()
+        status = 'ok'
+        try:
+            yield
+        except BaseException:
+            status = 'error'
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, status=status, **labels)
+
+    def timed(self, name, **labels):
+        """Decorator form of `timer`"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def sleep(self, seconds, reason):
+        """time.sleep that is accounted for, so waits show up next to the work"""
+        if seconds <= 0:
+            return
+        time.sleep(seconds)
+        self.observe('sleep_seconds', seconds, reason=reason)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                'timers': [
+                    {'name': name, 'labels': dict(labels), 'count': t['count'],
+                     'sum': round(t['sum'], 6), 'max': round(t['max'], 6),
+                     'mean': round(t['sum'] / t['count'], 6) if t['count'] else 0.0}
+                    for (name, labels), t in sorted(self.timers.items())
+                ],
+            }
+
+    def to_prometheus(self, prefix='triz_'):
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            timers = sorted((key, dict(t, buckets=list(t['buckets']))) for key, t in self.timers.items())
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f"{prefix}{name}_total"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+        for (name, labels), timer in timers:
+            metric = f"{prefix}{name}"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} histogram")
+                declared.add(metric)
+            for bound, count in zip(BUCKETS, timer['buckets']):
+                lines.append(f"{metric}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{metric}_bucket{_format_labels(labels, [('le', '+Inf')])} {timer['count']}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {timer['sum']:.6f}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {timer['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write Prometheus text for *.prom files, JSON otherwise"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if path.endswith('.prom'):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), indent=2)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def summary(self, limit=15):
+        """Where the time went: timers by total seconds, largest first"""
+        rows = sorted(self.snapshot()['timers'], key=lambda t: t['sum'], reverse=True)[:limit]
+        lines = []
+        for row in rows:
+            labels = ','.join(f"{k}={v}" for k, v in row['labels'].items() if k != 'status' or v != 'ok')
+            lines.append(f"{row['name']}{'{' + labels + '}' if labels else ''}: "
+                         f"{row['sum']:.1f}s total, {row['count']} calls, {row['mean'] * 1000:.0f} ms mean")
+        return '\n'.join(lines)
+
+metrics = Metrics()
+
+_profile_dir = None
+_profiles = {}
+_profiles_lock = threading.Lock()
+_profiling = threading.local()
+_exports = set()
+
+@contextmanager
+def stage(name):
+    """Time one unit of a stage's work, and profile it when profiling is enabled.
+
+    Stages run their work on several threads, and cProfile only sees the
+    thread that enabled it, so each call is profiled on its own thread and
+    merged into one pstats file per stage, written at exit to
+    <profile dir>/<name>.prof.
+    """
+    profiler = None
+    if _profile_dir and not getattr(_profiling, 'active', False):
+        profiler = cProfile.Profile()
+        _profiling.active = True
+        profiler.enable()
+    try:
+        with metrics.timer('stage_seconds', stage=name):
+            yield
+    finally:
+        if profiler:
+            profiler.disable()
+            _profiling.active = False
+            with _profiles_lock:
+                if name in _profiles:
+                    _profiles[name].add(profiler)
+                else:
+                    _profiles[name] = pstats.Stats(profiler)
+
+def dump_profiles():
+    if not _profile_dir:
+        return
+    os.makedirs(_profile_dir, exist_ok=True)
+    with _profiles_lock:
+        for name, stats in _profiles.items():
+            stats.dump_stats(os.path.join(_profile_dir, f"{name}.prof"))
+
+def configure(metrics_file=None, profile_dir=None):
+    """Enable metrics export and/or per-stage profiling, written when the process exits.
+
+    Defaults come from the METRICS_FILE and PROFILE_DIR environment
+    variables, so any script can be instrumented without new flags.
+    A metrics file ending in .prom gets Prometheus text, any
+    other name JSON.
+    """
+    global _profile_dir
+    metrics_file = metrics_file or os.getenv('METRICS_FILE')
+    profile_dir = profile_dir or os.getenv('PROFILE_DIR')
+    if profile_dir:
+        _profile_dir = profile_dir
+        if 'profiles' not in _exports:
+            _exports.add('profiles')
+            atexit.register(dump_profiles)
+    if metrics_file and metrics_file not in _exports:
+        _exports.add(metrics_file)
+        atexit.register(metrics.write, metrics_file)
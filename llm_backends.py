@@ -0,0 +1,165 @@
+import os
+import time
+import threading
+import httpx
+from openai import OpenAI
+from dotenv import load_dotenv
+from instrumentation import metrics
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Every provider speaks the OpenAI chat completions API; only the
+# endpoint, key and model differ. Each setting can be overridden from .env.
+PROVIDERS = {
+    'gpt': {
+        'label': 'GPT',
+        'model': 'gpt-4',
+        'api_key_env': 'OPENAI_API_KEY',
+        'base_url_env': 'OPENAI_API_BASE',
+        'base_url': 'https://api.openai.com/v1',
+        'output_dir': 'gpt_processed',
+        'batch_api': True,
+    },
+    'deepseek': {
+        'label': 'DeepSeek',
+        'model': 'deepseek-chat',  # DeepSeek-V3
+        'api_key_env': 'DEEPSEEK_API_KEY',
+        'base_url_env': 'DEEPSEEK_API_BASE',
+        'base_url': 'https://api.deepseek.com',
+        'output_dir': 'deepseek_processed',
+    },
+    'local': {
+        'label': 'Local',
+        'model': 'local-model',
+        'api_key_env': 'LOCAL_LLM_API_KEY',
+        'base_url_env': 'LOCAL_LLM_BASE',
+        'base_url': 'http://localhost:8000/v1',
+        'output_dir': 'local_processed',
+    },
+}
+
+# Model families that accept response_format={"type": "json_object"}.
+# Others (e.g. the original gpt-4) reject it with HTTP 400.
+JSON_MODE_MODELS = (
+    'gpt-4o', 'gpt-4-turbo', 'gpt-4-1106', 'gpt-4-0125', 'gpt-4.1', 'gpt-3.5-turbo',
+    'o1', 'o3', 'o4', 'deepseek-chat',
+)
+
+class LLMBackend:
+    """One provider: a model name plus a shared, connection-pooled client"""
+
+    def __init__(self, name, label, model, client, output_dir, batch_api=False):
+        self.name = name
+        self.label = label
+        self.model = model
+        self.client = client
+        self.output_dir = output_dir
+        self.batch_api = batch_api
+
+    @property
+    def supports_json_mode(self):
+        return self.model.startswith(JSON_MODE_MODELS)
+
+    def messages(self, system_prompt, prompt, partial=''):
+        messages = [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+        if partial:
+            # Resume an interrupted answer instead of starting over
+            messages += [
+                {"role": "assistant", "content": partial},
+                {"role": "user", "content": "Continue exactly where you stopped. Do not repeat anything."},
+            ]
+        return messages
+
+    def complete(self, system_prompt, prompt, temperature=0.7, **kwargs):
+        """Run a chat completion and return the response text; raises on failure"""
+        with metrics.timer('llm_request_seconds', provider=self.name, mode='complete'):
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=self.messages(system_prompt, prompt),
+                temperature=temperature,
+                **kwargs
+            )
+        usage = getattr(response, 'usage', None)
+        if usage:
+            metrics.inc('llm_tokens', usage.prompt_tokens or 0, provider=self.name, kind='prompt')
+            metrics.inc('llm_tokens', usage.completion_tokens or 0, provider=self.name, kind='completion')
+        return response.choices[0].message.content
+
+    def stream(self, system_prompt, prompt, temperature=0.7, partial='', stall_timeout=None):
+        """Yield response text as it arrives.
+
+        With `stall_timeout`, a gap of that many seconds between chunks
+        raises a timeout instead of holding the worker indefinitely.
+        """
+        client = self.client
+        if stall_timeout:
+            client = client.with_options(timeout=httpx.Timeout(600.0, connect=10.0, read=stall_timeout))
+        start = time.perf_counter()
+        status = 'error'
+        first_token = True
+        try:
+            response = client.chat.completions.create(
+                model=self.model,
+                messages=self.messages(system_prompt, prompt, partial),
+                temperature=temperature,
+                stream=True,
+            )
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first_token:
+                        metrics.observe('llm_first_token_seconds', time.perf_counter() - start, provider=self.name)
+                        first_token = False
+                    # Streams carry no usage; chunks approximate completion tokens
+                    metrics.inc('llm_stream_chunks', provider=self.name)
+                    yield chunk.choices[0].delta.content
+            status = 'ok'
+        finally:
+            metrics.observe('llm_request_seconds', time.perf_counter() - start,
+                            provider=self.name, mode='stream', status=status)
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def get_backend(name, max_connections=20):
+    """Return the process-wide backend for a provider, creating it on first use.
+
+    The client (and its HTTP connection pool) is built once and reused by
+    every thread and every call, instead of per script or per request.
+    """
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{name}', expected one of: {', '.join(PROVIDERS)}")
+    with _backends_lock:
+        if name not in _backends:
+            config = PROVIDERS[name]
+            prefix = name.upper()
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                ),
+                timeout=httpx.Timeout(600.0, connect=10.0),
+            )
+            client = OpenAI(
+                api_key=os.getenv(config['api_key_env']) or 'not-needed',
+                base_url=os.getenv(config['base_url_env']) or config['base_url'],
+                http_client=http_client,
+            )
+            _backends[name] = LLMBackend(
+                name,
+                config['label'],
+                os.getenv(f"{prefix}_MODEL") or config['model'],
+                client,
+                os.getenv(f"{prefix}_OUTPUT_DIR") or config['output_dir'],
+                config.get('batch_api', False),
+            )
+        return _backends[name]
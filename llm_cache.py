@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+from instrumentation import metrics
+
+class ResponseCache:
+    """Content-addressed, on-disk cache of LLM completions.
+
+    Responses are keyed by a hash of model, system prompt, user prompt
+    and temperature, so rerunning the same prompt is free. Entries older
+    than `max_age_days` are dropped, and when the cache grows past
+    `max_bytes` the least recently used entries are evicted first.
+    """
+
+    def __init__(self, cache_dir='cache/llm', max_bytes=500 * 1024 * 1024, max_age_days=90):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400 if max_age_days else None
+        self.hits = 0
+        self.misses = 0
+        # Lookups come from many worker threads
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(model, system_prompt, user_prompt, temperature):
+        payload = json.dumps([model, system_prompt, user_prompt, temperature], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if self.max_age and time.time() - stat.st_mtime > self.max_age:
+            self._remove(path)
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._remove(path)
+            return None
+        # Bump the access time used for LRU eviction; mtime stays the creation time
+        os.utime(path, (time.time(), stat.st_mtime))
+        return entry['response']
+
+    def set(self, key, response, model=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'model': model,
+                'created_at': datetime.now().isoformat(),
+                'response': response,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics.inc('llm_cache_lookups', result='hit' if hit else 'miss')
+
+    def stats(self):
+        return f"{self.hits} cache hits, {self.misses} API calls"
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones over max_bytes"""
+        now = time.time()
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                if self.max_age and now - stat.st_mtime > self.max_age:
+                    self._remove(path)
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+def cached_completion(cache, model, system_prompt, user_prompt, temperature, request, refresh=False):
+    """Return the cached response for this prompt, or call `request()` and cache it.
+
+    `request` should raise on failure so errors are never cached.
+    With refresh=True the API is always called and the cache overwritten.
+    """
+    if cache is None:
+        return request()
+    key = cache.key(model, system_prompt, user_prompt, temperature)
+    if not refresh:
+        response = cache.get(key)
+        if response is not None:
+            cache.count(hit=True)
+            return response
+    cache.count(hit=False)
+    response = request()
+    cache.set(key, response, model=model)
+    return response
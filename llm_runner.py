@@ -0,0 +1,146 @@
+import time
+import random
+import threading
+from collections import deque
+from instrumentation import metrics
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English text)"""
+    return max(1, len(text) // 4)
+
+def is_rate_limit_error(error):
+    """True for HTTP 429 errors from either the current or the legacy openai SDK"""
+    status = getattr(error, 'status_code', None) or getattr(error, 'http_status', None)
+    return status == 429 or type(error).__name__ == 'RateLimitError'
+
+def retry_after_seconds(error):
+    """Retry-After hint from a rate-limit error's response, if the server sent one"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    value = headers.get('retry-after') or headers.get('Retry-After')
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+class RateBudget:
+    """Sliding one-minute window of request and token budgets.
+
+    acquire() blocks until one more request of `tokens` tokens fits in
+    both the requests-per-minute and tokens-per-minute limits. pause()
+    stops every caller for a while, e.g. after a 429.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._window = deque()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _wait_time(self, tokens, now):
+        while self._window and now - self._window[0][0] >= 60:
+            self._window.popleft()
+        wait_time = max(0.0, self._paused_until - now)
+        if self.requests_per_minute and len(self._window) >= self.requests_per_minute:
+            wait_time = max(wait_time, 60 - (now - self._window[0][0]))
+        if self.tokens_per_minute:
+            used = sum(t for _, t in self._window)
+            # A single oversized request is let through on an empty window
+            if used and used + tokens > self.tokens_per_minute:
+                freed = 0
+                for timestamp, t in self._window:
+                    freed += t
+                    if used - freed + tokens <= self.tokens_per_minute:
+                        wait_time = max(wait_time, 60 - (now - timestamp))
+                        break
+        return wait_time
+
+    def acquire(self, tokens=0):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait_time = self._wait_time(tokens, now)
+                if wait_time <= 0:
+                    self._window.append((now, tokens))
+                    return
+            metrics.sleep(min(wait_time, 5), 'rate_budget')
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+class AdaptiveConcurrency:
+    """Concurrency limit that halves on rate limits and creeps back up on success"""
+
+    def __init__(self, maximum, recovery=5):
+        self.maximum = maximum
+        self.limit = maximum
+        self.recovery = recovery
+        self._active = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            while self._active >= self.limit:
+                self._cond.wait()
+            self._active += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self._successes += 1
+            if self.limit < self.maximum and self._successes >= self.recovery:
+                self.limit += 1
+                self._successes = 0
+                self._cond.notify_all()
+
+    def on_rate_limit(self):
+        with self._cond:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+
+class LLMRunner:
+    """Rate-limited LLM calls shared by all of a provider's worker threads.
+
+    `call(fn)` runs with at most `concurrency` calls in flight and within
+    the per-minute budgets. Calls that raise a rate-limit error are
+    retried with exponential backoff (or the server's Retry-After), which
+    also pauses all other callers and lowers the concurrency until calls
+    succeed again. The callers own the thread pool.
+    """
+
+    def __init__(self, concurrency=4, requests_per_minute=None, tokens_per_minute=None,
+                 max_retries=6, base_delay=2.0, max_delay=60.0):
+        self.concurrency = concurrency
+        self.budget = RateBudget(requests_per_minute, tokens_per_minute)
+        self.limiter = AdaptiveConcurrency(concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def call(self, fn, *args, tokens=0, **kwargs):
+        """Call fn under the rate budget, retrying on rate limits"""
+        for attempt in range(self.max_retries + 1):
+            self.budget.acquire(tokens)
+            try:
+                with self.limiter:
+                    result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                delay = retry_after_seconds(e) or min(self.max_delay, self.base_delay * 2 ** attempt)
+                delay *= 1 + random.uniform(0, 0.25)
+                print(f"Rate limited, retrying in {delay:.1f} seconds (attempt {attempt + 1}/{self.max_retries})")
+                metrics.inc('llm_rate_limited')
+                self.limiter.on_rate_limit()
+                self.budget.pause(delay)
+                continue
+            self.limiter.on_success()
+            return result
@@ -0,0 +1,65 @@
+import os
+import time
+
+class StreamResult:
+    """Full streamed text plus latency figures"""
+
+    def __init__(self, text, chunks, time_to_first_token, duration, resumed=False):
+        self.text = text
+        self.chunks = chunks
+        self.time_to_first_token = time_to_first_token
+        self.duration = duration
+        self.resumed = resumed
+
+    @property
+    def tokens_per_second(self):
+        # Each streamed chunk carries roughly one token
+        return self.chunks / self.duration if self.duration else 0.0
+
+    def summary(self):
+        ttft = f"{self.time_to_first_token:.2f}s" if self.time_to_first_token is not None else "n/a"
+        resumed = ", resumed" if self.resumed else ""
+        return f"TTFT {ttft}, {self.tokens_per_second:.1f} tok/s ({self.chunks} chunks in {self.duration:.1f}s{resumed})"
+
+def stream_to_file(backend, system_prompt, prompt, temperature, partial_path, header='',
+                   resume=False, stall_timeout=60):
+    """Stream a completion into `partial_path` as tokens arrive.
+
+    The file starts with `header` and grows chunk by chunk, so a slow or
+    interrupted response still leaves its partial work on disk. An
+    existing partial file from an earlier run is continued when `resume`
+    is set and discarded otherwise. On success the caller moves the file
+    into place with finish_partial(); on failure it is left for a resume.
+    """
+    previous = ''
+    if os.path.exists(partial_path):
+        if resume:
+            with open(partial_path, 'r', encoding='utf-8') as f:
+                existing = f.read()
+            if existing.startswith(header):
+                previous = existing[len(header):]
+        if not previous:
+            os.remove(partial_path)
+    
+    start = time.monotonic()
+    time_to_first_token = None
+    chunks = 0
+    pieces = []
+    with open(partial_path, 'a' if previous else 'w', encoding='utf-8') as f:
+        if not previous:
+            f.write(header)
+            f.flush()
+        for delta in backend.stream(system_prompt, prompt, temperature, partial=previous, stall_timeout=stall_timeout):
+            if time_to_first_token is None:
+                time_to_first_token = time.monotonic() - start
+            f.write(delta)
+            f.flush()
+            pieces.append(delta)
+            chunks += 1
+    
+    return StreamResult(previous + ''.join(pieces), chunks, time_to_first_token, time.monotonic() - start, bool(previous))
+
+def finish_partial(partial_path, output_path):
+    """Atomically publish a completed partial file"""
+    os.replace(partial_path, output_path)
+    return output_path
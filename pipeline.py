@@ -0,0 +1,337 @@
+import sys
+import time
+import queue
+import argparse
+import threading
+from pathlib import Path
+from dataclasses import dataclass, field
+from rss_scraper import RSSFeedScraper, MultiFeedScraper, load_feed_config, save_to_json
+from feed_cache import FeedCache
+from article_store import ArticleStore
+from batch_article_scraper import ArticleScraper, drop_near_duplicates, interleave_by_host, has_output
+from politeness import HostScheduler
+from scrape_failures import FailureTracker, FAILURES_DB
+from dedup import NearDuplicateIndex, FEED_INDEX, CONTENT_INDEX
+from llm_backends import PROVIDERS, get_backend
+from llm_runner import LLMRunner
+from llm_cache import ResponseCache
+from article_analyzer import AnalysisStage, load_article, dedup_text
+from article_generator import GenerationStage
+from corpus_store import CorpusStore
+from dates import parse_day
+from instrumentation import metrics, configure
+
+# Marks the end of one upstream stage's output
+STOP = object()
+
+@dataclass
+class Task:
+    """One article moving through the pipeline"""
+    key: str
+    payload: object
+    started: float = field(default_factory=time.monotonic)
+
+class Stage:
+    """A DAG node: `workers` threads applying `func` to items from a bounded input queue.
+
+    `func(payload)` returns the payload for the downstream stages, or None
+    to drop the article (failed or skipped). A full input queue blocks the
+    upstream workers, so a slow stage throttles the ones before it instead
+    of letting work pile up in memory.
+    """
+
+    def __init__(self, name, func, workers=1, upstream=(), queue_size=8):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.upstream = list(upstream)
+        self.downstream = []
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+        self._open_upstreams = 0
+        self._running_workers = 0
+
+    def summary(self):
+        return (f"{self.name}: {self.processed} processed, {self.dropped} dropped, "
+                f"{self.failed} failed, {self.busy_seconds:.1f}s busy")
+
+class Pipeline:
+    """Per-article streaming pipeline over a DAG of stages.
+
+    Every article flows through the stages on its own: while one article
+    is being generated the next can be analyzed and the one after that
+    scraped, so the first result arrives after roughly one article's
+    path through the DAG rather than after each stage has finished the
+    whole batch.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def add(self, name, func, workers=1, upstream=(), queue_size=8):
+        for parent in upstream:
+            if parent not in self.stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {parent}")
+        stage = Stage(name, func, workers, upstream, queue_size)
+        for parent in upstream:
+            self.stages[parent].downstream.append(stage)
+        self.stages[name] = stage
+        return stage
+
+    def run(self, source, on_result=None):
+        """Feed `(key, payload)` pairs from `source` into the root stages and wait for the DAG to drain.
+
+        `on_result(stage_name, task)` is called for every article leaving a
+        stage with no downstream stages.
+        """
+        roots = [stage for stage in self.stages.values() if not stage.upstream]
+        threads = []
+        for stage in self.stages.values():
+            # Roots are fed by the source, which counts as their one upstream
+            stage._open_upstreams = len(stage.upstream) or 1
+            stage._running_workers = stage.workers
+            for i in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work, args=(stage, on_result), name=f"{stage.name}-{i}", daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        for key, payload in source:
+            task = Task(key, payload)
+            for stage in roots:
+                stage.queue.put(task)
+        for stage in roots:
+            stage.queue.put(STOP)
+
+        for thread in threads:
+            thread.join()
+
+    def _work(self, stage, on_result):
+        while True:
+            task = stage.queue.get()
+            if task is STOP:
+                with stage._lock:
+                    stage._open_upstreams -= 1
+                    finished = stage._open_upstreams <= 0
+                if finished:
+                    # Wake the stage's other workers so they exit too
+                    stage.queue.put(STOP)
+                    break
+                continue
+
+            start = time.monotonic()
+            try:
+                result = stage.func(task.payload)
+            except Exception as e:
+                print(f"[{stage.name}] {task.key} failed: {str(e)}")
+                result = None
+                with stage._lock:
+                    stage.failed += 1
+            with stage._lock:
+                stage.busy_seconds += time.monotonic() - start
+                stage.processed += 1
+                if result is None:
+                    stage.dropped += 1
+            if result is None:
+                continue
+
+            output = Task(task.key, result, task.started)
+            if stage.downstream:
+                for child in stage.downstream:
+                    child.queue.put(output)
+            else:
+                with self._lock:
+                    self.latencies.append(time.monotonic() - task.started)
+                if on_result:
+                    on_result(stage.name, output)
+
+        with stage._lock:
+            stage._running_workers -= 1
+            last = stage._running_workers == 0
+        if last:
+            for child in stage.downstream:
+                child.queue.put(STOP)
+
+    def summary(self):
+        lines = [stage.summary() for stage in self.stages.values()]
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            p50 = latencies[len(latencies) // 2]
+            lines.append(f"End-to-end latency: first {min(self.latencies):.1f}s, median {p50:.1f}s, "
+                         f"max {latencies[-1]:.1f}s over {len(latencies)} articles")
+        return '\n'.join(lines)
+
+def poll_feeds(args, store, corpus=None):
+    """Fetch the feeds and merge them into the article index"""
+    cache = FeedCache(args.feed_cache)
+    if args.feeds:
+        config = load_feed_config(args.feeds)
+        scraper = MultiFeedScraper(
+            config['feeds'],
+            max_workers=config.get('max_workers', 8),
+            per_host_limit=config.get('per_host_limit', 2),
+            cache=cache,
+        )
+        feed_data = scraper.fetch_all()
+    else:
+        scraper = RSSFeedScraper(args.feed_url, cache=cache)
+        feed_data = scraper.get_feed()
+    cache.save()
+    if not feed_data:
+        print("Failed to fetch RSS feed data")
+        return
+    new_articles = store.merge(feed_data['articles'])
+    if corpus:
+        corpus.put_feed_entries(feed_data['articles'])
+    if not scraper.not_modified:
+        save_to_json(feed_data, args.feed_output)
+    print(f"{len(new_articles)} new articles ({store.count()} in {args.store})")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run feed polling, scraping, analysis and generation as one streaming pipeline"
+    )
+    parser.add_argument('--feeds', help="JSON feed list for multi-feed mode (default: the phys.org chemistry feed)")
+    parser.add_argument('--feed-url', default="https://phys.org/rss-feed/breaking/chemistry-news/",
+                        help="Single RSS feed to poll without --feeds")
+    parser.add_argument('--feed-output', default='chemistry_news.json', help="Where to save the merged feed")
+    parser.add_argument('--feed-cache', default='cache/feed_cache.json', help="Conditional GET cache for feeds")
+    parser.add_argument('--no-fetch', action='store_true', help="Skip polling; only process articles already indexed")
+    parser.add_argument('--store', default='articles.db', help="Article index to track progress in")
+    parser.add_argument('--limit', type=int, help="Process at most this many pending articles")
+    parser.add_argument('--since', type=parse_day, help="Only articles published on or after this UTC day (YYYY-MM-DD, today, yesterday or Nd)")
+    parser.add_argument('--until', type=parse_day, help="Only articles published on or before this UTC day")
+    parser.add_argument('--scraped-dir', default='scraped_articles', help="Directory for scraped article JSON")
+    parser.add_argument('--provider', default='gpt',
+                        help=f"Comma-separated analysis providers ({', '.join(PROVIDERS)}); "
+                             "the first one's analyses are used for generation")
+    parser.add_argument('--generator', help="Provider that writes the articles (default: the first analysis provider)")
+    parser.add_argument('--scrape-workers', type=int, default=4, help="Concurrent scrapers (and browser sessions)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Concurrent analysis calls per provider")
+    parser.add_argument('--rpm', type=int, help="Requests-per-minute budget per provider")
+    parser.add_argument('--tpm', type=int, help="Tokens-per-minute budget per provider")
+    parser.add_argument('--generate-workers', type=int, default=1, help="Concurrent article generations")
+    parser.add_argument('--queue-size', type=int, default=8, help="Articles buffered between two stages")
+    parser.add_argument('--structured', action='store_true', help="Use structured JSON analyses")
+    parser.add_argument('--no-cache', action='store_true', help="Do not read or write the LLM response cache")
+    parser.add_argument('--no-dedup', action='store_true', help="Process near-duplicate articles too")
+    parser.add_argument('--host-delay', type=float, help="Minimum seconds between requests to one host")
+    parser.add_argument('--failures-db', default=FAILURES_DB, help="Dead-letter queue and per-host circuit breaker state")
+    parser.add_argument('--retry-failed', action='store_true', help="Retry dead-lettered articles and reopen paused hosts")
+    parser.add_argument('--corpus', help="Also record every stage's output in this corpus database")
+    parser.add_argument('--export-site', help="Export the static site to this directory when done")
+    parser.add_argument('--metrics-file', help="Write timings and counters here at exit (.prom for Prometheus text, else JSON)")
+    parser.add_argument('--profile-dir', help="Write a cProfile .prof file per stage to this directory")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure(args.metrics_file, args.profile_dir)
+
+    store = ArticleStore(args.store)
+    corpus = CorpusStore(args.corpus) if args.corpus else None
+    if not args.no_fetch:
+        poll_feeds(args, store, corpus)
+
+    feed_dedup = None if args.no_dedup else NearDuplicateIndex(FEED_INDEX)
+    content_dedup = None if args.no_dedup else NearDuplicateIndex(CONTENT_INDEX)
+    if feed_dedup:
+        store.release_orphaned_duplicates()
+    # Anything not yet published, so an interrupted run picks up where it stopped;
+    # stages skip work whose output is already current
+    articles = store.pending('generate', args.since, args.until)
+    if feed_dedup:
+        articles = drop_near_duplicates(articles, feed_dedup, store, stages=('scrape', 'generate'))
+    articles = interleave_by_host(articles)[:args.limit]
+    print(f"{len(articles)} articles to process")
+
+    Path(args.scraped_dir).mkdir(exist_ok=True)
+    failures = FailureTracker(args.failures_db)
+    if args.retry_failed:
+        print(f"Retrying {failures.retry()} dead-lettered articles")
+    scraper = ArticleScraper(
+        workers=args.scrape_workers,
+        scheduler=HostScheduler(default_delay=args.host_delay),
+        failures=failures,
+        corpus=corpus,
+    )
+    cache = None if args.no_cache else ResponseCache()
+    analysis_stages = []
+    for name in args.provider.split(','):
+        runner = LLMRunner(concurrency=args.concurrency, requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+        backend = get_backend(name.strip(), max_connections=args.concurrency)
+        analysis_stages.append(AnalysisStage(backend, runner, cache, structured=args.structured, corpus=corpus))
+    generator = GenerationStage(get_backend(args.generator or args.provider.split(',')[0].strip()), cache, corpus=corpus)
+
+    def scrape(article):
+        output = scraper.scrape_to_file(article, args.scraped_dir, store, feed_dedup, stages=('scrape', 'generate'))
+        if output and content_dedup:
+            # Only a story that was already published counts; see published()
+            canonical = content_dedup.lookup(article['article_id'], dedup_text(load_article(output)))
+            if canonical and canonical != article['article_id'] and has_output(store, canonical, 'generate'):
+                print(f"Near-duplicate skipped: {Path(output).name} (same story as {canonical})")
+                store.mark_done(article['article_id'], 'generate', f"duplicate:{canonical}")
+                return None
+        return output
+
+    def analyzer(stage):
+        def analyze(article_file):
+            # None when this run's analysis failed, so no stale analysis is generated from
+            return stage.analyze(article_file)[1]
+        return analyze
+
+    def generate(analysis_file):
+        return generator.process_file(analysis_file)
+
+    # feed entries -> scrape -> analyze (one node per provider) -> generate
+    pipeline = Pipeline()
+    pipeline.add('scrape', scrape, workers=args.scrape_workers, queue_size=args.queue_size)
+    for stage in analysis_stages:
+        pipeline.add(f'analyze:{stage.backend.name}', analyzer(stage), workers=args.concurrency,
+                     upstream=['scrape'], queue_size=args.queue_size)
+    pipeline.add('generate', generate, workers=args.generate_workers,
+                 upstream=[f'analyze:{analysis_stages[0].backend.name}'], queue_size=args.queue_size)
+
+    def published(stage_name, task):
+        if stage_name == 'generate':
+            store.mark_done(task.key, 'generate', str(task.payload))
+            if content_dedup:
+                # Only a published article stands in for its near-duplicates
+                content_dedup.add(task.key, dedup_text(load_article(store.output(task.key, 'scrape'))))
+
+    start = time.time()
+    try:
+        pipeline.run(((article['article_id'], article) for article in articles), on_result=published)
+    finally:
+        scraper.close()
+        failures.close()
+        generator.close()
+        for dedup in (feed_dedup, content_dedup):
+            if dedup:
+                dedup.save()
+    print(f"\nPipeline finished in {time.time() - start:.1f}s")
+    print(pipeline.summary())
+    print("\nWhere the time went:")
+    print(metrics.summary())
+    if cache:
+        print(cache.stats())
+        cache.evict()
+
+    if args.export_site:
+        sys.path.insert(0, str(Path(__file__).resolve().parent / "website"))
+        from export_static import StaticSiteExporter
+        exporter = StaticSiteExporter(output_dir=args.export_site)
+        print(f"Exported site to {args.export_site}/ ({exporter.export()} pages rebuilt)")
+    store.close()
+    if corpus:
+        corpus.close()
+
+if __name__ == "__main__":
+    main()
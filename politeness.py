@@ -0,0 +1,157 @@
+import os
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import requests
+from instrumentation import metrics
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, at most `burst` saved up"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        """Take one token and return how long to sleep before using it"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class HostScheduler:
+    """Per-host politeness scheduler.
+
+    Every host gets its own token bucket, so requests to different sites
+    proceed in parallel while each site sees at most one request per
+    `delay` seconds. robots.txt Crawl-delay and server Retry-After
+    responses can only slow a host down, never speed it up.
+    """
+
+    def __init__(self, default_delay=None, host_delays=None, burst=1, jitter=0.1,
+                 respect_robots=True, user_agent='*'):
+        if default_delay is None:
+            default_delay = float(os.getenv('MIN_DELAY', 60))
+        self.default_delay = default_delay
+        self.host_delays = host_delays or {}
+        self.burst = burst
+        self.jitter = jitter
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.session = requests.Session()
+        self._buckets = {}
+        self._host_locks = {}
+        self._robots = {}
+        self._not_before = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url):
+        return urlparse(url).netloc.lower()
+
+    def _host_lock(self, host):
+        with self._lock:
+            if host not in self._host_locks:
+                self._host_locks[host] = threading.Lock()
+            return self._host_locks[host]
+
+    def robots(self, url):
+        """Parsed robots.txt for the URL's host, fetched once per host"""
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        with self._lock:
+            if host in self._robots:
+                return self._robots[host]
+        parser = RobotFileParser()
+        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        try:
+            response = self.session.get(robots_url, timeout=10)
+            if response.status_code == 200:
+                parser.parse(response.text.splitlines())
+            else:
+                # No robots.txt (or an error page): everything is allowed
+                parser.parse([])
+        except requests.RequestException as e:
+            logging.warning(f"Could not fetch {robots_url}: {str(e)}")
+            parser.parse([])
+        with self._lock:
+            self._robots[host] = parser
+        return parser
+
+    def allowed(self, url):
+        if not self.respect_robots:
+            return True
+        return self.robots(url).can_fetch(self.user_agent, url)
+
+    def host_delay(self, url):
+        """Minimum seconds between requests to the URL's host"""
+        host = self._host(url)
+        delay = self.host_delays.get(host, self.default_delay)
+        if self.respect_robots:
+            crawl_delay = self.robots(url).crawl_delay(self.user_agent)
+            if crawl_delay:
+                delay = max(delay, float(crawl_delay))
+        return delay
+
+    def _bucket(self, url):
+        host = self._host(url)
+        with self._lock:
+            bucket = self._buckets.get(host)
+        if bucket is None:
+            delay = self.host_delay(url)
+            rate = 1.0 / delay if delay > 0 else float('inf')
+            with self._lock:
+                bucket = self._buckets.setdefault(host, TokenBucket(rate, self.burst))
+        return bucket
+
+    def wait(self, url):
+        """Block until the URL's host may be contacted again.
+
+        Only callers for the same host wait on each other.
+        """
+        host = self._host(url)
+        bucket = self._bucket(url)
+        with self._host_lock(host):
+            wait_time = 0.0
+            if bucket.rate != float('inf'):
+                wait_time = bucket.reserve()
+                if wait_time > 0:
+                    wait_time *= 1 + random.uniform(0, self.jitter)
+            with self._lock:
+                not_before = self._not_before.get(host, 0.0)
+            wait_time = max(wait_time, not_before - time.monotonic())
+            if wait_time > 0:
+                logging.info(f"Waiting {wait_time:.2f} seconds before next request to {host}...")
+                metrics.sleep(wait_time, 'politeness')
+
+    def defer(self, url, seconds):
+        """Push back the next request to the URL's host, e.g. after Retry-After"""
+        host = self._host(url)
+        logging.info(f"Backing off {host} for {seconds:.0f} seconds")
+        with self._lock:
+            self._not_before[host] = max(self._not_before.get(host, 0.0), time.monotonic() + seconds)
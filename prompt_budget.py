@@ -0,0 +1,89 @@
+import re
+from llm_runner import estimate_tokens
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Lines that carry no research content: photo captions and press-release furniture
+CAPTION_PATTERN = re.compile(r'\b(?:image |photo )?credits?:', re.IGNORECASE)
+BOILERPLATE_PREFIXES = (
+    'provided by',
+    'citation:',
+    'this story is republished',
+    'this document is subject to copyright',
+    'explore further',
+    'journal information:',
+    'read more',
+    'more from',
+)
+
+def count_tokens(text, model='gpt-4'):
+    """Token count with tiktoken (in requirements.txt), a character estimate if it is missing"""
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding('cl100k_base')
+        return len(encoding.encode(text))
+    return estimate_tokens(text)
+
+def clean_content(text):
+    """Drop image captions, credits and press-release boilerplate lines"""
+    kept = []
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped.lower().startswith(BOILERPLATE_PREFIXES):
+            continue
+        # Captions are short lines ending in a credit, not paragraphs quoting one
+        if CAPTION_PATTERN.search(stripped) and len(stripped) < 400:
+            continue
+        kept.append(stripped)
+    return '\n'.join(kept)
+
+def _split_long_paragraph(paragraph, max_tokens, model):
+    sentences = re.split(r'(?<=[.!?])\s+', paragraph)
+    pieces, current = [], ''
+    for sentence in sentences:
+        candidate = f"{current} {sentence}".strip()
+        if current and count_tokens(candidate, model) > max_tokens:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+def chunk_text(text, max_tokens, model='gpt-4'):
+    """Split text into chunks of at most ~max_tokens, on paragraph boundaries where possible"""
+    chunks, current, current_tokens = [], [], 0
+    for paragraph in text.split('\n'):
+        tokens = count_tokens(paragraph, model)
+        pieces = [paragraph] if tokens <= max_tokens else _split_long_paragraph(paragraph, max_tokens, model)
+        for piece in pieces:
+            piece_tokens = count_tokens(piece, model)
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append('\n'.join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks
+
+def truncate_to_budget(text, max_tokens, model='gpt-4'):
+    """Keep whole lines from the start of text until the budget is spent"""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    kept, used = [], 0
+    for line in text.split('\n'):
+        tokens = count_tokens(line, model)
+        if used + tokens > max_tokens:
+            break
+        kept.append(line)
+        used += tokens
+    return '\n'.join(kept) + '\n[...]'
@@ -1,14 +1,27 @@
 import feedparser
 import json
-from datetime import datetime
 import requests
+from requests.adapters import HTTPAdapter
 from fake_useragent import UserAgent
 import time
 import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import os
+from feed_cache import FeedCache, content_hash
+from article_store import ArticleStore
+from dates import to_utc_iso, utc_now_iso
+from instrumentation import metrics, stage, configure
 
 class RSSFeedScraper:
-    def __init__(self, rss_url):
+    def __init__(self, rss_url, session=None, delay=True, cache=None):
         self.rss_url = rss_url
+        self.session = session or requests.Session()
+        self.delay = delay
+        self.cache = cache
+        self.not_modified = False
         self.ua = UserAgent()
         self.headers = {
             'User-Agent': self.ua.random,
@@ -19,70 +32,248 @@ class RSSFeedScraper:
     def get_feed(self):
         try:
             # Add random delay to mimic human behavior
-            time.sleep(random.uniform(1, 3))
+            if self.delay:
+                metrics.sleep(random.uniform(1, 3), 'feed_delay')
             
-            # Fetch RSS feed content
-            response = requests.get(self.rss_url, headers=self.headers, timeout=10)
-            response.raise_for_status()
+            # Fetch RSS feed content, conditionally if we have a cached copy
+            headers = dict(self.headers)
+            if self.cache:
+                headers.update(self.cache.conditional_headers(self.rss_url))
+            with metrics.timer('feed_fetch_seconds'):
+                response = self.session.get(self.rss_url, headers=headers, timeout=10)
+            metrics.inc('feed_bytes', len(response.content))
             
-            # Parse the feed
-            feed = feedparser.parse(response.content)
+            # Nothing changed since the last poll: reuse the cached parse
+            if response.status_code == 304 and self.cache:
+                metrics.inc('feed_not_modified')
+                self.not_modified = True
+                self.cache.touch(self.rss_url, response)
+                return self.cache.get(self.rss_url)['feed_data']
             
-            # Process feed entries
-            articles = []
-            for entry in feed.entries:
-                article = {
-                    'title': entry.get('title', ''),
-                    'link': entry.get('link', ''),
-                    'summary': entry.get('summary', ''),
-                    'published': entry.get('published', ''),
-                    'published_parsed': time.strftime('%Y-%m-%d %H:%M:%S', entry.get('published_parsed')) if entry.get('published_parsed') else None,
-                    'authors': [author.get('name', '') for author in entry.get('authors', [])],
-                    'tags': [tag.get('term', '') for tag in entry.get('tags', [])],
-                }
-                articles.append(article)
+            response.raise_for_status()
             
-            # Create feed metadata
-            feed_data = {
-                'feed_title': feed.feed.get('title', ''),
-                'feed_link': feed.feed.get('link', ''),
-                'feed_description': feed.feed.get('description', ''),
-                'feed_language': feed.feed.get('language', ''),
-                'last_updated': datetime.now().isoformat(),
-                'articles': articles
-            }
+            # Some servers ignore validators; compare the bytes ourselves
+            body_hash = content_hash(response.content)
+            if self.cache:
+                entry = self.cache.get(self.rss_url)
+                if entry and entry.get('content_hash') == body_hash and entry.get('feed_data') is not None:
+                    metrics.inc('feed_not_modified')
+                    self.not_modified = True
+                    self.cache.touch(self.rss_url, response)
+                    return entry['feed_data']
             
+            self.not_modified = False
+            with metrics.timer('feed_parse_seconds'):
+                feed_data = self.parse_feed(response.content)
+            if self.cache:
+                self.cache.update(self.rss_url, response, body_hash, feed_data)
             return feed_data
             
         except Exception as e:
             print(f"Error fetching RSS feed: {str(e)}")
             return None
 
+    def parse_feed(self, content):
+        """Parse raw feed bytes into the chemistry_news.json structure"""
+        feed = feedparser.parse(content)
+        
+        # Process feed entries
+        articles = []
+        for entry in feed.entries:
+            article = {
+                'guid': entry.get('id', ''),
+                'title': entry.get('title', ''),
+                'link': entry.get('link', ''),
+                'summary': entry.get('summary', ''),
+                'published': entry.get('published', ''),
+                'published_parsed': time.strftime('%Y-%m-%d %H:%M:%S', entry.get('published_parsed')) if entry.get('published_parsed') else None,
+                # Normalized UTC time that every later stage filters and partitions on
+                'published_at': to_utc_iso(entry.get('published_parsed') or entry.get('published')),
+                'authors': [author.get('name', '') for author in entry.get('authors', [])],
+                'tags': [tag.get('term', '') for tag in entry.get('tags', [])],
+            }
+            articles.append(article)
+        
+        # Create feed metadata
+        feed_data = {
+            'feed_title': feed.feed.get('title', ''),
+            'feed_link': feed.feed.get('link', ''),
+            'feed_description': feed.feed.get('description', ''),
+            'feed_language': feed.feed.get('language', ''),
+            'last_updated': utc_now_iso(),
+            'articles': articles
+        }
+        
+        return feed_data
+
     def save_to_json(self, data, output_file):
-        try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
-            print(f"Data successfully saved to {output_file}")
-            return True
-        except Exception as e:
-            print(f"Error saving data to JSON: {str(e)}")
-            return False
+        return save_to_json(data, output_file)
+
+def save_to_json(data, output_file):
+    try:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        print(f"Data successfully saved to {output_file}")
+        return True
+    except Exception as e:
+        print(f"Error saving data to JSON: {str(e)}")
+        return False
+
+def load_feed_config(config_file):
+    """Load the feed list and concurrency settings from a JSON config file"""
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    
+    # Allow plain URL strings as well as {"url": ..., "tags": [...]} objects
+    feeds = []
+    for feed in config.get('feeds', []):
+        if isinstance(feed, str):
+            feed = {'url': feed}
+        feeds.append(feed)
+    config['feeds'] = feeds
+    return config
+
+class MultiFeedScraper:
+    """Fetch many RSS feeds concurrently and merge them into one document.
+
+    All feeds share one pooled requests.Session, and a per-host semaphore
+    keeps us from opening more than `per_host_limit` connections to any
+    single site, so total wall time is bounded by the slowest feed.
+    """
+
+    def __init__(self, feeds, max_workers=8, per_host_limit=2, cache=None):
+        self.feeds = feeds
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.cache = cache
+        self.not_modified = False
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._host_locks = {}
+        self._host_locks_guard = threading.Lock()
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        with self._host_locks_guard:
+            if host not in self._host_locks:
+                self._host_locks[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_locks[host]
+
+    def fetch_feed(self, feed):
+        """Fetch a single configured feed, respecting the per-host cap"""
+        scraper = RSSFeedScraper(feed['url'], session=self.session, delay=False, cache=self.cache)
+        with self._host_semaphore(feed['url']):
+            feed_data = scraper.get_feed()
+        if feed_data and scraper.not_modified:
+            # Cached articles already carry the feed URL and extra tags
+            return feed_data, True
+        if feed_data:
+            extra_tags = feed.get('tags', [])
+            for article in feed_data['articles']:
+                article['feed_url'] = feed['url']
+                for tag in extra_tags:
+                    if tag not in article['tags']:
+                        article['tags'].append(tag)
+        return feed_data, False
+
+    def fetch_all(self):
+        """Fetch every feed concurrently and merge the results"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(self.fetch_feed, self.feeds))
+        self.not_modified = all(unchanged for _, unchanged in results)
+        return self.merge([feed_data for feed_data, _ in results])
+
+    def merge(self, results):
+        """Merge per-feed documents into a single chemistry_news.json-style document"""
+        feeds_meta = []
+        articles = []
+        seen_links = set()
+        for feed, feed_data in zip(self.feeds, results):
+            if not feed_data:
+                feeds_meta.append({'feed_url': feed['url'], 'status': 'error', 'article_count': 0})
+                continue
+            feeds_meta.append({
+                'feed_url': feed['url'],
+                'feed_title': feed_data['feed_title'],
+                'feed_link': feed_data['feed_link'],
+                'status': 'ok',
+                'article_count': len(feed_data['articles']),
+            })
+            for article in feed_data['articles']:
+                # The same story is often syndicated in several feeds
+                if article['link'] in seen_links:
+                    continue
+                seen_links.add(article['link'])
+                articles.append(article)
+        
+        articles.sort(key=lambda a: a.get('published_at') or '', reverse=True)
+        
+        return {
+            'feed_title': 'Merged feeds',
+            'feed_link': '',
+            'feed_description': f"Merged from {len(self.feeds)} feeds",
+            'feed_language': '',
+            'last_updated': utc_now_iso(),
+            'feeds': feeds_meta,
+            'articles': articles
+        }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape chemistry news RSS feeds")
+    parser.add_argument('--feeds', help="JSON config file with a list of feeds to fetch concurrently")
+    parser.add_argument('--output', default='chemistry_news.json', help="Output JSON file")
+    parser.add_argument('--cache', default='cache/feed_cache.json', help="Feed HTTP cache file")
+    parser.add_argument('--no-cache', action='store_true', help="Always download and re-parse every feed")
+    parser.add_argument('--store', default='articles.db', help="Append-only article index (SQLite)")
+    return parser.parse_args()
 
 def main():
-    # RSS feed URL
-    rss_url = "https://phys.org/rss-feed/breaking/chemistry-news/"
+    args = parse_args()
+    configure()
+    cache = None if args.no_cache else FeedCache(args.cache)
     
-    # Create scraper instance
-    scraper = RSSFeedScraper(rss_url)
+    if args.feeds:
+        config = load_feed_config(args.feeds)
+        scraper = MultiFeedScraper(
+            config['feeds'],
+            max_workers=config.get('max_workers', 8),
+            per_host_limit=config.get('per_host_limit', 2),
+            cache=cache,
+        )
+        print(f"Fetching {len(config['feeds'])} RSS feeds...")
+        start = time.time()
+        with stage('feed'):
+            feed_data = scraper.fetch_all()
+        print(f"Fetched feeds in {time.time() - start:.2f} seconds")
+    else:
+        # RSS feed URL
+        rss_url = "https://phys.org/rss-feed/breaking/chemistry-news/"
+        
+        # Create scraper instance
+        scraper = RSSFeedScraper(rss_url, cache=cache)
+        
+        # Get feed data
+        print("Fetching RSS feed...")
+        with stage('feed'):
+            feed_data = scraper.get_feed()
     
-    # Get feed data
-    print("Fetching RSS feed...")
-    feed_data = scraper.get_feed()
+    if cache:
+        cache.save()
     
-    if feed_data:
+    if feed_data and scraper.not_modified and os.path.exists(args.output):
+        print(f"Feed unchanged since last poll, keeping {args.output}")
+    elif feed_data:
+        # Merge into the persistent index; this also assigns stable article IDs
+        store = ArticleStore(args.store)
+        new_articles = store.merge(feed_data['articles'])
+        print(f"{len(new_articles)} new articles ({store.count()} in {args.store})")
+        store.close()
+        
         # Save to JSON file
-        output_file = 'chemistry_news.json'
-        if scraper.save_to_json(feed_data, output_file):
+        output_file = args.output
+        if save_to_json(feed_data, output_file):
             print(f"Successfully scraped {len(feed_data['articles'])} articles")
             
             # Print some basic stats
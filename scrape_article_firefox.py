@@ -6,9 +6,10 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from fake_useragent import UserAgent
 import json
-from datetime import datetime
+from dates import to_utc_iso, utc_now_iso
 import time
 import random
+import sys
 
 def setup_driver():
     options = Options()
@@ -32,8 +33,11 @@ def setup_driver():
     
     return driver
 
-def scrape_article(url):
-    driver = setup_driver()
+def scrape_article(url, driver=None, output_file='article_data_firefox.json'):
+    # Reuse a caller-provided driver across pages; only quit one we started
+    owns_driver = driver is None
+    if owns_driver:
+        driver = setup_driver()
     
     try:
         # Add random delay before accessing the page (2-5 seconds)
@@ -58,10 +62,10 @@ def scrape_article(url):
         # Get publication date - try different approaches
         try:
             date_element = driver.find_element(By.CLASS_NAME, "text-gray-500")
-            pub_date = date_element.text
+            pub_date = to_utc_iso(date_element.text)
         except:
-            # If we can't find the date, use the current date
-            pub_date = datetime.now().isoformat()
+            # Unknown rather than the scrape time, so date filters skip it
+            pub_date = None
         print(f"Found publication date: {pub_date}")
         
         # Create article data structure
@@ -70,17 +74,17 @@ def scrape_article(url):
             "url": url,
             "publication_date": pub_date,
             "content": article_text,
-            "scraped_at": datetime.now().isoformat(),
+            "scraped_at": utc_now_iso(),
             "browser": "Firefox"
         }
         
-        # Save to JSON file with Firefox suffix
-        output_file = 'article_data_firefox.json'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(article_data, f, ensure_ascii=False, indent=4)
+        # Save to JSON file with Firefox suffix (callers scraping several URLs pass None and save them together)
+        if output_file:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(article_data, f, ensure_ascii=False, indent=4)
+            print(f"Data saved to {output_file}")
             
         print(f"Successfully scraped article: {title}")
-        print(f"Data saved to {output_file}")
         return article_data
         
     except Exception as e:
@@ -92,15 +96,31 @@ def scrape_article(url):
         return None
         
     finally:
-        # Add random delay before closing (1-3 seconds)
-        time.sleep(random.uniform(1, 3))
+        if owns_driver:
+            # Add random delay before closing (1-3 seconds)
+            time.sleep(random.uniform(1, 3))
+            try:
+                driver.quit()
+            except:
+                pass
+
+if __name__ == "__main__":
+    urls = sys.argv[1:] or ["https://phys.org/news/2025-01-experimental-quantum-technologies-closer-students.html"]
+    # One browser session for all URLs instead of one per article
+    driver = setup_driver()
+    results = []
+    try:
+        for url in urls:
+            article_data = scrape_article(url, driver=driver, output_file=None)
+            if article_data:
+                results.append(article_data)
+    finally:
         try:
             driver.quit()
         except:
             pass
-
-if __name__ == "__main__":
-    url = "https://phys.org/news/2025-01-experimental-quantum-technologies-closer-students.html"
-    article_data = scrape_article(url)
-    if article_data:
-        print("Scraping completed successfully")
+    if results:
+        # One article keeps the single-object format; several are saved as a list
+        with open('article_data_firefox.json', 'w', encoding='utf-8') as f:
+            json.dump(results[0] if len(urls) == 1 else results, f, ensure_ascii=False, indent=4)
+        print(f"Scraping completed successfully: {len(results)} articles saved to article_data_firefox.json")
@@ -0,0 +1,236 @@
+import os
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+from instrumentation import metrics
+
+# Failure kinds
+TIMEOUT = 'timeout'
+SELECTOR_MISS = 'selector_miss'
+BLOCKED = 'blocked'
+NETWORK = 'network'
+ERROR = 'error'
+
+# Worth retrying within the same run; the others will fail the same way again
+TRANSIENT_KINDS = {TIMEOUT, NETWORK}
+
+FAILURES_DB = 'cache/scrape_failures.db'
+SNAPSHOT_DIR = 'cache/snapshots'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dead_letters (
+    url TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    detail TEXT,
+    attempts INTEGER NOT NULL,
+    first_failed TEXT NOT NULL,
+    last_failed TEXT NOT NULL,
+    next_retry REAL NOT NULL,
+    snapshot TEXT
+);
+CREATE TABLE IF NOT EXISTS circuits (
+    host TEXT PRIMARY KEY,
+    consecutive_blocks INTEGER NOT NULL,
+    open_until REAL NOT NULL,
+    cooldown REAL NOT NULL
+);
+"""
+
+class ScrapeFailure(Exception):
+    """A classified scrape failure, optionally carrying the HTML that was served"""
+
+    def __init__(self, kind, detail, html=None):
+        super().__init__(f"{kind}: {detail}")
+        self.kind = kind
+        self.detail = detail
+        self.html = html
+
+    @property
+    def transient(self):
+        return self.kind in TRANSIENT_KINDS
+
+def classify(error):
+    """Map any scraping exception to a ScrapeFailure (Selenium and requests errors by name)"""
+    if isinstance(error, ScrapeFailure):
+        return error
+    name = type(error).__name__
+    detail = str(error).strip().split('\n')[0][:300] or name
+    if name in ('TimeoutException', 'TimeoutError', 'Timeout', 'ReadTimeout', 'ConnectTimeout', 'timeout'):
+        return ScrapeFailure(TIMEOUT, detail)
+    if name in ('NoSuchElementException', 'StaleElementReferenceException'):
+        return ScrapeFailure(SELECTOR_MISS, detail)
+    if name in ('ConnectionError', 'ChunkedEncodingError') or 'neterror' in detail.lower():
+        return ScrapeFailure(NETWORK, detail)
+    return ScrapeFailure(ERROR, detail)
+
+def host_of(url):
+    return urlparse(url).netloc.lower()
+
+class FailureTracker:
+    """Persistent dead-letter queue plus a per-host circuit breaker.
+
+    A failed URL is parked with its failure kind and a capped HTML
+    snapshot, and is not attempted again until its retry time, which
+    backs off exponentially per attempt; after `max_attempts` it stays
+    parked until retried by hand. A host that blocks `block_threshold`
+    scrapes in a row is paused for `cooldown` seconds, doubling each time
+    it blocks again right after reopening, so a blocking site stops
+    consuming browser time.
+    """
+
+    def __init__(self, db_file=FAILURES_DB, snapshot_dir=SNAPSHOT_DIR, block_threshold=3, cooldown=1800,
+                 max_cooldown=6 * 3600, retry_delay=3600, max_attempts=5, snapshot_bytes=64 * 1024):
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_file = db_file
+        self.snapshot_dir = snapshot_dir
+        self.block_threshold = block_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.snapshot_bytes = snapshot_bytes
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def skip_reason(self, url, ignore_schedule=False):
+        """Why `url` should not be attempted now, or None"""
+        now = time.time()
+        with self._lock:
+            circuit = self.conn.execute("SELECT open_until FROM circuits WHERE host = ?", (host_of(url),)).fetchone()
+            letter = self.conn.execute(
+                "SELECT kind, attempts, next_retry FROM dead_letters WHERE url = ?", (url,)
+            ).fetchone()
+        if circuit and circuit['open_until'] > now:
+            metrics.inc('scrape_skipped', reason='circuit_open')
+            return f"circuit open for {host_of(url)} for another {circuit['open_until'] - now:.0f}s"
+        if letter and not ignore_schedule:
+            if letter['attempts'] >= self.max_attempts:
+                metrics.inc('scrape_skipped', reason='dead_letter')
+                return f"dead-lettered after {letter['attempts']} {letter['kind']} failures"
+            if letter['next_retry'] > now:
+                metrics.inc('scrape_skipped', reason='retry_later')
+                return f"last failed ({letter['kind']}), next retry in {letter['next_retry'] - now:.0f}s"
+        return None
+
+    def record_failure(self, url, failure):
+        host = host_of(url)
+        now = time.time()
+        timestamp = datetime.now().isoformat()
+        snapshot = self._save_snapshot(url, failure.html) if failure.html else None
+        metrics.inc('scrape_failures', kind=failure.kind)
+        with self._lock, self.conn:
+            row = self.conn.execute("SELECT attempts, first_failed FROM dead_letters WHERE url = ?", (url,)).fetchone()
+            attempts = (row['attempts'] if row else 0) + 1
+            self.conn.execute(
+                """INSERT OR REPLACE INTO dead_letters
+                   (url, host, kind, detail, attempts, first_failed, last_failed, next_retry, snapshot)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (url, host, failure.kind, failure.detail, attempts, row['first_failed'] if row else timestamp,
+                 timestamp, now + self.retry_delay * 4 ** (attempts - 1), snapshot)
+            )
+            if failure.kind == BLOCKED:
+                return self._record_block(host, now)
+            # Any other outcome means the host answered normally
+            self.conn.execute("UPDATE circuits SET consecutive_blocks = 0 WHERE host = ?", (host,))
+        return None
+
+    def _record_block(self, host, now):
+        """Count a block against the host; returns the pause in seconds if the circuit opened"""
+        circuit = self.conn.execute("SELECT * FROM circuits WHERE host = ?", (host,)).fetchone()
+        blocks = (circuit['consecutive_blocks'] if circuit else 0) + 1
+        cooldown = circuit['cooldown'] if circuit else self.cooldown
+        open_until = circuit['open_until'] if circuit else 0.0
+        opened = None
+        if blocks >= self.block_threshold:
+            if open_until and now - open_until < cooldown:
+                # Blocked again straight after the last pause: pause longer
+                cooldown = min(self.max_cooldown, cooldown * 2)
+            open_until = now + cooldown
+            blocks = 0
+            opened = cooldown
+            metrics.inc('circuit_opened', host=host)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO circuits (host, consecutive_blocks, open_until, cooldown) VALUES (?, ?, ?, ?)",
+            (host, blocks, open_until, cooldown)
+        )
+        return opened
+
+    def record_success(self, url):
+        host = host_of(url)
+        with self._lock, self.conn:
+            row = self.conn.execute("SELECT snapshot FROM dead_letters WHERE url = ?", (url,)).fetchone()
+            self.conn.execute("DELETE FROM dead_letters WHERE url = ?", (url,))
+            self.conn.execute(
+                "UPDATE circuits SET consecutive_blocks = 0, cooldown = ? WHERE host = ?", (self.cooldown, host)
+            )
+        if row and row['snapshot'] and os.path.exists(row['snapshot']):
+            os.remove(row['snapshot'])
+
+    def _save_snapshot(self, url, html):
+        """Keep the start of the page, where block pages and missing markup show, capped in size"""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = os.path.join(self.snapshot_dir, f"{hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]}.html")
+        data = html.encode('utf-8', errors='replace')[:self.snapshot_bytes]
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def dead_letters(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM dead_letters ORDER BY last_failed DESC").fetchall()
+        return [dict(row) for row in rows]
+
+    def open_circuits(self):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM circuits WHERE open_until > ? ORDER BY open_until", (time.time(),)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def retry(self, host=None):
+        """Make parked URLs (all, or one host's) eligible again and close circuits; returns the count"""
+        with self._lock, self.conn:
+            if host:
+                cursor = self.conn.execute(
+                    "UPDATE dead_letters SET attempts = 0, next_retry = 0 WHERE host = ?", (host,)
+                )
+                self.conn.execute("DELETE FROM circuits WHERE host = ?", (host,))
+            else:
+                cursor = self.conn.execute("UPDATE dead_letters SET attempts = 0, next_retry = 0")
+                self.conn.execute("DELETE FROM circuits")
+            return cursor.rowcount
+
+    def close(self):
+        self.conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the scrape dead-letter queue and host circuit breakers")
+    parser.add_argument('--db', default=FAILURES_DB, help="Failure database")
+    parser.add_argument('--retry', action='store_true', help="Make all dead-lettered URLs eligible again")
+    parser.add_argument('--retry-host', help="Make one host's dead-lettered URLs eligible again")
+    args = parser.parse_args()
+
+    tracker = FailureTracker(args.db)
+    if args.retry or args.retry_host:
+        print(f"{tracker.retry(args.retry_host)} URLs will be retried on the next run")
+        return
+    for circuit in tracker.open_circuits():
+        print(f"Circuit open: {circuit['host']} until {datetime.fromtimestamp(circuit['open_until']):%Y-%m-%d %H:%M}")
+    letters = tracker.dead_letters()
+    print(f"{len(letters)} dead-lettered URLs")
+    for letter in letters:
+        attempts = f"{letter['attempts']} attempts" if letter['attempts'] else "queued for retry"
+        print(f"[{letter['kind']}] {attempts}: {letter['url']}")
+        print(f"    {letter['detail']}" + (f" (snapshot: {letter['snapshot']})" if letter['snapshot'] else ''))
+
+if __name__ == "__main__":
+    main()
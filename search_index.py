@@ -0,0 +1,282 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+from triz import get_triz_index
+from corpus_store import CorpusStore
+from dates import find_partitioned
+
+# Next to the scripts, so the website finds the generator's index from any working directory
+SEARCH_DB = str(Path(__file__).resolve().parent / 'search.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    title TEXT,
+    summary TEXT,
+    url TEXT,
+    published TEXT,
+    tags TEXT,
+    principles TEXT,
+    content_hash TEXT,
+    indexed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS doc_principles (
+    doc_id INTEGER NOT NULL,
+    principle_id INTEGER NOT NULL,
+    PRIMARY KEY (principle_id, doc_id)
+);
+CREATE TABLE IF NOT EXISTS doc_tags (
+    doc_id INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (tag, doc_id)
+);
+CREATE INDEX IF NOT EXISTS docs_published ON docs (published);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+    title, body, analysis, tokenize = 'porter unicode61'
+);
+"""
+
+def summarize(body):
+    """First paragraph of a Markdown article"""
+    for line in body.split('\n')[1:]:
+        if line.strip() and not line.startswith('#'):
+            return line.strip()
+    return ''
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match, the last one as a prefix"""
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+def load_feed_metadata(feed_file='chemistry_news.json'):
+    """Publication date and tags of every feed entry, keyed by link"""
+    if not os.path.exists(feed_file):
+        return {}
+    with open(feed_file, 'r', encoding='utf-8') as f:
+        articles = json.load(f).get('articles', [])
+    return {article['link']: article for article in articles if article.get('link')}
+
+def principle_ids(article_info):
+    """Principle IDs from a structured analysis, or principles named in a text analysis"""
+    if article_info.get('principles'):
+        return [p['id'] for p in article_info['principles'] if 'id' in p]
+    return get_triz_index().find_mentions(article_info.get('analysis', ''))
+
+class SearchIndex:
+    """SQLite FTS5 index over the generated articles and their TRIZ analyses.
+
+    Principles and feed tags live in their own indexed tables, so filters
+    and full-text queries are answered from the database alone, without
+    opening the Markdown files. Articles are added one at a time as they
+    are generated; re-adding an unchanged article is a no-op.
+    """
+
+    def __init__(self, db_file=SEARCH_DB):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def add(self, path, body, article_info, feed_entry=None):
+        """Index (or re-index) one generated article; returns False if it was unchanged"""
+        path = str(path)
+        feed_entry = feed_entry or {}
+        analysis = article_info.get('analysis', '')
+        content_hash = hashlib.sha256(f"{body}\0{analysis}".encode('utf-8')).hexdigest()
+        principles = principle_ids(article_info)
+        tags = feed_entry.get('tags', [])
+        title = body.split('\n', 1)[0].replace('#', '').strip() or article_info.get('title', '')
+        with self._lock, self.conn:
+            row = self.conn.execute("SELECT id, content_hash FROM docs WHERE path = ?", (path,)).fetchone()
+            if row and row['content_hash'] == content_hash:
+                return False
+            if row:
+                self._delete(row['id'])
+            cursor = self.conn.execute(
+                """INSERT INTO docs (path, title, summary, url, published, tags, principles, content_hash, indexed_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    path,
+                    title,
+                    summarize(body),
+                    article_info.get('url', ''),
+                    feed_entry.get('published_at') or feed_entry.get('published_parsed', ''),
+                    json.dumps(tags),
+                    json.dumps(principles),
+                    content_hash,
+                    datetime.now().isoformat(),
+                )
+            )
+            doc_id = cursor.lastrowid
+            self.conn.execute(
+                "INSERT INTO docs_fts (rowid, title, body, analysis) VALUES (?, ?, ?, ?)",
+                (doc_id, title, body, analysis)
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO doc_principles (doc_id, principle_id) VALUES (?, ?)",
+                [(doc_id, principle_id) for principle_id in principles]
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO doc_tags (doc_id, tag) VALUES (?, ?)",
+                [(doc_id, tag) for tag in tags]
+            )
+        return True
+
+    def remove(self, path):
+        with self._lock, self.conn:
+            row = self.conn.execute("SELECT id FROM docs WHERE path = ?", (str(path),)).fetchone()
+            if row:
+                self._delete(row['id'])
+
+    def _delete(self, doc_id):
+        self.conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (doc_id,))
+        self.conn.execute("DELETE FROM doc_principles WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM doc_tags WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+
+    def search(self, text='', principle=None, tag=None, since=None, until=None, limit=50, offset=0):
+        """Matching articles, best match first (newest first without a text query).
+
+        `since`/`until` are ISO dates compared against the feed's publication date.
+        """
+        query = fts_query(text or '')
+        clauses, params = [], []
+        if query:
+            sql = """SELECT d.*, snippet(docs_fts, 1, '**', '**', '…', 24) AS snippet
+                     FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid"""
+            clauses.append("docs_fts MATCH ?")
+            params.append(query)
+            order = "bm25(docs_fts, 10.0, 1.0, 2.0)"
+        else:
+            sql = "SELECT d.*, d.summary AS snippet FROM docs d"
+            order = "d.published DESC, d.indexed_at DESC"
+        if principle:
+            clauses.append("d.id IN (SELECT doc_id FROM doc_principles WHERE principle_id = ?)")
+            params.append(principle)
+        if tag:
+            clauses.append("d.id IN (SELECT doc_id FROM doc_tags WHERE tag = ?)")
+            params.append(tag)
+        if since:
+            clauses.append("d.published >= ?")
+            params.append(since)
+        if until:
+            # Inclusive of the whole `until` day
+            clauses.append("d.published < date(?, '+1 day')")
+            params.append(until)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order} LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [self._row_to_result(row) for row in rows]
+
+    def _row_to_result(self, row):
+        result = dict(row)
+        result['tags'] = json.loads(result['tags'] or '[]')
+        result['principles'] = json.loads(result['principles'] or '[]')
+        return result
+
+    def principles_for(self, path):
+        """Principle IDs of an indexed article, or None if it is not indexed"""
+        with self._lock:
+            row = self.conn.execute("SELECT principles FROM docs WHERE path = ?", (str(path),)).fetchone()
+        return json.loads(row['principles'] or '[]') if row else None
+
+    def principle_counts(self):
+        """(principle ID, article count) pairs, most common first"""
+        with self._lock:
+            rows = self.conn.execute(
+                """SELECT principle_id, COUNT(*) AS n FROM doc_principles
+                   GROUP BY principle_id ORDER BY n DESC, principle_id"""
+            ).fetchall()
+        return [(row['principle_id'], row['n']) for row in rows]
+
+    def tags(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT DISTINCT tag FROM doc_tags ORDER BY tag").fetchall()
+        return [row['tag'] for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+def rebuild(index, generated_dir, processed_dirs, feed_file):
+    """Index every generated article listed in the generator's manifest"""
+    # Imported here: the generator imports this module to index as it writes
+    from article_generator import load_processed_article
+    with open(Path(generated_dir) / '.manifest.json', 'r', encoding='utf-8') as f:
+        entries = json.load(f).get('entries', {})
+    feed_metadata = load_feed_metadata(feed_file)
+    added = 0
+    for name, entry in entries.items():
+        output = entry.get('output')
+        source = next(filter(None, (find_partitioned(d, name) for d in processed_dirs)), None)
+        if not output or not source or not os.path.exists(output):
+            continue
+        article_info = load_processed_article(source)
+        with open(output, 'r', encoding='utf-8') as f:
+            body = f.read()
+        added += index.add(output, body, article_info, feed_metadata.get(article_info.get('url')))
+    return added
+
+def rebuild_from_corpus(index, corpus, provider='gpt'):
+    """Index every generated article in the corpus, with `provider`'s analyses, in one scan"""
+    added = 0
+    columns = ('article_id', 'link', 'published', 'tags', 'path', 'structured', 'analysis', 'body')
+    for row in corpus.scan(columns, provider=provider, generated_only=True):
+        article_info = {'url': row['link'], 'analysis': row['analysis'] or ''}
+        if row['structured']:
+            article_info['principles'] = json.loads(row['structured'])
+        feed_entry = {'published_parsed': row['published'], 'tags': json.loads(row['tags'] or '[]')}
+        added += index.add(row['path'] or f"corpus:{row['article_id']}", row['body'], article_info, feed_entry)
+    return added
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the article search index")
+    parser.add_argument('query', nargs='?', default='', help="Full-text query")
+    parser.add_argument('--db', default=SEARCH_DB, help="Search index database")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Index all generated articles (only new or changed ones are rewritten)")
+    parser.add_argument('--generated-dir', default='generated_articles', help="Directory of generated articles")
+    parser.add_argument('--processed-dir', action='append',
+                        help="Analysis directory the articles were generated from (repeatable, default gpt_processed)")
+    parser.add_argument('--feed', default='chemistry_news.json', help="RSS feed JSON with publication dates and tags")
+    parser.add_argument('--corpus', help="Rebuild from this corpus database instead of the article files")
+    parser.add_argument('--provider', default='gpt', help="Analyses to index with --corpus")
+    parser.add_argument('--principle', type=int, help="Only articles applying this TRIZ principle (1-40)")
+    parser.add_argument('--tag', help="Only articles with this feed tag")
+    parser.add_argument('--since', help="Only articles published on or after this date (YYYY-MM-DD)")
+    parser.add_argument('--until', help="Only articles published on or before this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    index = SearchIndex(args.db)
+    if args.rebuild and args.corpus:
+        added = rebuild_from_corpus(index, CorpusStore(args.corpus), args.provider)
+        print(f"Indexed {added} new or changed articles ({index.count()} total)")
+        return
+    if args.rebuild:
+        added = rebuild(index, args.generated_dir, args.processed_dir or ['gpt_processed'], args.feed)
+        print(f"Indexed {added} new or changed articles ({index.count()} total)")
+        return
+    for result in index.search(args.query, args.principle, args.tag, args.since, args.until):
+        print(f"{result['published'] or '-':<20} {result['title']}")
+        print(f"    {result['path']}")
+
+if __name__ == "__main__":
+    main()
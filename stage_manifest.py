@@ -0,0 +1,86 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+
+def file_hash(path):
+    """sha256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class StageManifest:
+    """Per-stage record of which inputs have been processed.
+
+    Maps each input (by name) to the hash of its content when it was
+    processed and the output file it produced. A stage consults it to
+    skip inputs that are unchanged since their last run; it is saved
+    after every record, so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, manifest_file):
+        self.manifest_file = manifest_file
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(manifest_file):
+            try:
+                with open(manifest_file, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('entries', {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable manifest {manifest_file}: {str(e)}")
+
+    def is_current(self, key, input_hash):
+        """True if `key` was processed with this exact content and its output still exists"""
+        with self._lock:
+            entry = self.entries.get(key)
+        return bool(
+            entry
+            and entry.get('input_hash') == input_hash
+            and entry.get('output')
+            and os.path.exists(entry['output'])
+        )
+
+    def output_for(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+        return entry.get('output') if entry else None
+
+    def record(self, key, input_hash, output):
+        """Record a finished input and drop the output of its previous version"""
+        output = str(output)
+        with self._lock:
+            previous = self.entries.get(key, {}).get('output')
+            self.entries[key] = {
+                'input_hash': input_hash,
+                'output': output,
+                'completed_at': datetime.now().isoformat(),
+            }
+            self._save()
+        if previous and previous != output and os.path.exists(previous):
+            os.remove(previous)
+
+    def forget(self, key):
+        """Drop an input that no longer exists, together with its output"""
+        with self._lock:
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                return
+            self._save()
+        if entry.get('output') and os.path.exists(entry['output']):
+            os.remove(entry['output'])
+
+    def keys(self):
+        with self._lock:
+            return list(self.entries)
+
+    def _save(self):
+        directory = os.path.dirname(self.manifest_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = f"{self.manifest_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'entries': self.entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.manifest_file)
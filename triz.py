@@ -0,0 +1,260 @@
+import re
+import sys
+import json
+import math
+from pathlib import Path
+from collections import Counter
+from functools import lru_cache
+import numpy as np
+from dates import list_partitioned
+
+TRIZ_FILE = Path(__file__).resolve().parent / "TRIZ40.json"
+
+def normalize_name(name):
+    """Case-, spacing- and punctuation-insensitive form of a principle name"""
+    return re.sub(r'[^a-z0-9]+', ' ', name.lower()).strip()
+
+def load_triz_principles(path=TRIZ_FILE):
+    """The 40 principles from TRIZ40.json, numbered 1-40 in file order"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [
+        {'id': i, 'name': p['Principle'], 'explanation': p['Explanation']}
+        for i, p in enumerate(data['TRIZ_Principles'], 1)
+    ]
+
+class TRIZIndex:
+    """Lookup of TRIZ principles by number or (loosely matched) name"""
+
+    def __init__(self, principles):
+        self.principles = principles
+        self.by_id = {p['id']: p for p in principles}
+        self.by_name = {normalize_name(p['name']): p for p in principles}
+        # Longest names first so "Preliminary Anti-Action" wins over "Preliminary Action"
+        names = '|'.join(re.escape(n) for n in sorted(self.by_name, key=len, reverse=True))
+        # Names such as "Feedback" or "Composite Materials" are ordinary words in
+        # research prose, so a mention needs a marker: "Principle 23", "#23",
+        # "23. Feedback", "principle of Feedback" or "Feedback principle"
+        self._mention_pattern = re.compile(
+            r'\bprinciples? (?:no |number )?#?(?P<marked_id>\d{1,2})\b'
+            r'|#(?P<hash_id>\d{1,2})\b'
+            r'|\b(?P<number>\d{1,2}) (?P<numbered>' + names + r')\b'
+            r'|\bprinciple (?:of )?(?:the )?(?P<after>' + names + r')\b'
+            r'|\b(?P<before>' + names + r') principle\b'
+        )
+
+    def resolve(self, value):
+        """Principle for an ID (13, "13", "#13") or a name, or None"""
+        if isinstance(value, int):
+            return self.by_id.get(value)
+        text = str(value).strip()
+        match = re.fullmatch(r'#?\s*(\d{1,2})', text)
+        if match:
+            return self.by_id.get(int(match.group(1)))
+        # Accept "Principle 13: The Other Way Round" style labels
+        text = re.sub(r'^(principle\s*)?#?\d{1,2}\s*[:.)-]?\s*', '', text, flags=re.IGNORECASE)
+        return self.by_name.get(normalize_name(text))
+
+    def validate(self, items):
+        """Canonicalize LLM-reported principles; returns (valid, rejected)"""
+        valid, rejected, seen = [], [], set()
+        for item in items or []:
+            if isinstance(item, dict):
+                principle = self.resolve(item.get('id')) if item.get('id') is not None else None
+                principle = principle or self.resolve(item.get('name', ''))
+                explanation = item.get('explanation', '')
+            else:
+                principle = self.resolve(item)
+                explanation = ''
+            if principle is None:
+                rejected.append(item)
+                continue
+            if principle['id'] in seen:
+                continue
+            seen.add(principle['id'])
+            valid.append({'id': principle['id'], 'name': principle['name'], 'explanation': explanation})
+        return valid, rejected
+
+    def find_mentions(self, text):
+        """IDs of principles cited in free text, in order of first mention.
+
+        A bare principle name is not a citation:
+
+        >>> index = get_triz_index()
+        >>> index.find_mentions("Feedback from the sensor tunes the dynamics of the composite materials.")
+        []
+        >>> index.find_mentions("**23. Feedback**: the sensor... It also uses Composite Materials (Principle 40) and #1.")
+        [23, 40, 1]
+        >>> index.find_mentions("The principle of Skipping applies, as does the Copying principle.")
+        [21, 26]
+        """
+        ids = []
+        # Like normalize_name, but keeping "#" for "#23" style references
+        for match in self._mention_pattern.finditer(re.sub(r'[^a-z0-9#]+', ' ', text.lower())):
+            number = match.group('marked_id') or match.group('hash_id')
+            if number:
+                principle = self.by_id.get(int(number))
+            elif match.group('numbered'):
+                principle = self.by_name[match.group('numbered')]
+                # A list number that is not the principle's own is just list numbering
+                if principle['id'] != int(match.group('number')):
+                    principle = None
+            else:
+                principle = self.by_name[match.group('after') or match.group('before')]
+            if principle and principle['id'] not in ids:
+                ids.append(principle['id'])
+        return ids
+
+    def prompt_list(self):
+        """Numbered principle list for inclusion in a prompt"""
+        return '\n'.join(f"{p['id']}. {p['name']}" for p in self.principles)
+
+@lru_cache(maxsize=1)
+def get_triz_index():
+    return TRIZIndex(load_triz_principles())
+
+# Domain vocabulary that signals each principle in chemistry and materials
+# research, beyond the words of its name and explanation
+PRINCIPLE_KEYWORDS = {
+    1: "segment fragment modular nanoparticle particle divide compartment",
+    2: "remove extract separate isolate purify eliminate byproduct",
+    3: "local site selective localized targeted surface functionalization",
+    4: "asymmetric chiral enantioselective anisotropic janus",
+    5: "combine merge integrate hybrid tandem one pot cascade",
+    6: "multifunctional dual bifunctional versatile universal",
+    7: "core shell encapsulate nested cage host guest",
+    8: "buoyancy levitation counterbalance",
+    9: "inhibitor protect passivate prevent stabilize degradation",
+    10: "pretreatment precursor preactivation prepare template",
+    11: "redundancy backup safety fail safe",
+    12: "potential energy level equilibrium alignment",
+    13: "invert reverse opposite reversed inverse",
+    14: "spherical curved round sphere droplet vesicle",
+    15: "dynamic adaptive responsive switchable tunable stimuli",
+    16: "excess partial stoichiometric overdose saturation",
+    17: "three dimensional 3d layer stacked vertical two dimensional 2d",
+    18: "vibration ultrasound sonication oscillation acoustic",
+    19: "pulse pulsed periodic cyclic intermittent",
+    20: "continuous flow uninterrupted steady",
+    21: "rapid fast ultrafast flash quick",
+    22: "waste pollutant harmful upcycle convert waste valorization",
+    23: "feedback sensor monitor control loop self regulating",
+    24: "mediator catalyst intermediary carrier shuttle linker",
+    25: "self healing self assembly self cleaning autonomous self repair",
+    26: "simulation model digital twin replica mimic biomimetic",
+    27: "disposable cheap low cost single use",
+    28: "light photo electric electrochemical magnetic field laser",
+    29: "fluid liquid gas hydraulic pneumatic pressure",
+    30: "film membrane coating thin flexible shell",
+    31: "porous pore mof framework zeolite sponge aerogel",
+    32: "color colour fluorescent dye optical indicator",
+    33: "uniform homogeneous consistent same material",
+    34: "recycle recover regenerate reuse dissolve biodegradable",
+    35: "temperature pressure concentration ph tune parameter",
+    36: "phase transition melting crystallization solid liquid",
+    37: "thermal expansion contraction heat shrink",
+    38: "oxidant oxidation oxygen ozone peroxide reactive oxygen",
+    39: "inert argon nitrogen atmosphere vacuum",
+    40: "composite blend alloy heterostructure reinforced",
+}
+
+STOPWORDS = set("""
+a an and are as at be by can for from has have in into is it its more of on or
+such such that the their this to use used using with without which while other
+improve improved system systems object objects component components performance
+efficiency effectively effective achieve desired
+""".split())
+
+def tokenize(text):
+    """Lowercase word stems without stopwords"""
+    tokens = []
+    for word in re.findall(r'[a-z0-9]+', text.lower()):
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        # Light suffix stripping so "porous"/"pores", "coating"/"coated" line up
+        for suffix in ('ations', 'ation', 'ities', 'ity', 'ing', 'ies', 'ed', 'es', 'ous', 's'):
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[:-len(suffix)]
+                break
+        tokens.append(word)
+    return tokens
+
+def ngrams(tokens):
+    """Unigrams plus bigrams"""
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+class TRIZClassifier:
+    """Fast local TF-IDF ranking of TRIZ principles for a batch of articles.
+
+    Each principle is a weighted document of its name, explanation and
+    domain keywords. Articles are vectorized over that vocabulary only,
+    so scoring a whole batch is one sparse-ish matrix product.
+    """
+
+    def __init__(self, index=None):
+        self.index = index or get_triz_index()
+        documents = []
+        for p in self.index.principles:
+            # The name counts three times as much as the explanation
+            text = f"{p['name']} {p['name']} {p['name']} {p['explanation']} {PRINCIPLE_KEYWORDS.get(p['id'], '')}"
+            documents.append(Counter(ngrams(tokenize(text))))
+        
+        self.vocabulary = {term: i for i, term in enumerate(sorted(set().union(*documents)))}
+        document_frequency = np.zeros(len(self.vocabulary))
+        for counts in documents:
+            for term in counts:
+                document_frequency[self.vocabulary[term]] += 1
+        self.idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+        self.principle_matrix = self._weigh(self._counts(documents))
+
+    def _counts(self, counters):
+        matrix = np.zeros((len(counters), len(self.vocabulary)))
+        for row, counts in enumerate(counters):
+            for term, count in counts.items():
+                column = self.vocabulary.get(term)
+                if column is not None:
+                    matrix[row, column] = count
+        return matrix
+
+    def _weigh(self, matrix):
+        # Sublinear term frequency, IDF, then L2 normalization
+        matrix = np.where(matrix > 0, 1 + np.log(np.maximum(matrix, 1)), 0) * self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def score(self, texts):
+        """Cosine similarity of every text to every principle, shape (len(texts), 40)"""
+        article_matrix = self._weigh(self._counts([Counter(ngrams(tokenize(t))) for t in texts]))
+        return article_matrix @ self.principle_matrix.T
+
+    def rank(self, texts, top_k=5):
+        """Top-k (principle, score) pairs per text, best first"""
+        scores = self.score(texts)
+        top = np.argsort(-scores, axis=1)[:, :top_k]
+        return [
+            [(self.index.principles[j], float(scores[i, j])) for j in row]
+            for i, row in enumerate(top)
+        ]
+
+def principle_counts(records):
+    """How often each principle appears across structured analysis records"""
+    counts = Counter()
+    for record in records:
+        for principle in record.get('principles', []):
+            counts[(principle['id'], principle['name'])] += 1
+    return counts
+
+def load_structured_records(directory):
+    records = []
+    for path in list_partitioned(directory, "*.json"):
+        with open(path, 'r', encoding='utf-8') as f:
+            records.append(json.load(f))
+    return records
+
+if __name__ == "__main__":
+    # python triz.py gpt_processed  -> principle frequency over structured analyses
+    directory = sys.argv[1] if len(sys.argv) > 1 else "gpt_processed"
+    records = load_structured_records(directory)
+    print(f"{len(records)} structured analyses in {directory}")
+    for (principle_id, name), count in principle_counts(records).most_common():
+        print(f"{principle_id:>2}. {name}: {count}")
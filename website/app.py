@@ -1,8 +1,22 @@
 import streamlit as st
 import os
+import sys
 from pathlib import Path
 import markdown
 import datetime
+from article_index import ArticleIndex
+
+# The search index and TRIZ data live with the pipeline scripts one level up
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+from search_index import SearchIndex, SEARCH_DB
+from triz import get_triz_index
+
+# Anchored to the repository, so the app works from any working directory
+ARTICLES_DIR = ROOT_DIR / "generated_articles"
+STYLE_FILE = Path(__file__).resolve().parent / "static" / "style.css"
+INDEX_TTL = 30
+PAGE_SIZE = 20
 
 # Set page configuration
 st.set_page_config(
@@ -13,31 +27,96 @@ st.set_page_config(
 
 # Load and apply custom CSS
 def load_css():
-    with open("website/static/style.css") as f:
+    with open(STYLE_FILE) as f:
         st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
 def read_markdown_file(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
         return f.read()
 
-def get_article_metadata(content):
-    """Extract title and first paragraph as summary"""
-    lines = content.split('\n')
-    title = lines[0].replace('#', '').strip()
-    
-    # Find first paragraph for summary
-    summary = ""
-    for line in lines[1:]:
-        if line.strip() and not line.startswith('#'):
-            summary = line.strip()
-            break
-    
-    return title, summary
+@st.cache_resource
+def get_article_index():
+    return ArticleIndex(str(ARTICLES_DIR))
+
+@st.cache_data(ttl=INDEX_TTL)
+def load_article_list():
+    """Article metadata, newest first; the directory is rescanned at most every INDEX_TTL seconds"""
+    index = get_article_index()
+    index.refresh()
+    return index.articles()
+
+@st.cache_data(max_entries=64)
+def load_article_body(file_path, mtime):
+    """Full article text; keyed on mtime so an edited article is read again"""
+    return read_markdown_file(file_path)
+
+@st.cache_resource
+def get_search_index():
+    return SearchIndex(SEARCH_DB)
+
+@st.cache_data(ttl=INDEX_TTL)
+def search_articles(text, principle, tag, since, until):
+    return get_search_index().search(text, principle, tag, since, until, limit=PAGE_SIZE * 5)
 
 def display_article(content):
     """Display full article content"""
     st.markdown(content)
 
+def open_article(entry):
+    # Search results hold paths relative to the repository; index entries are absolute
+    st.session_state.open_article = str(ROOT_DIR / entry['path'])
+
+def close_article():
+    st.session_state.pop("open_article", None)
+
+def show_open_article(articles):
+    """Render the article selected with a "Read Full Article" button, if any"""
+    path = st.session_state.get("open_article")
+    entry = next((entry for entry in articles if entry['path'] == path), None)
+    if entry is None:
+        return False
+    st.button("← Back to articles", on_click=close_article)
+    st.markdown("---")
+    display_article(load_article_body(entry['path'], entry['mtime']))
+    return True
+
+def show_search():
+    """Full-text search with principle, tag and date filters, served from the search index"""
+    st.markdown("## Search")
+    triz = get_triz_index()
+    index = get_search_index()
+    text = st.text_input("Search articles and TRIZ analyses")
+    col1, col2, col3, col4 = st.columns(4)
+    principle_options = [None] + [principle_id for principle_id, _ in index.principle_counts()]
+    principle = col1.selectbox(
+        "TRIZ principle", principle_options,
+        format_func=lambda pid: "Any" if pid is None else f"{pid}. {triz.by_id[pid]['name']}"
+    )
+    tag = col2.selectbox("Feed tag", [None] + index.tags(), format_func=lambda t: "Any" if t is None else t)
+    # Streamlit 1.29 has no empty date_input, so the date filter is opt-in
+    since = until = None
+    if st.checkbox("Filter by publication date"):
+        today = datetime.date.today()
+        since = col3.date_input("Published from", value=today - datetime.timedelta(days=30))
+        until = col4.date_input("Published until", value=today)
+    
+    results = search_articles(
+        text, principle, tag,
+        since.isoformat() if since else None,
+        until.isoformat() if until else None,
+    )
+    st.caption(f"{len(results)} matching articles")
+    for result in results:
+        st.markdown(f"### {result['title']}")
+        details = [result['published'][:10]] if result['published'] else []
+        details += [triz.by_id[pid]['name'] for pid in result['principles'] if pid in triz.by_id]
+        if details:
+            st.caption(" · ".join(details))
+        st.markdown(result['snippet'])
+        st.button("Read Full Article", key=f"search_{result['path']}",
+                  on_click=open_article, args=(result,))
+        st.markdown("---")
+
 def main():
     # Load custom CSS
     load_css()
@@ -50,13 +129,15 @@ def main():
         </div>
     """, unsafe_allow_html=True)
     
-    # Get all articles
-    articles_dir = Path("generated_articles")
-    article_files = sorted(articles_dir.glob("*.md"), key=os.path.getmtime, reverse=True)
+    # Metadata only; bodies are read when an article is opened
+    articles = load_article_list()
     
     # Sidebar for navigation
     st.sidebar.title("Navigation")
-    view_mode = st.sidebar.radio("View", ["Home", "All Articles"])
+    view_mode = st.sidebar.radio("View", ["Home", "All Articles", "Search"])
+    
+    if show_open_article(articles):
+        return
     
     if view_mode == "Home":
         # Main content area
@@ -64,40 +145,39 @@ def main():
         
         with col1:
             # Featured article (most recent)
-            if article_files:
-                featured_content = read_markdown_file(article_files[0])
-                title, summary = get_article_metadata(featured_content)
+            if articles:
+                featured = articles[0]
                 
                 st.markdown("## Featured Article")
-                st.markdown(f"### {title}")
-                st.markdown(summary)
-                if st.button("Read Full Article", key=f"featured_{title}"):
-                    st.markdown("---")
-                    display_article(featured_content)
+                st.markdown(f"### {featured['title']}")
+                st.markdown(featured['summary'])
+                st.button("Read Full Article", key=f"featured_{featured['path']}",
+                          on_click=open_article, args=(featured,))
         
         with col2:
             # Latest articles sidebar
             st.markdown("## Latest Articles")
-            for file in article_files[1:4]:  # Show next 3 articles
-                content = read_markdown_file(file)
-                title, summary = get_article_metadata(content)
-                
+            for entry in articles[1:4]:  # Show next 3 articles
                 with st.container():
-                    st.markdown(f"### {title}")
-                    st.markdown(f"{summary[:150]}...")
-                    if st.button("Read Full Article", key=f"latest_{title}"):
-                        st.markdown("---")
-                        display_article(content)
+                    st.markdown(f"### {entry['title']}")
+                    st.markdown(f"{entry['summary'][:150]}...")
+                    st.button("Read Full Article", key=f"latest_{entry['path']}",
+                              on_click=open_article, args=(entry,))
                 st.markdown("---")
     
+    elif view_mode == "Search":
+        show_search()
+    
     else:  # All Articles view
         st.markdown("## All Articles")
-        for file in article_files:
-            content = read_markdown_file(file)
-            title, summary = get_article_metadata(content)
-            
-            with st.expander(title):
-                display_article(content)
+        pages = max(1, -(-len(articles) // PAGE_SIZE))
+        page = st.sidebar.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+        st.caption(f"{len(articles)} articles, page {page} of {pages}")
+        for entry in articles[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]:
+            st.markdown(f"### {entry['title']}")
+            st.markdown(entry['summary'])
+            st.button("Read Full Article", key=f"all_{entry['path']}",
+                      on_click=open_article, args=(entry,))
             st.markdown("---")
 
 if __name__ == "__main__":
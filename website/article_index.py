@@ -0,0 +1,88 @@
+import os
+import json
+import threading
+from pathlib import Path
+
+# The repository's cache directory, whichever directory the app is started from
+INDEX_FILE = str(Path(__file__).resolve().parent.parent / "cache" / "article_index.json")
+
+def get_article_metadata(content):
+    """Extract title and first paragraph as summary"""
+    lines = content.split('\n')
+    title = lines[0].replace('#', '').strip()
+    
+    # Find first paragraph for summary
+    summary = ""
+    for line in lines[1:]:
+        if line.strip() and not line.startswith('#'):
+            summary = line.strip()
+            break
+    
+    return title, summary
+
+class ArticleIndex:
+    """Persistent title/summary index of the generated articles.
+
+    Refreshing only stats the directory; a file is read again only when
+    its mtime (or size) changed since it was indexed, so the cost of a
+    rerun does not grow with the size of the article bodies.
+    """
+
+    def __init__(self, articles_dir="generated_articles", index_file=INDEX_FILE):
+        self.articles_dir = articles_dir
+        self.index_file = index_file
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(index_file):
+            try:
+                with open(index_file, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def refresh(self):
+        """Bring the index up to date with the directory; returns True if anything changed"""
+        with self._lock:
+            changed = False
+            seen = set()
+            if os.path.isdir(self.articles_dir):
+                with os.scandir(self.articles_dir) as it:
+                    for entry in it:
+                        if not entry.name.endswith('.md') or not entry.is_file():
+                            continue
+                        path = os.path.join(self.articles_dir, entry.name)
+                        seen.add(path)
+                        stat = entry.stat()
+                        cached = self.entries.get(path)
+                        if cached and cached['mtime'] == stat.st_mtime and cached['size'] == stat.st_size:
+                            continue
+                        with open(path, 'r', encoding='utf-8') as f:
+                            title, summary = get_article_metadata(f.read())
+                        self.entries[path] = {
+                            'path': path,
+                            'title': title,
+                            'summary': summary,
+                            'mtime': stat.st_mtime,
+                            'size': stat.st_size,
+                        }
+                        changed = True
+            for path in set(self.entries) - seen:
+                del self.entries[path]
+                changed = True
+            if changed:
+                self.save()
+            return changed
+
+    def save(self):
+        directory = os.path.dirname(self.index_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = f"{self.index_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+    def articles(self):
+        """Index entries, newest first"""
+        with self._lock:
+            return sorted(self.entries.values(), key=lambda entry: entry['mtime'], reverse=True)
@@ -0,0 +1,190 @@
+import os
+import sys
+import html
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+import markdown
+from article_index import ArticleIndex
+
+# The manifest, search index and TRIZ data live with the pipeline scripts one level up
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from stage_manifest import StageManifest
+from search_index import SearchIndex, SEARCH_DB
+from triz import get_triz_index
+
+STYLE_FILE = Path(__file__).resolve().parent / "static" / "style.css"
+SITE_TITLE = "Innovation & TRIZ Research News"
+SITE_SUBTITLE = "Exploring Scientific Breakthroughs Through TRIZ Principles"
+PAGE_SIZE = 50
+
+# Bump when the page templates change, so every article is rebuilt once
+TEMPLATE_VERSION = "1"
+
+def page(title, body, root=''):
+    """Wrap page content in the shared layout; `root` is the relative path to the site root"""
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(title)}</title>
+<link rel="stylesheet" href="{root}style.css">
+</head>
+<body>
+<div class="header">
+<h1><a href="{root}index.html" style="color: inherit">{html.escape(SITE_TITLE)}</a></h1>
+<p class="subtitle">{html.escape(SITE_SUBTITLE)}</p>
+<p><a href="{root}index.html" style="color: inherit">Articles</a> · <a href="{root}principles/index.html" style="color: inherit">TRIZ Principles</a></p>
+</div>
+{body}
+</body>
+</html>
+"""
+
+def article_card(entry, root=''):
+    return f"""<div class="article-card">
+<h4><a href="{root}articles/{entry['slug']}.html">{html.escape(entry['title'])}</a></h4>
+<p>{html.escape(entry['summary'])}</p>
+</div>"""
+
+def write_if_changed(path, content):
+    """Write a file only if its content differs, so unchanged pages keep their mtime"""
+    path = Path(path)
+    if path.exists() and path.read_text(encoding='utf-8') == content:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(content, encoding='utf-8')
+    os.replace(tmp_path, path)
+    return True
+
+class StaticSiteExporter:
+    """Render the generated articles to a static HTML site.
+
+    Article pages are rebuilt only when the hash of their Markdown (plus
+    their principles, the stylesheet and the template version) changed
+    since the last export;
+    the index and principle pages are cheap listings and are re-rendered
+    each run but only rewritten when their HTML differs.
+    """
+
+    def __init__(self, articles_dir="generated_articles", output_dir="site", search_db=SEARCH_DB):
+        self.articles_dir = articles_dir
+        self.output_dir = Path(output_dir)
+        self.manifest = StageManifest(str(self.output_dir / ".build.json"))
+        # Kept with the site, so another --articles-dir never reads the app's index
+        self.index = ArticleIndex(articles_dir, str(self.output_dir / ".article_index.json"))
+        self.search_index = SearchIndex(search_db) if os.path.exists(search_db) else None
+        self.triz = get_triz_index()
+        self.markdown = markdown.Markdown(extensions=['extra'])
+        with open(STYLE_FILE, 'rb') as f:
+            self.style_hash = hashlib.sha256(f.read()).hexdigest()
+
+    def principles_for(self, entry, body):
+        """TRIZ principles of an article, from the search index when it knows the article"""
+        if self.search_index:
+            results = self.search_index.principles_for(entry['path'])
+            if results is not None:
+                return results
+        return self.triz.find_mentions(body)
+
+    def build_article(self, entry, body):
+        self.markdown.reset()
+        content = self.markdown.convert(body)
+        links = ' · '.join(
+            f'<a href="../principles/{pid}.html">{html.escape(self.triz.by_id[pid]["name"])}</a>'
+            for pid in entry['principles'] if pid in self.triz.by_id
+        )
+        principles = f'<p class="subtitle">TRIZ principles: {links}</p>' if links else ''
+        return page(entry['title'], f'<div class="featured-article">\n{principles}\n{content}\n</div>', root='../')
+
+    def export(self, force=False):
+        """Export the site; returns the number of article pages rebuilt"""
+        self.index.refresh()
+        # Copies, since slug and principles are added below
+        entries = [dict(entry) for entry in self.index.articles()]
+        rebuilt = 0
+        for entry in entries:
+            entry['slug'] = Path(entry['path']).stem
+            output_path = self.output_dir / "articles" / f"{entry['slug']}.html"
+            with open(entry['path'], 'rb') as f:
+                raw = f.read()
+            body = raw.decode('utf-8')
+            entry['principles'] = self.principles_for(entry, body)
+            # The page also shows the principles and uses the stylesheet and template
+            extra = f"{entry['principles']}\0{self.style_hash}\0{TEMPLATE_VERSION}".encode('utf-8')
+            input_hash = hashlib.sha256(raw + b"\0" + extra).hexdigest()
+            if not force and self.manifest.is_current(entry['path'], input_hash):
+                continue
+            write_if_changed(output_path, self.build_article(entry, body))
+            self.manifest.record(entry['path'], input_hash, output_path)
+            rebuilt += 1
+
+        # Pages of articles that were deleted since the last export
+        current = {entry['path'] for entry in entries}
+        for key in self.manifest.keys():
+            if key not in current:
+                self.manifest.forget(key)
+
+        self.build_listings(entries)
+        write_if_changed(self.output_dir / "style.css", STYLE_FILE.read_text(encoding='utf-8'))
+        return rebuilt
+
+    def build_listings(self, entries):
+        # Newest first, PAGE_SIZE articles per index page
+        pages = [entries[i:i + PAGE_SIZE] for i in range(0, len(entries), PAGE_SIZE)] or [[]]
+        for number, page_entries in enumerate(pages, 1):
+            cards = '\n'.join(article_card(entry) for entry in page_entries)
+            nav = []
+            if number > 1:
+                nav.append(f'<a href="{index_page_name(number - 1)}">← Newer</a>')
+            if number < len(pages):
+                nav.append(f'<a href="{index_page_name(number + 1)}">Older →</a>')
+            body = f"<h2>All Articles</h2>\n{cards}\n<p>{' · '.join(nav)}</p>"
+            write_if_changed(self.output_dir / index_page_name(number), page(SITE_TITLE, body))
+        for stale_page in self.output_dir.glob("page-*.html"):
+            if int(stale_page.stem.split('-')[1]) > len(pages):
+                stale_page.unlink()
+
+        by_principle = {}
+        for entry in entries:
+            for pid in entry['principles']:
+                by_principle.setdefault(pid, []).append(entry)
+        items = []
+        for principle in self.triz.principles:
+            pid = principle['id']
+            articles = by_principle.get(pid, [])
+            principle_file = self.output_dir / "principles" / f"{pid}.html"
+            if not articles:
+                if principle_file.exists():
+                    principle_file.unlink()
+                continue
+            items.append(f'<li><a href="{pid}.html">{pid}. {html.escape(principle["name"])}</a> ({len(articles)})</li>')
+            cards = '\n'.join(article_card(entry, root='../') for entry in articles)
+            body = f"<h2>{pid}. {html.escape(principle['name'])}</h2>\n<p>{html.escape(principle.get('explanation', ''))}</p>\n{cards}"
+            write_if_changed(principle_file, page(principle['name'], body, root='../'))
+        body = "<h2>TRIZ Principles</h2>\n<ul>\n" + '\n'.join(items) + "\n</ul>"
+        write_if_changed(self.output_dir / "principles" / "index.html", page("TRIZ Principles", body, root='../'))
+
+def index_page_name(number):
+    return "index.html" if number == 1 else f"page-{number}.html"
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the generated articles as a static HTML site")
+    parser.add_argument('--articles-dir', default='generated_articles', help="Directory of generated Markdown articles")
+    parser.add_argument('--output-dir', default='site', help="Directory to write the site to")
+    parser.add_argument('--search-db', default=SEARCH_DB, help="Search index to read article principles from")
+    parser.add_argument('--force', action='store_true', help="Rebuild every article page")
+    parser.add_argument('--clean', action='store_true', help="Delete the output directory first")
+    args = parser.parse_args()
+
+    if args.clean and os.path.isdir(args.output_dir):
+        shutil.rmtree(args.output_dir)
+    exporter = StaticSiteExporter(args.articles_dir, args.output_dir, args.search_db)
+    rebuilt = exporter.export(force=args.force)
+    print(f"Exported {len(exporter.index.entries)} articles to {args.output_dir}/ ({rebuilt} pages rebuilt)")
+
+if __name__ == "__main__":
+    main()